@@ -11,6 +11,16 @@ from .prompts import ROUTER_PROMPT, TOXIC_CHECKER_PROMPT, QUERY_TRANSFORM_PROMPT
 from ..core.config import Config
 
 
+# Tag marking model runs whose tokens are forwarded to the user when streaming
+STREAM_TAG = "stream_to_user"
+
+# Custom event carrying answer tokens produced outside LangChain models (RAGService)
+ANSWER_TOKEN_EVENT = "answer_token"
+
+# Custom event carrying the sources an answer is grounded on, sent before generation
+SOURCES_EVENT = "retrieved_sources"
+
+
 class RouteQuery(BaseModel):
     """Route a user query to the most relevant destination."""
 
@@ -86,6 +86,22 @@ Thông tin bổ sung:
         },
     )
 
+    retrieval_mode: Literal["dense", "hybrid"] = field(
+        default=Config.RETRIEVAL_MODE,
+        metadata={
+            "description": "Retrieval strategy: dense vector search only, or hybrid "
+                          "dense + BM25 results fused with reciprocal rank fusion."
+        },
+    )
+
+    speculative_retrieval: bool = field(
+        default=Config.SPECULATIVE_RETRIEVAL,
+        metadata={
+            "description": "Start retrieval concurrently with query routing; the result is "
+                          "discarded when the query is not routed to RAG."
+        },
+    )
+
     search_threshold: float = field(
         default=0.7,
         metadata={"description": "The search threshold for each search query."}
@@ -1,20 +1,30 @@
 """Main Graph Builder for the complete agent workflow."""
 
+import time
+import asyncio
 import logging
-from typing import Literal, cast
+from types import SimpleNamespace
+from typing import Literal, Optional, Dict, Tuple, Any, cast
 from langgraph.checkpoint.memory import MemorySaver  
 from langgraph.graph import StateGraph
 from langgraph.constants import START, END
 from langchain_core.messages import AIMessage
+from langchain_core.callbacks.manager import adispatch_custom_event
 
 from .state import State, InputState
 from .configuration import Configuration
 from .rag_graph import RAGGraphBuilder
+from .chains import ANSWER_TOKEN_EVENT, SOURCES_EVENT
 from .nodes.routing_nodes import AnalyzeQueryNode
 from .nodes.generation_nodes import GenericResponseNode
+from .router import query_router
+from ..services.semantic_cache import semantic_cache
 
 logger = logging.getLogger(__name__)
 
+# Seconds a speculative retrieval is kept for rag_response before it is evicted
+SPECULATIVE_TTL_SECONDS = 30
+
 
 class MainGraphBuilder:
     """Builder for the main agent workflow graph."""
@@ -26,6 +36,15 @@ class MainGraphBuilder:
         # Initialize nodes
         self.analyze_node = AnalyzeQueryNode()
         self.generic_node = GenericResponseNode()
+        
+        # Shared RAG service (Milvus connection and loaded collection are pooled)
+        from ..services.rag_service import RAGService
+        self.rag_service = RAGService()
+        
+        # Retrievals started concurrently with routing: {thread_id: (query, task, started_at)}
+        self._speculative: Dict[str, Tuple[str, asyncio.Task, float]] = {}
+        # Counters reported through get_speculation_stats()
+        self.speculation_stats = {"started": 0, "used": 0, "wasted": 0}
     
     def compile_graph(self, checkpointer=None):
         """Compile the complete agent graph."""
@@ -39,12 +58,23 @@ class MainGraphBuilder:
         builder = StateGraph(State, input=InputState, config_schema=Configuration)
         
         # Add nodes
+        builder.add_node("check_cache", self.check_cache)
         builder.add_node("analyze_query", self.analyze_query)
         builder.add_node("rag_response", self.rag_response)
         builder.add_node("generic_response", self.generic_response)
         
         # Define workflow
-        builder.add_edge(START, "analyze_query")
+        builder.add_edge(START, "check_cache")
+        
+        # Answer repeated questions straight from the semantic cache
+        builder.add_conditional_edges(
+            "check_cache",
+            self.route_cache,
+            {
+                "hit": END,
+                "miss": "analyze_query"
+            }
+        )
         
         # Conditional routing based on query analysis
         builder.add_conditional_edges(
@@ -61,9 +91,107 @@ class MainGraphBuilder:
         
         return builder
     
+    async def check_cache(self, state: State, config):
+        """Look up the question in the semantic answer cache."""
+        try:
+            user_message = state.messages[-1] if state.messages else None
+            if not user_message or not isinstance(user_message.content, str):
+                return {"cache_hit": False}
+            
+            cached = await semantic_cache.alookup_question(user_message.content)
+            if not cached:
+                return {"cache_hit": False}
+            
+            await adispatch_custom_event(
+                SOURCES_EVENT, {"sources": cached["result"].get("sources", [])}, config=config
+            )
+            message = self._build_rag_message(cached["result"], cache_hit=True)
+            return {"messages": [message], "cache_hit": True}
+            
+        except Exception as e:
+            logger.error(f"Error in semantic cache lookup: {e}")
+            return {"cache_hit": False}
+    
+    def route_cache(self, state: State) -> Literal["hit"] | Literal["miss"]:
+        """Route on semantic cache result."""
+        return "hit" if getattr(state, 'cache_hit', False) else "miss"
+    
+    @staticmethod
+    def _thread_id(config) -> str:
+        return (config or {}).get("configurable", {}).get("thread_id", "")
+    
+    def _start_speculative_retrieval(self, query: str, config):
+        """Start retrieval for the query while the router decides whether it is needed."""
+        configuration = Configuration.from_runnable_config(config)
+        if not configuration.speculative_retrieval or not self.rag_service.milvus_connected:
+            return
+        
+        # Obvious small talk is never retrieved for
+        decision = query_router.classify_keywords(query)
+        if decision and decision.destination == "casual":
+            return
+        
+        # Entries are keyed by thread; runs without one would share a key across requests
+        key = self._thread_id(config)
+        if not key:
+            return
+        
+        self._evict_stale_speculations()
+        self._discard_speculative_retrieval(key)
+        task = asyncio.create_task(
+            self.rag_service.aretrieve_documents(query, mode=configuration.retrieval_mode)
+        )
+        # Runs cancelled before rag_response never claim their entry: expire it once finished
+        task.add_done_callback(
+            lambda done: asyncio.get_running_loop().call_later(
+                SPECULATIVE_TTL_SECONDS, self._expire_speculative_retrieval, key, done
+            )
+        )
+        self._speculative[key] = (query, task, time.monotonic())
+        self.speculation_stats["started"] += 1
+    
+    def _cancel_speculation(self, entry: Optional[Tuple[str, asyncio.Task, float]], reason: str):
+        """Cancel a speculative retrieval whose result will not be used."""
+        if entry:
+            entry[1].cancel()
+            self.speculation_stats["wasted"] += 1
+            logger.info(f"Discarded speculative retrieval ({reason})")
+    
+    def _discard_speculative_retrieval(self, key: str, reason: str = "query not routed to RAG"):
+        """Drop and cancel the speculative retrieval of a thread, if any."""
+        self._cancel_speculation(self._speculative.pop(key, None), reason)
+    
+    def _expire_speculative_retrieval(self, key: str, task: asyncio.Task):
+        """Drop a finished speculative retrieval that was never claimed."""
+        entry = self._speculative.get(key)
+        if entry and entry[1] is task:
+            self._discard_speculative_retrieval(key, "expired unclaimed")
+    
+    def _evict_stale_speculations(self):
+        """Drop speculative retrievals older than SPECULATIVE_TTL_SECONDS (e.g. hung tasks)."""
+        cutoff = time.monotonic() - SPECULATIVE_TTL_SECONDS
+        for key in [key for key, entry in self._speculative.items() if entry[2] < cutoff]:
+            self._discard_speculative_retrieval(key, "expired unclaimed")
+    
+    def _take_speculative_retrieval(self, key: str) -> Optional[Tuple[str, asyncio.Task, float]]:
+        """Claim the speculative retrieval of a thread; the caller must use or cancel it."""
+        return self._speculative.pop(key, None) if key else None
+    
+    def get_speculation_stats(self) -> Dict[str, Any]:
+        """Get speculative retrieval statistics."""
+        stats = dict(self.speculation_stats)
+        finished = stats["used"] + stats["wasted"]
+        stats["waste_rate"] = round(stats["wasted"] / finished, 4) if finished else 0.0
+        return stats
+    
     async def analyze_query(self, state: State, config):
         """Analyze incoming query and prepare for routing."""
+        thread_id = self._thread_id(config)
         try:
+            user_message = state.messages[-1] if state.messages else None
+            if user_message and isinstance(user_message.content, str):
+                self._start_speculative_retrieval(user_message.content, config)
+            
             # Create proper ChatState instance
             from .state import ChatState
             
@@ -87,10 +215,14 @@ class MainGraphBuilder:
             }
             
             logger.info(f"State updates: {updates}")
+            
+            if self.route_query(SimpleNamespace(**updates)) != "rag":
+                self._discard_speculative_retrieval(thread_id)
             return updates
             
         except Exception as e:
             logger.error(f"Error in query analysis: {e}")
+            self._discard_speculative_retrieval(thread_id)
             return {
                 "needs_search": False,
                 "route_destination": "casual", 
@@ -114,10 +246,9 @@ class MainGraphBuilder:
     
     async def rag_response(self, state: State, config):
         """Handle RAG-based responses using existing RAG service."""
+        # Claim the speculative retrieval up front so every exit path releases it
+        speculation = self._take_speculative_retrieval(self._thread_id(config))
         try:
-            # Import RAG service
-            from ..services.rag_service import RAGService
-            
             # Get user query
             user_message = state.messages[-1] if state.messages else None
             if not user_message:
@@ -125,11 +256,10 @@ class MainGraphBuilder:
             
             query = user_message.content
             
-            # Initialize RAG service
-            rag_service = RAGService()
+            rag_service = self.rag_service
             
-            # Connect to Milvus if needed
-            if not rag_service.connect_milvus():
+            # Connect to Milvus if needed (no-op once the pooled connection is healthy)
+            if not await asyncio.to_thread(rag_service.connect_milvus):
                 logger.warning("Could not connect to Milvus, providing fallback response")
                 message = AIMessage(
                     content="Xin lỗi, hệ thống tìm kiếm hiện không khả dụng. Vui lòng thử lại sau.",
@@ -140,40 +270,37 @@ class MainGraphBuilder:
                 )
                 return {"messages": [message]}
             
-            # Perform RAG query
-            rag_result = rag_service.query(query, include_sources=True)
-            
-            # Extract response and metadata
-            response_content = rag_result.get("response", "Xin lỗi, không tìm thấy thông tin liên quan.")
-            sources = rag_result.get("sources", [])
-            confidence = rag_result.get("confidence", 0.0)
-            
-            # Format source information
-            source_info = ""
-            if sources:
-                source_info = "\n\nNguồn tham khảo:\n"
-                for i, source in enumerate(sources[:3], 1):
-                    source_info += f"{i}. {source['title']} - {source['section']}\n"
-            
-            # Create final response
-            if source_info and confidence > 0.3:
-                final_content = f"{response_content}{source_info}"
-            else:
-                final_content = response_content
+            # Surface answer tokens to astream_events consumers as they are generated
+            async def on_token(token: str):
+                await adispatch_custom_event(ANSWER_TOKEN_EVENT, {"token": token}, config=config)
             
-            # Create AI message
-            message = AIMessage(
-                content=final_content,
-                additional_kwargs={
-                    "extracted_entities": [str(i) for i in range(1, len(sources[:3]) + 1)],
-                    "source_info": source_info.strip(),
-                    "confidence": confidence,
-                    "rag_used": True,
-                    "sources_count": len(sources)
-                }
+            async def on_sources(sources: list):
+                await adispatch_custom_event(SOURCES_EVENT, {"sources": sources}, config=config)
+            
+            # Reuse the retrieval started alongside routing when it was for this query
+            documents = None
+            if speculation and speculation[0] == query:
+                documents = await speculation[1]
+                speculation = None
+                self.speculation_stats["used"] += 1
+            
+            # Perform RAG query
+            rag_result = await rag_service.aquery(
+                query,
+                include_sources=True,
+                on_token=on_token,
+                on_sources=on_sources,
+                mode=Configuration.from_runnable_config(config).retrieval_mode,
+                documents=documents
             )
             
-            logger.info(f"RAG response generated successfully with confidence {confidence:.3f}")
+            # Cache grounded answers for repeated questions (never error messages)
+            if rag_result.get("generated") and rag_result.get("sources") and rag_result.get("source_files"):
+                await semantic_cache.astore_question(query, rag_result, rag_result["source_files"])
+            
+            message = self._build_rag_message(rag_result)
+            
+            logger.info(f"RAG response generated successfully with confidence {rag_result.get('confidence', 0.0):.3f}")
             return {"messages": [message]}
             
         except Exception as e:
@@ -183,6 +310,41 @@ class MainGraphBuilder:
                 additional_kwargs={"error": str(e), "rag_used": False}
             )
             return {"messages": [error_message]}
+        finally:
+            # Unused: Milvus unavailable, a different query, or the node failed or was cancelled
+            self._cancel_speculation(speculation, "not used by rag_response")
+    
+    @staticmethod
+    def _build_rag_message(rag_result: dict, cache_hit: bool = False) -> AIMessage:
+        """Format a RAG result (fresh or cached) as the final AI message."""
+        response_content = rag_result.get("response", "Xin lỗi, không tìm thấy thông tin liên quan.")
+        sources = rag_result.get("sources", [])
+        confidence = rag_result.get("confidence", 0.0)
+        
+        # Format source information
+        source_info = ""
+        if sources:
+            source_info = "\n\nNguồn tham khảo:\n"
+            for i, source in enumerate(sources[:3], 1):
+                source_info += f"{i}. {source['title']} - {source['section']}\n"
+        
+        # Create final response
+        if source_info and confidence > 0.3:
+            final_content = f"{response_content}{source_info}"
+        else:
+            final_content = response_content
+        
+        return AIMessage(
+            content=final_content,
+            additional_kwargs={
+                "extracted_entities": [str(i) for i in range(1, len(sources[:3]) + 1)],
+                "source_info": source_info.strip(),
+                "confidence": confidence,
+                "rag_used": True,
+                "sources_count": len(sources),
+                "cache_hit": cache_hit
+            }
+        )
     
     async def generic_response(self, state: State, config):
         """Handle generic conversational responses."""
@@ -7,7 +7,7 @@ from langchain_core.runnables import RunnableConfig
 from .base_node import BaseNode
 from ..state import ChatState
 from ..configuration import Configuration
-from ..chains import get_generation_chain, load_chat_model
+from ..chains import get_generation_chain, load_chat_model, STREAM_TAG
 from ..utils import (
     get_ai_and_human_messages, 
     group_by_format_documents, 
@@ -108,8 +108,8 @@ class GenericResponseNode(BaseNode):
                 memories=dict_to_xml(state.memories)
             )
             
-            # Load model and generate response
-            model = load_chat_model(configuration.model)
+            # Load model and generate response (tagged so its tokens are streamed to the user)
+            model = load_chat_model(configuration.model).with_config(tags=[STREAM_TAG])
             
             response = await model.ainvoke([
                 SystemMessage(content=system_message),
@@ -9,6 +9,7 @@ from .base_node import BaseNode
 from ..state import ChatState
 from ..configuration import Configuration
 from ...services.milvus_service import MilvusService
+from ...services.semantic_cache import semantic_cache
 from ..utils import calculate_confidence
 
 logger = logging.getLogger(__name__)
@@ -25,13 +26,10 @@ class RetrieveNode(BaseNode):
         """Connect to Milvus if not already connected."""
         if not self.connected:
             try:
-                if self.milvus_service.connect():
-                    from pymilvus import Collection
-                    self.milvus_service.collection = Collection("document_embeddings")
-                    if self.milvus_service.load_collection():
-                        self.connected = True
-                        logger.info("Connected to Milvus successfully")
-                        return True
+                if self.milvus_service.connect() and self.milvus_service.attach_collection():
+                    self.connected = True
+                    logger.info("Connected to Milvus successfully")
+                    return True
                 logger.error("Failed to connect to Milvus")
                 return False
             except Exception as e:
@@ -57,7 +55,10 @@ class RetrieveNode(BaseNode):
             top_k = configuration.max_search_results
             
             # Perform search
-            search_results = self.milvus_service.search_similar(query, top_k=top_k)
+            if configuration.retrieval_mode == "hybrid":
+                search_results = await self.milvus_service.asearch_hybrid(query, top_k=top_k)
+            else:
+                search_results = await self.milvus_service.asearch_similar(query, top_k=top_k)
             
             # Convert to Langchain Documents
             documents = []
@@ -93,9 +94,30 @@ class RetrieveNode(BaseNode):
 
 
 class CachedDocumentsNode(BaseNode):
-    """Node to check for cached documents (placeholder for future enhancement)."""
+    """Node to answer repeated questions from the semantic answer cache."""
     
     async def __call__(self, state: ChatState, config: RunnableConfig) -> dict:
-        """Check for cached documents - currently a pass-through."""
-        logger.info("Cached documents check (pass-through)")
-        return {"retrieved_documents": []}  # Could implement caching logic here
+        """Look up the (transformed) query among recently answered questions."""
+        try:
+            query = state.better_query or (state.messages[-1].content if state.messages else "")
+            cached = await semantic_cache.alookup_question(query) if query else None
+            
+            if not cached:
+                return {"retrieved_documents": [], "cache_hit": False}
+            
+            result = cached["result"]
+            sources = result.get("sources", [])
+            return {
+                "retrieved_documents": [source.get("file_name", "") for source in sources],
+                "generation": result.get("response", ""),
+                "source_info": "\n".join(
+                    f"{i}. {source['title']} - {source['section']}"
+                    for i, source in enumerate(sources[:3], 1)
+                ),
+                "confidence": result.get("confidence", 0.0),
+                "cache_hit": True
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in semantic cache lookup: {e}")
+            return {"retrieved_documents": [], "cache_hit": False}
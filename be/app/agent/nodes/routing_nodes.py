@@ -7,6 +7,7 @@ from langchain_core.runnables import RunnableConfig
 from .base_node import BaseNode
 from ..state import ChatState
 from ..chains import get_route_chain
+from ..router import query_router
 from ..utils import get_ai_and_human_messages, detect_language
 
 logger = logging.getLogger(__name__)
@@ -46,19 +47,23 @@ class AnalyzeQueryNode(BaseNode):
             
             valid_messages = get_ai_and_human_messages(messages)
             
-            # Get routing decision
-            route_chain = get_route_chain(config)
-            route_result = await route_chain.ainvoke({
-                "messages": valid_messages[:-1] if len(valid_messages) > 1 else [],
-                "user": query
-            })
+            async def llm_route() -> str:
+                route_chain = get_route_chain(config)
+                route_result = await route_chain.ainvoke({
+                    "messages": valid_messages[:-1] if len(valid_messages) > 1 else [],
+                    "user": query
+                })
+                return route_result.destination
             
-            needs_search = route_result.destination == "other"
+            # Get routing decision (the LLM router only runs when local tiers are unsure)
+            decision = await query_router.route(query, llm_route)
             
-            logger.info(f"Query analysis: route={route_result.destination}, language={language}, needs_search={needs_search}")
+            needs_search = decision.destination == "other"
+            
+            logger.info(f"Query analysis: route={decision.destination} (tier={decision.tier}), language={language}, needs_search={needs_search}")
             
             return {
-                "route_destination": route_result.destination,
+                "route_destination": decision.destination,
                 "needs_search": needs_search,
                 "language": language
             }
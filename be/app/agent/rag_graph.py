@@ -38,7 +38,16 @@ class RAGGraphBuilder:
         # Define the workflow
         graph.set_entry_point("transform_query")
         graph.add_edge("transform_query", "cached_documents")
-        graph.add_edge("cached_documents", "retrieve")
+        
+        # Skip retrieval and generation when the semantic cache already has the answer
+        graph.add_conditional_edges(
+            "cached_documents",
+            self.decide_to_retrieve,
+            {
+                "cached": END,
+                "retrieve": "retrieve",
+            }
+        )
         
         # Conditional routing after retrieval
         graph.add_conditional_edges(
@@ -55,6 +64,14 @@ class RAGGraphBuilder:
         
         return graph.compile(checkpointer=self.memory)
     
+    @staticmethod
+    def decide_to_retrieve(state: ChatState) -> Literal["cached"] | Literal["retrieve"]:
+        """Decide whether the cached answer can be returned as-is."""
+        if state.cache_hit:
+            logger.info("Semantic cache hit - skipping retrieval and generation")
+            return "cached"
+        return "retrieve"
+    
     @staticmethod
     def decide_to_generate(state: ChatState) -> Literal["no_documents"] | Literal["generate"]:
         """Decide whether to generate response based on retrieved documents."""
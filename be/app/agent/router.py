@@ -0,0 +1,258 @@
+"""Tiered query router: keyword rules, embedding centroids, then the LLM router."""
+
+import re
+import time
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Any, Optional
+
+import numpy as np
+
+from .utils import RAG_KEYWORDS
+from ..core.config import Config
+from ..services.openai_service import openai_service
+
+logger = logging.getLogger(__name__)
+
+TIERS = ("keyword", "centroid", "llm")
+
+# Seconds before retrying to build centroids after the seed embeddings failed
+CENTROID_RETRY_SECONDS = 60
+
+# RAG keywords too generic to decide a route on their own ("xin chào", "bạn làm gì")
+_GENERIC_KEYWORDS = {'cấp', 'làm', 'xin', 'thời gian', 'bao lâu', 'ở đâu', 'như thế nào', 'cần gì'}
+
+_DOMAIN_PATTERN = re.compile(
+    r"\b(?:" + "|".join(re.escape(k) for k in RAG_KEYWORDS if k not in _GENERIC_KEYWORDS)
+    + r"|luật|nghị định|thông tư|căn cước|cccd|hộ khẩu|hộ chiếu|khai sinh|giấy phép)\b"
+)
+
+# Whole-message small talk (matched after lowercasing and stripping punctuation)
+_CASUAL_PATTERN = re.compile(
+    r"^(?:"
+    r"(?:xin )?chào(?: buổi (?:sáng|trưa|chiều|tối))?|hello|hi|hey|alo|good (?:morning|afternoon|evening)"
+    r"|(?:xin )?cảm ơn|cám ơn|thanks?(?: you)?|tks|ok(?:ay)?|oke|vâng|dạ"
+    r"|tạm biệt|bye|goodbye|hẹn gặp lại"
+    r"|(?:bạn|em) (?:là ai|tên (?:là )?gì|làm (?:được )?(?:gì|những gì)|khỏe không|có khỏe không)"
+    r"|who are you|what is your name|how are you"
+    r")(?: (?:bạn|em|anh|chị|ad|admin|trợ lý|bot|nhé|nha|nhiều|ạ|ơi|nhé bạn))*$"
+)
+
+# Labelled examples the centroids are built from (mirrors ROUTER_PROMPT)
+_SEED_QUERIES = {
+    "casual": [
+        "Xin chào", "Chào bạn, chúc một ngày tốt lành", "Hello", "Chào buổi sáng",
+        "Tạm biệt nhé", "Hẹn gặp lại bạn", "Cảm ơn bạn nhiều", "Bạn khỏe không?",
+        "Bạn tên là gì?", "Bạn có thể làm gì?", "Bạn là ai vậy?", "Hôm nay bạn thế nào?",
+        "How are you?", "Thank you", "Goodbye",
+    ],
+    "other": [
+        "Thủ tục đăng ký thường trú cần những giấy tờ gì?",
+        "Làm căn cước công dân ở đâu?",
+        "Lệ phí cấp hộ chiếu là bao nhiêu?",
+        "Thời gian xử lý hồ sơ đăng ký kết hôn mất bao lâu?",
+        "Điều kiện để được cấp giấy phép lái xe",
+        "Quy trình đăng ký khai sinh cho con",
+        "Nộp hồ sơ xin cấp giấy phép kinh doanh ở cơ quan nào?",
+        "Tôi muốn chuyển hộ khẩu sang tỉnh khác thì làm thế nào?",
+        "Mất giấy tờ xe thì xin cấp lại như thế nào?",
+        "Quy định mới về tạm trú năm nay",
+        "How do I register a birth certificate?",
+        "What documents are needed for a passport?",
+    ],
+}
+
+
+@dataclass
+class RouteDecision:
+    """Routing decision and the tier that made it."""
+
+    destination: str
+    tier: str
+    confidence: float
+
+
+class QueryRouter:
+    """Route queries to casual chat or RAG, calling the LLM only when unsure."""
+
+    def __init__(
+        self,
+        fast_path_enabled: bool = None,
+        centroid_enabled: bool = None,
+        centroid_margin: float = None,
+    ):
+        """
+        Initialize query router
+
+        Args:
+            fast_path_enabled: Whether local tiers run before the LLM router
+            centroid_enabled: Whether the embedding nearest-centroid tier runs
+            centroid_margin: Minimum similarity lead of the nearest centroid
+        """
+        self.fast_path_enabled = fast_path_enabled if fast_path_enabled is not None else Config.ROUTER_FAST_PATH_ENABLED
+        self.centroid_enabled = centroid_enabled if centroid_enabled is not None else Config.ROUTER_CENTROID_ENABLED
+        self.centroid_margin = centroid_margin if centroid_margin is not None else Config.ROUTER_CENTROID_MARGIN
+
+        # Unit-normalized centroid per destination, built on first use
+        self._centroids: Optional[Dict[str, np.ndarray]] = None
+        self._centroid_lock: Optional[asyncio.Lock] = None
+        self._centroid_failed_at: Optional[float] = None
+
+        # Counters reported through get_stats()
+        self._lock = threading.Lock()
+        self._decisions = {tier: {"casual": 0, "other": 0} for tier in TIERS}
+        self._attempts = {tier: 0 for tier in TIERS}
+        self._latency_ms = {tier: 0.0 for tier in TIERS}
+        self._max_latency_ms = {tier: 0.0 for tier in TIERS}
+
+    def _record(self, tier: str, started: float, destination: Optional[str] = None):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._attempts[tier] += 1
+            self._latency_ms[tier] += elapsed_ms
+            self._max_latency_ms[tier] = max(self._max_latency_ms[tier], elapsed_ms)
+            if destination:
+                self._decisions[tier][destination] += 1
+
+    @staticmethod
+    def _normalize(vector) -> Optional[np.ndarray]:
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.size == 0:
+            return None
+        norm = np.linalg.norm(vector)
+        if not norm or not np.isfinite(norm):
+            return None
+        return vector / norm
+
+    def classify_keywords(self, query: str) -> Optional[RouteDecision]:
+        """Decide domain questions and small talk from keyword rules"""
+        text = query.lower().strip()
+        if _DOMAIN_PATTERN.search(text):
+            return RouteDecision("other", "keyword", 1.0)
+
+        normalized = re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", text)).strip()
+        if normalized and _CASUAL_PATTERN.match(normalized):
+            return RouteDecision("casual", "keyword", 1.0)
+        return None
+
+    async def _ensure_centroids(self) -> Optional[Dict[str, np.ndarray]]:
+        if self._centroids is not None:
+            return self._centroids
+        if self._centroid_lock is None:
+            self._centroid_lock = asyncio.Lock()
+
+        async with self._centroid_lock:
+            if self._centroids is not None:
+                return self._centroids
+            # Back off after a failed build instead of re-embedding the seeds on every message
+            if self._centroid_failed_at and time.monotonic() - self._centroid_failed_at < CENTROID_RETRY_SECONDS:
+                return None
+
+            labels = list(_SEED_QUERIES)
+            texts = [text for label in labels for text in _SEED_QUERIES[label]]
+            # Seeds are embedded once per process (and served by the embedding cache after that)
+            embeddings = await openai_service.aget_embeddings(texts)
+
+            # aget_embeddings returns [] when the service is unavailable or a batch fails
+            rows = [self._normalize(e) for e in embeddings] if len(embeddings) == len(texts) else []
+            if not rows or any(row is None for row in rows):
+                self._centroid_failed_at = time.monotonic()
+                logger.warning(f"⚠️ [ROUTER] Seed embeddings unavailable, retrying centroids in {CENTROID_RETRY_SECONDS}s")
+                return None
+
+            centroids, offset = {}, 0
+            for label in labels:
+                count = len(_SEED_QUERIES[label])
+                centroid = self._normalize(np.mean(rows[offset:offset + count], axis=0))
+                offset += count
+                if centroid is None:
+                    self._centroid_failed_at = time.monotonic()
+                    return None
+                centroids[label] = centroid
+            self._centroids = centroids
+            self._centroid_failed_at = None
+            logger.info(f"🧭 [ROUTER] Built routing centroids from {len(texts)} seed queries")
+        return self._centroids
+
+    async def classify_centroid(self, query: str) -> Optional[RouteDecision]:
+        """Decide by nearest centroid when its similarity lead is at least centroid_margin"""
+        centroids = await self._ensure_centroids()
+        if not centroids:
+            return None
+
+        vector = self._normalize(await openai_service.aget_embedding(query))
+        if vector is None:
+            return None
+
+        scores = {label: float(vector @ centroid) for label, centroid in centroids.items()}
+        best, runner_up = sorted(scores, key=scores.get, reverse=True)
+        margin = scores[best] - scores[runner_up]
+        if margin < self.centroid_margin:
+            logger.debug(f"🧭 [ROUTER] Centroid margin {margin:.3f} below {self.centroid_margin}, deferring")
+            return None
+        return RouteDecision(best, "centroid", margin)
+
+    async def route(self, query: str, llm_route: Callable[[], Awaitable[str]]) -> RouteDecision:
+        """
+        Route a query through the keyword, centroid and LLM tiers
+
+        Args:
+            query: Latest user message
+            llm_route: Coroutine factory running the LLM router, returns the destination
+
+        Returns:
+            RouteDecision of the first confident tier
+        """
+        if self.fast_path_enabled:
+            started = time.perf_counter()
+            decision = self.classify_keywords(query)
+            self._record("keyword", started, decision.destination if decision else None)
+            if decision:
+                return decision
+
+            if self.centroid_enabled:
+                started = time.perf_counter()
+                try:
+                    decision = await self.classify_centroid(query)
+                except Exception as e:
+                    logger.warning(f"⚠️ [ROUTER] Centroid classifier failed, falling back to LLM: {e}")
+                    decision = None
+                self._record("centroid", started, decision.destination if decision else None)
+                if decision:
+                    return decision
+
+        started = time.perf_counter()
+        destination = await llm_route()
+        self._record("llm", started, destination)
+        return RouteDecision(destination, "llm", 0.0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get routing decision counts and latency per tier"""
+        with self._lock:
+            routed = sum(sum(counts.values()) for counts in self._decisions.values())
+            tiers = {}
+            for tier in TIERS:
+                attempts = self._attempts[tier]
+                decided = sum(self._decisions[tier].values())
+                tiers[tier] = {
+                    "attempts": attempts,
+                    "decisions": dict(self._decisions[tier]),
+                    "deferred": attempts - decided,
+                    "avg_latency_ms": round(self._latency_ms[tier] / attempts, 2) if attempts else 0.0,
+                    "max_latency_ms": round(self._max_latency_ms[tier], 2),
+                }
+            llm_decided = sum(self._decisions["llm"].values())
+            return {
+                "fast_path_enabled": self.fast_path_enabled,
+                "centroid_enabled": self.centroid_enabled,
+                "centroid_margin": self.centroid_margin,
+                "routed": routed,
+                "llm_rate": round(llm_decided / routed, 4) if routed else 0.0,
+                "tiers": tiers,
+            }
+
+
+# Global query router instance
+query_router = QueryRouter()
@@ -52,6 +52,7 @@ class State(InputState):
     needs_search: bool = field(default=False)
     route_destination: str = field(default="casual")
     language: str = field(default="vi")
+    cache_hit: bool = field(default=False)
     """
     Indicates whether the current step is the last one before the graph raises an error.
 
@@ -76,3 +77,4 @@ class ChatState(InputState):
     confidence: float = field(default=0.0)
     needs_search: bool = field(default=False)
     route_destination: str = field(default="other")
+    cache_hit: bool = field(default=False)
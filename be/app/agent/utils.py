@@ -142,22 +142,23 @@ def calculate_confidence(documents: List[Document]) -> float:
     return max(scores)
 
 
+# Keywords that require RAG
+RAG_KEYWORDS = [
+    'thủ tục', 'hồ sơ', 'giấy tờ', 'đăng ký', 'cấp', 'làm',
+    'xin', 'nộp', 'phí', 'lệ phí', 'thời gian', 'quy trình',
+    'bao lâu', 'ở đâu', 'như thế nào', 'cần gì', 'yêu cầu',
+    'điều kiện', 'địa chỉ', 'cơ quan', 'văn phòng'
+]
+
+# Question indicators
+QUESTION_WORDS = ['?', 'như thế nào', 'ra sao', 'thế nào', 'tại sao', 'vì sao']
+
+
 def should_use_rag(query: str) -> bool:
     """Determine if query requires RAG search."""
     query_lower = query.lower()
     
-    # Keywords that require RAG
-    rag_keywords = [
-        'thủ tục', 'hồ sơ', 'giấy tờ', 'đăng ký', 'cấp', 'làm',
-        'xin', 'nộp', 'phí', 'lệ phí', 'thời gian', 'quy trình',
-        'bao lâu', 'ở đâu', 'như thế nào', 'cần gì', 'yêu cầu',
-        'điều kiện', 'địa chỉ', 'cơ quan', 'văn phòng'
-    ]
-    
-    # Question indicators
-    question_words = ['?', 'như thế nào', 'ra sao', 'thế nào', 'tại sao', 'vì sao']
-    
-    has_rag_keyword = any(keyword in query_lower for keyword in rag_keywords)
-    has_question = any(word in query_lower for word in question_words)
+    has_rag_keyword = any(keyword in query_lower for keyword in RAG_KEYWORDS)
+    has_question = any(word in query_lower for word in QUESTION_WORDS)
     
     return has_rag_keyword or has_question
@@ -59,7 +59,7 @@ async def get_session_info(
     """Get information about a chat session"""
     
     try:
-        session_info = enhanced_virtual_assistant.get_session_info(session_id)
+        session_info = await enhanced_virtual_assistant.aget_session_info(session_id)
         
         return ChatSessionInfo(
             session_id=session_info["session_id"],
@@ -87,7 +87,7 @@ async def get_chat_history(
     
     try:
         # Get conversation history from memory service
-        messages = enhanced_virtual_assistant.memory_service.get_conversation_history(
+        messages = await enhanced_virtual_assistant.memory_service.aget_conversation_history(
             session_id=session_id,
             limit=limit
         )
@@ -13,7 +13,7 @@ from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query
 from ..models.documents import DocumentInfo, FileUploadResponse, BulkUploadResponse, DocumentDeleteResponse
 from ..core.security import verify_token
 from ..core.config import Config
-from ..services.database import get_documents, get_document_by_id, delete_document as delete_document_from_db
+from ..services.database import aget_documents, aget_document_by_id, adelete_document
 from ..services.gcs_service import gcs_service
 from ..services.milvus_service import MilvusService
 from ..workers.tasks import process_file_upload, process_bulk_upload
@@ -30,7 +30,7 @@ milvus_service = MilvusService()
 @router.get("/", response_model=List[DocumentInfo])
 async def get_documents_endpoint(username: str = Depends(verify_token)):
     """Get all documents for the authenticated user"""
-    documents = get_documents()
+    documents = await aget_documents()
     return [
         DocumentInfo(
             id=doc["id"],
@@ -182,7 +182,7 @@ async def bulk_upload_documents(
 @router.delete("/{document_id}", response_model=DocumentDeleteResponse)
 async def delete_document_endpoint(document_id: str, username: str = Depends(verify_token)):
     """Delete a document"""
-    document = get_document_by_id(document_id)
+    document = await aget_document_by_id(document_id)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
@@ -213,7 +213,7 @@ async def delete_document_endpoint(document_id: str, username: str = Depends(ver
                 local_deletion_success = False
     
     # Delete from database
-    database_deletion_success = delete_document_from_db(document_id)
+    database_deletion_success = await adelete_document(document_id)
     
     if database_deletion_success:
         # Create response message based on deletion results
@@ -319,7 +319,7 @@ async def get_chunks_stats(username: str = Depends(verify_token)):
         total_chunks = milvus_service.get_collection_stats()
         
         # Get documents count from database
-        documents = get_documents()
+        documents = await aget_documents()
         total_documents = len(documents)
         
         # Group documents by file type
@@ -367,7 +367,7 @@ async def cleanup_orphaned_chunks(username: str = Depends(verify_token)):
             return {"message": "No chunks to clean up", "deleted": 0, "remaining": 0}
         
         # Get existing documents from database
-        documents = get_documents()
+        documents = await aget_documents()
         existing_files = set([doc["filename"] for doc in documents])
         logger.info(f"📁 [CHUNKS-CLEANUP] Found {len(existing_files)} files in database")
         
@@ -416,19 +416,21 @@ async def cleanup_orphaned_chunks(username: str = Depends(verify_token)):
         deleted_files = []
         failed_files = []
         
-        for filename in orphaned_files:
-            logger.info(f"🗑️ [CHUNKS-CLEANUP] Deleting chunks for: {filename}")
-            try:
-                success = milvus_service.delete_chunks_by_file(filename)
-                if success:
-                    deleted_files.append(filename)
-                    logger.info(f"✅ [CHUNKS-CLEANUP] Successfully deleted chunks for: {filename}")
-                else:
+        # One flush + compaction for all orphaned files
+        with milvus_service.bulk_write():
+            for filename in orphaned_files:
+                logger.info(f"🗑️ [CHUNKS-CLEANUP] Deleting chunks for: {filename}")
+                try:
+                    success = milvus_service.delete_chunks_by_file(filename)
+                    if success:
+                        deleted_files.append(filename)
+                        logger.info(f"✅ [CHUNKS-CLEANUP] Successfully deleted chunks for: {filename}")
+                    else:
+                        failed_files.append(filename)
+                        logger.warning(f"❌ [CHUNKS-CLEANUP] Failed to delete chunks for: {filename}")
+                except Exception as e:
                     failed_files.append(filename)
-                    logger.warning(f"❌ [CHUNKS-CLEANUP] Failed to delete chunks for: {filename}")
-            except Exception as e:
-                failed_files.append(filename)
-                logger.error(f"💥 [CHUNKS-CLEANUP] Error deleting {filename}: {e}")
+                    logger.error(f"💥 [CHUNKS-CLEANUP] Error deleting {filename}: {e}")
         
         # Get final stats
         final_count = milvus_service.get_collection_stats()
@@ -2,11 +2,13 @@
 Enhanced Chatbot API Routes - Using Advanced Agent Architecture
 """
 
+import json
 import uuid
 import logging
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, AsyncIterator
 
 from ..models.chatbot import ChatMessage, ChatResponse, ChatSessionInfo, ChatHistory
 from ..core.security import verify_token
@@ -51,6 +53,70 @@ async def enhanced_chatbot_message(
         )
 
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _stream_enhanced_response(message: str, session_id: str, username: str) -> AsyncIterator[str]:
+    """Translate assistant stream updates into SSE events"""
+    try:
+        async for update in enhanced_virtual_assistant.astream_chat(
+            message=message,
+            session_id=session_id,
+            user_id=username
+        ):
+            kind = update.pop("type")
+            
+            if kind == "token":
+                yield _sse_event("token", {"content": update["content"]})
+            elif kind in ("route", "sources"):
+                yield _sse_event(kind, update)
+            elif kind == "final":
+                response_data = update["data"]
+                metadata = response_data.get("metadata", {})
+                if "error" in metadata:
+                    yield _sse_event("error", {"message": metadata["error"], "session_id": session_id})
+                yield _sse_event("done", ChatResponse(
+                    response=response_data["response"],
+                    timestamp=response_data["timestamp"],
+                    session_id=response_data["session_id"],
+                    metadata=metadata
+                ).model_dump())
+                
+    except Exception as e:
+        logger.error(f"Error streaming enhanced chatbot message: {e}")
+        yield _sse_event("error", {"message": f"Lỗi xử lý tin nhắn: {str(e)}", "session_id": session_id})
+
+
+@router.post("/message/stream")
+async def enhanced_chatbot_message_stream(
+    message: ChatMessage,
+    username: str = Depends(verify_token)
+):
+    """
+    Send message to enhanced virtual assistant and stream the response as Server-Sent Events
+    
+    Events: route, sources, token (one per answer token), done (final ChatResponse), error
+    """
+    
+    # Generate session ID if not provided
+    session_id = message.session_id or str(uuid.uuid4())
+    
+    logger.info(f"Streaming enhanced message for user {username}, session {session_id}")
+    
+    return StreamingResponse(
+        _stream_enhanced_response(message.message, session_id, username),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            # Disable response buffering in nginx-style reverse proxies
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
 @router.get("/session/{session_id}", response_model=ChatSessionInfo)
 async def get_enhanced_session_info(
     session_id: str,
@@ -59,7 +125,7 @@ async def get_enhanced_session_info(
     """Get information about an enhanced chat session"""
     
     try:
-        session_info = enhanced_virtual_assistant.get_session_info(session_id)
+        session_info = await enhanced_virtual_assistant.aget_session_info(session_id)
         
         return ChatSessionInfo(
             session_id=session_info["session_id"],
@@ -87,7 +153,7 @@ async def get_enhanced_chat_history(
     
     try:
         # Get conversation history from memory service
-        messages = enhanced_virtual_assistant.memory_service.get_conversation_history(
+        messages = await enhanced_virtual_assistant.memory_service.aget_conversation_history(
             session_id=session_id,
             limit=limit
         )
@@ -32,7 +32,7 @@ async def rag_query(
                 )
         
         # Process the query
-        result = rag_service.query(
+        result = await rag_service.aquery(
             question=query.question,
             include_sources=query.include_sources
         )
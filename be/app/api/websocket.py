@@ -18,7 +18,7 @@ logger = logging.getLogger(__name__)
 @router.get("/status")
 async def websocket_status(username: str = Depends(verify_token)):
     """Get WebSocket connection status for the current user"""
-    user_sessions = websocket_manager.user_sessions.get(username, set())
+    user_sessions = await websocket_manager.get_user_sessions(username)
     return {
         "connected": len(user_sessions) > 0,
         "session_count": len(user_sessions),
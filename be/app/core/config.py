@@ -36,21 +36,62 @@ class Config:
     # Database Configuration
     MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", "dvc_ai_db")
+    # Async (Motor) connection pool used by API handlers, per API process
+    MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    # Conversation expiry: a session and all its messages expire this long after
+    # its last message (MongoDB TTL indexes on expires_at / Redis key TTL)
+    MEMORY_SESSION_TTL_HOURS = float(os.getenv("MEMORY_SESSION_TTL_HOURS", "24"))
+    # Chat messages are queued and written in batches off the request path
+    MEMORY_WRITE_BEHIND_ENABLED = os.getenv("MEMORY_WRITE_BEHIND_ENABLED", "true").lower() == "true"
+    MEMORY_FLUSH_INTERVAL = float(os.getenv("MEMORY_FLUSH_INTERVAL", "0.2"))
+    MEMORY_FLUSH_BATCH_SIZE = int(os.getenv("MEMORY_FLUSH_BATCH_SIZE", "200"))
+    # Queued messages before saves are written synchronously instead (bounds memory in an outage)
+    MEMORY_MAX_PENDING = int(os.getenv("MEMORY_MAX_PENDING", "10000"))
+    # Longest wait between retries of a failed batch (doubles from MEMORY_FLUSH_INTERVAL)
+    MEMORY_FLUSH_MAX_BACKOFF = float(os.getenv("MEMORY_FLUSH_MAX_BACKOFF", "30"))
     
     # Redis Configuration
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    # Conversation store used when MongoDB is unreachable (in-process if Redis is unreachable too)
+    MEMORY_REDIS_URL = os.getenv("MEMORY_REDIS_URL", REDIS_URL)
     CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
     CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+    # Celery worker profile
+    # dev: a single thread-pool worker runs every task (also works on Windows)
+    # production: CPU-bound extraction/chunking is routed to CELERY_EXTRACTION_QUEUE, served by a
+    #             prefork worker sized to the core count; I/O-bound tasks stay on a threads worker
+    CELERY_WORKER_PROFILE = os.getenv("CELERY_WORKER_PROFILE", "dev").lower()
+    CELERY_EXTRACTION_QUEUE = os.getenv("CELERY_EXTRACTION_QUEUE", "extraction")
+    CELERY_EXTRACTION_CONCURRENCY = int(os.getenv("CELERY_EXTRACTION_CONCURRENCY", str(os.cpu_count() or 1)))
+    # Parallel GCS uploads per upload batch
+    GCS_UPLOAD_WORKERS = int(os.getenv("GCS_UPLOAD_WORKERS", "8"))
     
     # CORS Configuration (dùng chung cho FastAPI và WebSocket)
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
     
     # WebSocket Configuration (sử dụng chung CORS_ORIGINS)
     WEBSOCKET_CORS_ORIGINS = CORS_ORIGINS
+    # Socket.IO message queue: Celery workers publish events here and the API delivers them
+    # (set SOCKETIO_REDIS_URL to an empty string to keep events in-process)
+    SOCKETIO_REDIS_URL = os.getenv("SOCKETIO_REDIS_URL", REDIS_URL)
+    SOCKETIO_CHANNEL = os.getenv("SOCKETIO_CHANNEL", "dvc_socketio")
+    # Seconds before sessions of an API process that stopped heartbeating are considered gone
+    WEBSOCKET_PRESENCE_TTL = int(os.getenv("WEBSOCKET_PRESENCE_TTL", "30"))
+    # Minimum seconds between coalesced progress updates per task
+    PROGRESS_THROTTLE_SECONDS = float(os.getenv("PROGRESS_THROTTLE_SECONDS", "0.5"))
     
     # Milvus Configuration
     MILVUS_HOST = os.getenv("MILVUS_HOST", "localhost")
     MILVUS_PORT = os.getenv("MILVUS_PORT", "19530")
+    MILVUS_HEALTH_CHECK_INTERVAL = int(os.getenv("MILVUS_HEALTH_CHECK_INTERVAL", "30"))
+    # Vector index: FLAT | IVF_FLAT | IVF_SQ8 | HNSW | DISKANN, params as JSON objects
+    MILVUS_INDEX_TYPE = os.getenv("MILVUS_INDEX_TYPE", "IVF_FLAT")
+    MILVUS_INDEX_PARAMS = os.getenv("MILVUS_INDEX_PARAMS", "")
+    MILVUS_SEARCH_PARAMS = os.getenv("MILVUS_SEARCH_PARAMS", "")
+    # Per-collection overrides: {"<collection>": {"index_type": ..., "build_params": {...}, "search_params": {...}}}
+    MILVUS_COLLECTION_INDEXES = os.getenv("MILVUS_COLLECTION_INDEXES", "")
     
     # OpenAI Configuration (Direct API)
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
@@ -59,10 +100,60 @@ class Config:
     OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.3"))
     OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "1000"))
     OPENAI_TIMEOUT = int(os.getenv("OPENAI_TIMEOUT", "30"))
-    
+
+    # Embedding Batching Configuration
+    # Token budget per embeddings request (provider limit is 300k tokens / 2048 inputs)
+    OPENAI_EMBEDDING_BATCH_TOKENS = int(os.getenv("OPENAI_EMBEDDING_BATCH_TOKENS", "100000"))
+    OPENAI_EMBEDDING_BATCH_SIZE = int(os.getenv("OPENAI_EMBEDDING_BATCH_SIZE", "512"))
+    OPENAI_EMBEDDING_MAX_INPUT_TOKENS = int(os.getenv("OPENAI_EMBEDDING_MAX_INPUT_TOKENS", "8191"))
+    OPENAI_EMBEDDING_WORKERS = int(os.getenv("OPENAI_EMBEDDING_WORKERS", "4"))
+    OPENAI_EMBEDDING_MAX_RETRIES = int(os.getenv("OPENAI_EMBEDDING_MAX_RETRIES", "3"))
+    OPENAI_EMBEDDING_RETRY_BACKOFF = float(os.getenv("OPENAI_EMBEDDING_RETRY_BACKOFF", "1.0"))
+
+    # Embedding Cache Configuration
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    # Persistent tier: redis | disk | memory (in-process LRU only)
+    EMBEDDING_CACHE_BACKEND = os.getenv("EMBEDDING_CACHE_BACKEND", "redis")
+    EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "10000"))
+    EMBEDDING_CACHE_TTL_DAYS = int(os.getenv("EMBEDDING_CACHE_TTL_DAYS", "30"))
+    EMBEDDING_CACHE_REDIS_URL = os.getenv("EMBEDDING_CACHE_REDIS_URL", REDIS_URL)
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join("cache", "embeddings"))
+
+    # Semantic Answer Cache Configuration
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    # Minimum cosine similarity between question embeddings for a cache hit
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+    SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))
+
+    # Retrieval Configuration
+    # dense: vector search only | hybrid: vector + BM25 fused with reciprocal rank fusion
+    RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense")
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+    RRF_K = int(os.getenv("RRF_K", "60"))
+    LEXICAL_INDEX_REFRESH_INTERVAL = int(os.getenv("LEXICAL_INDEX_REFRESH_INTERVAL", "10"))
+    LEXICAL_INDEX_REBUILD_INTERVAL = int(os.getenv("LEXICAL_INDEX_REBUILD_INTERVAL", "300"))
+    # Start retrieval concurrently with query routing (discarded if the query is not routed to RAG)
+    SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() == "true"
+    # Prompt context budget in chat-model tokens (used when CHUNK_LENGTH_UNIT=tokens)
+    RAG_CONTEXT_MAX_TOKENS = int(os.getenv("RAG_CONTEXT_MAX_TOKENS", "4500"))
+
+    # Query Router Configuration
+    # Keyword rules and an embedding nearest-centroid classifier decide obvious
+    # queries locally; the LLM router only runs when both are unsure
+    ROUTER_FAST_PATH_ENABLED = os.getenv("ROUTER_FAST_PATH_ENABLED", "true").lower() == "true"
+    ROUTER_CENTROID_ENABLED = os.getenv("ROUTER_CENTROID_ENABLED", "true").lower() == "true"
+    # Minimum cosine-similarity lead of the nearest centroid over the other one
+    ROUTER_CENTROID_MARGIN = float(os.getenv("ROUTER_CENTROID_MARGIN", "0.08"))
+
     # Document Chunking Configuration (LangChain)
+    # chars: CHUNK_SIZE/CHUNK_OVERLAP in characters
+    # tokens: CHUNK_SIZE_TOKENS/CHUNK_OVERLAP_TOKENS in embedding-model tokens
+    CHUNK_LENGTH_UNIT = os.getenv("CHUNK_LENGTH_UNIT", "chars").lower()
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "3000"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+    CHUNK_SIZE_TOKENS = int(os.getenv("CHUNK_SIZE_TOKENS", "800"))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "80"))
     # LangChain separators in order of preference (most semantic to least)
     separators_raw = os.getenv("CHUNK_SEPARATORS", "\n\n|\n|. |? |! |; |: |\t| ")
     CHUNK_SEPARATORS = []
@@ -79,6 +170,13 @@ class Config:
         CHUNK_SEPARATORS = ["\n\n", "\n", ". ", "? ", "! ", "; ", ": ", "\t", " "]
     # Header preservation setting
     PRESERVE_HEADERS = os.getenv("PRESERVE_HEADERS", "true").lower() == "true"
+
+    # PDF Extraction Configuration
+    # PDFs with at least PDF_PARALLEL_MIN_PAGES pages are extracted in a process pool,
+    # PDF_PAGES_PER_TASK pages per worker task
+    PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "50"))
+    PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "25"))
     
     # API Configuration
     API_V1_PREFIX = "/api"
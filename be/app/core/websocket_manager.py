@@ -1,30 +1,170 @@
+import os
+import uuid
+import socket
 import asyncio
-from typing import Dict, Set
+from typing import Dict, Set, Optional
 import socketio
 from .config import Config
 import jwt
 from datetime import datetime, timedelta
 import logging
 
+# Redis presence (optional, falls back to in-process session tracking)
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
 logger = logging.getLogger(__name__)
 
 
+class SessionPresence:
+    """
+    Cluster-wide user -> Socket.IO session registry in Redis
+
+    Each user has a hash {sid: node_id}. Every API process (node) refreshes a
+    heartbeat key with a TTL; sessions owned by a node whose heartbeat expired
+    (crashed or killed process) are ignored and pruned on read.
+    """
+
+    def __init__(self, redis_url: str, prefix: str = "dvc:ws", ttl: int = None):
+        self.prefix = prefix
+        self.ttl = ttl or Config.WEBSOCKET_PRESENCE_TTL
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.client = aioredis.Redis.from_url(redis_url, decode_responses=True)
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def _user_key(self, user_id: str) -> str:
+        return f"{self.prefix}:user:{user_id}"
+
+    def _node_key(self, node_id: str) -> str:
+        return f"{self.prefix}:node:{node_id}"
+
+    async def _heartbeat(self):
+        while True:
+            try:
+                await self.client.set(self._node_key(self.node_id), 1, ex=self.ttl)
+            except Exception as e:
+                logger.warning(f"⚠️ [WEBSOCKET] Presence heartbeat failed: {e}")
+            await asyncio.sleep(self.ttl / 3)
+
+    async def _ensure_heartbeat(self):
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            await self.client.set(self._node_key(self.node_id), 1, ex=self.ttl)
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    async def add(self, user_id: str, sid: str):
+        await self._ensure_heartbeat()
+        await self.client.hset(self._user_key(user_id), sid, self.node_id)
+
+    async def remove(self, user_id: str, sid: str):
+        await self.client.hdel(self._user_key(user_id), sid)
+
+    async def get_sessions(self, user_id: str) -> Set[str]:
+        """Live sessions of a user across every node"""
+        sessions = await self.client.hgetall(self._user_key(user_id))
+        if not sessions:
+            return set()
+
+        nodes = sorted(set(sessions.values()))
+        alive = await self.client.mget([self._node_key(node) for node in nodes])
+        live_nodes = {node for node, flag in zip(nodes, alive) if flag}
+
+        stale = [sid for sid, node in sessions.items() if node not in live_nodes]
+        if stale:
+            await self.client.hdel(self._user_key(user_id), *stale)
+        return {sid for sid, node in sessions.items() if node in live_nodes}
+
+
 class WebSocketManager:
     def __init__(self):
         self.sio = socketio.AsyncServer(
             cors_allowed_origins="*",  # Allow all origins for development/flexibility
             async_mode="asgi",
+            client_manager=self._create_client_manager(),
             logger=True,
             engineio_logger=True,
         )
 
-        # Store user sessions: {user_id: {session_id1, session_id2, ...}}
+        # Sessions connected to this process: {user_id: {session_id1, session_id2, ...}}
         self.user_sessions: Dict[str, Set[str]] = {}
         # Store session to user mapping: {session_id: user_id}
         self.session_users: Dict[str, str] = {}
+        # Sessions of every API process (None: single process, use user_sessions)
+        self.presence = self._create_presence()
 
         self.setup_event_handlers()
 
+    @staticmethod
+    def _create_presence() -> Optional[SessionPresence]:
+        """Redis presence registry shared by every API process"""
+        if not Config.SOCKETIO_REDIS_URL or aioredis is None:
+            return None
+        try:
+            return SessionPresence(Config.SOCKETIO_REDIS_URL)
+        except Exception as e:
+            logger.warning(f"⚠️ [WEBSOCKET] Redis presence unavailable ({e}), tracking sessions in-process")
+            return None
+
+    async def _register_session(self, user_id: str, sid: str):
+        """Track a session locally and in the shared presence registry"""
+        self.user_sessions.setdefault(user_id, set()).add(sid)
+        self.session_users[sid] = user_id
+        if self.presence:
+            try:
+                await self.presence.add(user_id, sid)
+            except Exception as e:
+                logger.warning(f"⚠️ [WEBSOCKET] Failed to record presence for {user_id}: {e}")
+
+    async def _unregister_session(self, sid: str):
+        """Forget a session locally and in the shared presence registry"""
+        user_id = self.session_users.pop(sid, None)
+        if user_id is None:
+            return
+        self.user_sessions.get(user_id, set()).discard(sid)
+
+        # Remove user mapping if no sessions left
+        if not self.user_sessions.get(user_id):
+            self.user_sessions.pop(user_id, None)
+
+        if self.presence:
+            try:
+                await self.presence.remove(user_id, sid)
+            except Exception as e:
+                logger.warning(f"⚠️ [WEBSOCKET] Failed to clear presence for {user_id}: {e}")
+        logger.info(f"User {user_id} disconnected session {sid}")
+
+    async def get_user_sessions(self, user_id: str) -> Set[str]:
+        """Sessions of a user on every API process"""
+        if self.presence:
+            try:
+                return await self.presence.get_sessions(user_id)
+            except Exception as e:
+                logger.warning(f"⚠️ [WEBSOCKET] Failed to read presence for {user_id}: {e}")
+        return set(self.user_sessions.get(user_id, set()))
+
+    @staticmethod
+    def _create_client_manager():
+        """
+        Redis-backed client manager, so events published by Celery workers
+        (app.workers.notifications) reach clients connected to this process
+        """
+        if not Config.SOCKETIO_REDIS_URL:
+            return None
+        try:
+            manager = socketio.AsyncRedisManager(
+                Config.SOCKETIO_REDIS_URL, channel=Config.SOCKETIO_CHANNEL
+            )
+            logger.info(
+                f"📡 [WEBSOCKET] Using Redis message queue on channel '{Config.SOCKETIO_CHANNEL}'"
+            )
+            return manager
+        except Exception as e:
+            logger.warning(
+                f"⚠️ [WEBSOCKET] Redis message queue unavailable ({e}), worker events will not be delivered"
+            )
+            return None
+
     def setup_event_handlers(self):
         @self.sio.event
         async def connect(sid, environ, auth):
@@ -65,10 +205,7 @@ class WebSocketManager:
                             logger.warning(f"Token validation error: {token_error}")
 
                 # Add session to user mapping
-                if user_id not in self.user_sessions:
-                    self.user_sessions[user_id] = set()
-                self.user_sessions[user_id].add(sid)
-                self.session_users[sid] = user_id
+                await self._register_session(user_id, sid)
 
                 # Automatically join user room
                 await self.sio.enter_room(sid, f"user_{user_id}")
@@ -93,10 +230,7 @@ class WebSocketManager:
                 logger.error(f"Error during connection setup: {e}", exc_info=True)
                 # Still allow connection with anonymous user even on error
                 try:
-                    if user_id not in self.user_sessions:
-                        self.user_sessions[user_id] = set()
-                    self.user_sessions[user_id].add(sid)
-                    self.session_users[sid] = user_id
+                    await self._register_session(user_id, sid)
 
                     await self.sio.enter_room(sid, f"user_{user_id}")
                     await self.sio.emit(
@@ -123,16 +257,7 @@ class WebSocketManager:
             logger.info(f"Client disconnected: {sid}")
 
             # Remove session from mappings
-            if sid in self.session_users:
-                user_id = self.session_users[sid]
-                self.user_sessions[user_id].discard(sid)
-
-                # Remove user mapping if no sessions left
-                if not self.user_sessions[user_id]:
-                    del self.user_sessions[user_id]
-
-                del self.session_users[sid]
-                logger.info(f"User {user_id} disconnected session {sid}")
+            await self._unregister_session(sid)
 
         @self.sio.event
         async def join_room(sid, data):
@@ -177,16 +302,20 @@ class WebSocketManager:
 
                 logger.info(f"Processing real-time chat message from {user_id}")
 
-                # Import here to avoid circular imports
-                from ..services.virtual_assistant import virtual_assistant
-
                 # Send typing indicator
                 await self.sio.emit(
                     "typing", {"session_id": session_id, "typing": True}, room=sid
                 )
 
-                # Process message through virtual assistant
-                response_data = await virtual_assistant.chat(
+                if data.get("stream"):
+                    await self._stream_chat_response(sid, message, session_id, user_id)
+                    return
+
+                # Import here to avoid circular imports
+                from ..services.enhanced_virtual_assistant import enhanced_virtual_assistant
+
+                # Same agent workflow as the streaming path and the HTTP chatbot API
+                response_data = await enhanced_virtual_assistant.chat(
                     message=message, session_id=session_id, user_id=user_id
                 )
 
@@ -271,10 +400,10 @@ class WebSocketManager:
                     return
 
                 # Import here to avoid circular imports
-                from ..services.virtual_assistant import virtual_assistant
+                from ..services.enhanced_virtual_assistant import enhanced_virtual_assistant
 
                 # Get conversation history
-                messages = virtual_assistant.memory_service.get_conversation_history(
+                messages = await enhanced_virtual_assistant.memory_service.aget_conversation_history(
                     session_id=session_id, limit=limit
                 )
 
@@ -312,14 +441,66 @@ class WebSocketManager:
                     room=sid,
                 )
 
+    async def _stream_chat_response(
+        self, sid: str, message: str, session_id: str, user_id: str
+    ):
+        """Emit answer tokens as chat_chunk events, then the final chat_response"""
+        # Import here to avoid circular imports
+        from ..services.enhanced_virtual_assistant import enhanced_virtual_assistant
+
+        index = 0
+        async for event in enhanced_virtual_assistant.astream_chat(
+            message=message, session_id=session_id, user_id=user_id
+        ):
+            if event["type"] == "token":
+                if index == 0:
+                    # First token replaces the typing indicator
+                    await self.sio.emit(
+                        "typing", {"session_id": session_id, "typing": False}, room=sid
+                    )
+                # The client is connected to this process: skip the Redis round trip per token
+                await self.sio.emit(
+                    "chat_chunk",
+                    {"session_id": session_id, "content": event["content"], "index": index},
+                    room=sid,
+                    ignore_queue=True,
+                )
+                index += 1
+                continue
+
+            if event["type"] != "final":
+                continue
+
+            response_data = event["data"]
+            if index == 0:
+                await self.sio.emit(
+                    "typing", {"session_id": session_id, "typing": False}, room=sid
+                )
+
+            # Final response carries the full text (with citations) and metadata
+            await self.sio.emit(
+                "chat_response",
+                {
+                    "session_id": session_id,
+                    "response": response_data["response"],
+                    "timestamp": response_data["timestamp"],
+                    "metadata": response_data.get("metadata", {}),
+                    "streamed": True,
+                    "chunk_count": index,
+                },
+                room=sid,
+            )
+
+        logger.debug(f"Streamed chat response sent to {user_id} ({index} chunks)")
+
     async def send_to_user(self, user_id: str, data: dict):
-        """Send message to all sessions of a specific user"""
-        if user_id in self.user_sessions:
-            for session_id in self.user_sessions[user_id]:
-                try:
-                    await self.sio.emit("message", data, room=session_id)
-                except Exception as e:
-                    logger.error(f"Error sending message to session {session_id}: {e}")
+        """Send message to all sessions of a specific user (on every API process)"""
+        try:
+            # Every session joins user_{user_id} on connect; the client manager
+            # fans the emit out to the processes holding those sessions
+            await self.sio.emit("message", data, room=f"user_{user_id}")
+        except Exception as e:
+            logger.error(f"Error sending message to user {user_id}: {e}")
 
     async def send_to_room(self, room: str, data: dict):
         """Send message to a specific room"""
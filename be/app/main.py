@@ -10,6 +10,9 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from .core.config import Config
 from .core.websocket_manager import websocket_manager
+from .services.milvus_manager import milvus_manager
+from .services.conversation_memory import conversation_memory
+from .services.database import async_db_manager
 from .api import auth, documents, chatbot, rag, websocket, enhanced_chatbot
 
 # Create FastAPI application
@@ -58,6 +61,21 @@ async def health_check():
     }
 
 
+@app.on_event("startup")
+async def startup_event():
+    """Open the async MongoDB connection pool and create conversation indexes"""
+    await async_db_manager.connect()
+    await conversation_memory.aensure_indexes()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled Milvus connections and write queued chat messages"""
+    milvus_manager.close_all()
+    conversation_memory.close()
+    async_db_manager.close()
+
+
 # Create combined ASGI app with WebSocket support
 import socketio
 combined_asgi_app = socketio.ASGIApp(websocket_manager.sio, app)
@@ -4,36 +4,170 @@ Manages conversation history and context using MongoDB
 """
 
 import json
+import time
+import atexit
+import asyncio
 import logging
+import threading
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+from typing import List, Dict, Any, Optional, Set, Tuple
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne, UpdateMany
+from pymongo.errors import ConnectionFailure, BulkWriteError, OperationFailure
 from langchain.schema import BaseMessage, HumanMessage, AIMessage
 from ..core.config import Config
+from .database import async_db_manager
+
+# Redis fallback store (optional, used when MongoDB is unreachable)
+try:
+    import redis
+except ImportError:
+    redis = None
 
 logger = logging.getLogger(__name__)
 
+# MongoDB duplicate key error (message already written by an earlier partial insert)
+_DUPLICATE_KEY = 11000
+# Attempts before a message rejected by MongoDB is logged for recovery and dropped
+_MAX_WRITE_ATTEMPTS = 5
+
+
+class _RedisSessionStore:
+    """Fallback store: one Redis list per session, expired by a rolling key TTL"""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl_seconds: int, max_messages: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self.client.ping()
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"dvc:chat:{session_id}"
+
+    def append(self, session_id: str, message_data: Dict[str, Any]):
+        data = {**message_data, "timestamp": message_data["timestamp"].isoformat()}
+        key = self._key(session_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.rpush(key, json.dumps(data, ensure_ascii=False, default=str))
+        pipe.ltrim(key, -self.max_messages, -1)
+        pipe.expire(key, self.ttl_seconds)
+        pipe.execute()
+
+    def get(self, session_id: str) -> List[Dict[str, Any]]:
+        messages = []
+        for raw in self.client.lrange(self._key(session_id), 0, -1):
+            data = json.loads(raw)
+            data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+            messages.append(data)
+        return messages
+
+    def session_ids(self) -> List[str]:
+        prefix = len(self._key(""))
+        return [key.decode()[prefix:] for key in self.client.scan_iter(match=self._key("*"), count=500)]
+
+    def purge_expired(self) -> int:
+        # Keys expire on their own
+        return 0
+
+
+class _MemorySessionStore:
+    """Fallback store: per-process dict with a rolling per-session expiry"""
+
+    name = "memory"
+
+    def __init__(self, ttl_seconds: int, max_messages: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        # session_id -> (expires_at, messages)
+        self._sessions: Dict[str, tuple] = {}
+
+    def append(self, session_id: str, message_data: Dict[str, Any]):
+        expires_at = datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+        with self._lock:
+            _, messages = self._sessions.get(session_id, (None, []))
+            messages = (messages + [message_data])[-self.max_messages:]
+            self._sessions[session_id] = (expires_at, messages)
+
+    def get(self, session_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            if entry[0] <= datetime.utcnow():
+                del self._sessions[session_id]
+                return []
+            return list(entry[1])
+
+    def session_ids(self) -> List[str]:
+        self.purge_expired()
+        with self._lock:
+            return list(self._sessions)
+
+    def purge_expired(self) -> int:
+        """Drop expired sessions (one timestamp comparison per session)"""
+        now = datetime.utcnow()
+        with self._lock:
+            expired = [sid for sid, (expires_at, _) in self._sessions.items() if expires_at <= now]
+            for sid in expired:
+                del self._sessions[sid]
+        return len(expired)
+
 class ConversationMemoryService:
-    def __init__(self, mongodb_url: str = None, db_name: str = None):
+    def __init__(self, mongodb_url: str = None, db_name: str = None, write_behind: bool = None):
         """
         Initialize conversation memory service
         
         Args:
             mongodb_url: MongoDB connection URL (defaults to Config.MONGODB_URL)
             db_name: Database name (defaults to Config.MONGODB_DATABASE)
+            write_behind: Queue messages and insert them in batches from a background
+                thread (defaults to Config.MEMORY_WRITE_BEHIND_ENABLED)
         """
         self.mongodb_url = mongodb_url or Config.MONGODB_URL
         self.db_name = db_name or Config.MONGODB_DATABASE
         self.collection_name = "conversations"
+        # One document per session: {_id: session_id, user_id, message_count, last_activity,
+        # expires_at, memories}; message_count counts messages saved while the session lived
+        self.sessions_collection_name = "conversation_sessions"
         self.client = None
         self.db = None
         self.collection = None
+        self.sessions = None
+        # Motor counterparts used by the async (event loop) API; None without motor
+        self.adb = None
+        self.acollection = None
+        self.asessions = None
         self.connected = False
         
         # Memory configuration
-        self.max_messages_per_session = 50  # Limit messages per session
-        self.session_timeout_hours = 24     # Sessions expire after 24h
+        self.max_messages_per_session = 50  # Limit messages per session (fallback store)
+        # A session and all of its messages expire this long after its last
+        # message (rolling expires_at on both, removed by TTL indexes)
+        self.session_timeout_hours = Config.MEMORY_SESSION_TTL_HOURS
+        self.session_ttl_seconds = int(self.session_timeout_hours * 3600)
+        self._fallback = None
+        
+        # Write-behind queue: messages in save order, flushed by one thread so
+        # per-session order is kept
+        self.write_behind = write_behind if write_behind is not None else Config.MEMORY_WRITE_BEHIND_ENABLED
+        self.flush_interval = Config.MEMORY_FLUSH_INTERVAL
+        self.flush_batch_size = Config.MEMORY_FLUSH_BATCH_SIZE
+        self.max_pending = Config.MEMORY_MAX_PENDING
+        self.max_backoff = Config.MEMORY_FLUSH_MAX_BACKOFF
+        self._pending: List[Dict[str, Any]] = []
+        # Sessions of the batch flush() is writing (no longer in _pending)
+        self._in_flight: Set[str] = set()
+        # Failed writes back off before the next attempt: {_id: attempts} per rejected message
+        self._retry_delay = 0.0
+        self._retry_at = 0.0
+        self._write_attempts: Dict[Any, int] = {}
+        self._pending_cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
         
         self._connect()
     
@@ -45,20 +179,114 @@ class ConversationMemoryService:
             self.client.admin.command('ping')
             self.db = self.client[self.db_name]
             self.collection = self.db[self.collection_name]
+            self.sessions = self.db[self.sessions_collection_name]
             self.connected = True
             
-            # Create indexes for performance
-            self.collection.create_index("session_id")
-            self.collection.create_index("user_id")
-            self.collection.create_index("timestamp")
+            # Share the API's Motor pool (closed by async_db_manager at shutdown); a
+            # custom URL keeps the async methods on the sync client in a thread
+            aclient = async_db_manager.get_client() if self.mongodb_url == Config.MONGODB_URL else None
+            if aclient is not None:
+                self.adb = aclient[self.db_name]
+                self.acollection = self.adb[self.collection_name]
+                self.asessions = self.adb[self.sessions_collection_name]
             
+            # Indexes are created once at API startup (aensure_indexes)
             logger.info("Connected to MongoDB for conversation memory")
             
         except ConnectionFailure as e:
-            logger.warning(f"Failed to connect to MongoDB: {e}. Using in-memory storage.")
             self.connected = False
-            # Fallback to in-memory storage
-            self._memory_store = {}
+            self._fallback = self._create_fallback_store()
+            logger.warning(f"Failed to connect to MongoDB: {e}. Using {self._fallback.name} storage.")
+    
+    def _create_fallback_store(self):
+        """Redis-backed store when reachable, otherwise an in-process one"""
+        if redis is not None and Config.MEMORY_REDIS_URL:
+            try:
+                return _RedisSessionStore(Config.MEMORY_REDIS_URL, self.session_ttl_seconds, self.max_messages_per_session)
+            except Exception as e:
+                logger.warning(f"Redis unavailable for conversation memory ({e})")
+        return _MemorySessionStore(self.session_ttl_seconds, self.max_messages_per_session)
+    
+    def _legacy_expiry_backfill(self) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Filter and pipeline update giving messages saved before expires_at one"""
+        return (
+            {"expires_at": {"$exists": False}},
+            [{"$set": {"expires_at": {"$add": ["$timestamp", self.session_ttl_seconds * 1000]}}}]
+        )
+    
+    def ensure_indexes(self):
+        """
+        Create the indexes conversation queries rely on (idempotent)
+        
+        (session_id, timestamp) serves history tail reads, latest-message lookups
+        and per-session counts; it also covers queries on session_id alone.
+        Expiry is left to TTL indexes on expires_at: each turn moves the
+        session's expiry and its messages' together, so a session never loses
+        older messages while it is still alive.
+        """
+        if not self.connected:
+            return
+        self.collection.create_index(
+            [("session_id", ASCENDING), ("timestamp", DESCENDING)],
+            name="session_id_timestamp"
+        )
+        self.collection.create_index("user_id")
+        # Per-message expiry (timestamp + TTL) is replaced by the session's expiry
+        if self.collection.index_information().get("timestamp_1", {}).get("expireAfterSeconds") is not None:
+            self.collection.drop_index("timestamp_1")
+        self.collection.update_many(*self._legacy_expiry_backfill())
+        for collection in (self.collection, self.sessions):
+            self._ensure_ttl_index(collection, "expires_at")
+    
+    async def aensure_indexes(self):
+        """ensure_indexes through the shared Motor client, run once at API startup"""
+        if not self.connected:
+            return
+        try:
+            if self.acollection is None:
+                await asyncio.to_thread(self.ensure_indexes)
+                return
+            
+            await self.acollection.create_index(
+                [("session_id", ASCENDING), ("timestamp", DESCENDING)],
+                name="session_id_timestamp"
+            )
+            await self.acollection.create_index("user_id")
+            indexes = await self.acollection.index_information()
+            if indexes.get("timestamp_1", {}).get("expireAfterSeconds") is not None:
+                await self.acollection.drop_index("timestamp_1")
+            result = await self.acollection.update_many(*self._legacy_expiry_backfill())
+            if result.modified_count:
+                logger.info(f"Set expires_at on {result.modified_count} messages saved before session expiry")
+            for collection in (self.acollection, self.asessions):
+                await self._aensure_ttl_index(collection, "expires_at")
+        except Exception as e:
+            logger.error(f"Failed to create conversation indexes: {e}")
+    
+    def _ensure_ttl_index(self, collection, field: str):
+        """Create a TTL index expiring documents at field, converting a plain index in place"""
+        name = f"{field}_1"
+        existing = collection.index_information().get(name)
+        if existing and existing.get("expireAfterSeconds") != 0:
+            try:
+                self.db.command("collMod", collection.name, index={"name": name, "expireAfterSeconds": 0})
+                return
+            except OperationFailure:
+                # Servers that cannot convert a plain index: rebuild it
+                collection.drop_index(name)
+        collection.create_index(field, expireAfterSeconds=0)
+    
+    async def _aensure_ttl_index(self, collection, field: str):
+        """Async variant of _ensure_ttl_index"""
+        name = f"{field}_1"
+        existing = (await collection.index_information()).get(name)
+        if existing and existing.get("expireAfterSeconds") != 0:
+            try:
+                await self.adb.command("collMod", collection.name, index={"name": name, "expireAfterSeconds": 0})
+                return
+            except OperationFailure:
+                await collection.drop_index(name)
+        await collection.create_index(field, expireAfterSeconds=0)
     
     def save_message(self, session_id: str, user_id: str, message: BaseMessage, metadata: Optional[Dict] = None):
         """
@@ -71,64 +299,429 @@ class ConversationMemoryService:
             metadata: Additional metadata
         """
         try:
-            message_data = {
-                "session_id": session_id,
-                "user_id": user_id,
-                "message_type": message.__class__.__name__,
-                "content": message.content,
-                "timestamp": datetime.utcnow(),
-                "metadata": metadata or {}
-            }
+            message_data = self._message_document(session_id, user_id, message, metadata)
             
-            if self.connected:
-                # Save to MongoDB
+            if self.connected and self.write_behind and not self._closed and self._enqueue(message_data):
+                # Queued for the next batched insert
+                pass
+            elif self.connected:
+                # Save to MongoDB (write-behind off, or its queue is full)
                 self.collection.insert_one(message_data)
+                self._touch_session(session_id, user_id, message_data["timestamp"])
             else:
-                # Save to in-memory store
-                if session_id not in self._memory_store:
-                    self._memory_store[session_id] = []
-                self._memory_store[session_id].append(message_data)
-                
-                # Limit memory usage
-                if len(self._memory_store[session_id]) > self.max_messages_per_session:
-                    self._memory_store[session_id] = self._memory_store[session_id][-self.max_messages_per_session:]
+                # Save to the fallback store (rolling session TTL)
+                self._fallback.append(session_id, message_data)
+            
+            logger.debug(f"Saved message for session {session_id}")
+            
+        except Exception as e:
+            logger.error(f"Failed to save message: {e}")
+    
+    async def asave_message(self, session_id: str, user_id: str, message: BaseMessage, metadata: Optional[Dict] = None):
+        """Async variant of save_message"""
+        if not self.connected or self.acollection is None:
+            # Fallback store saves do not touch MongoDB
+            self.save_message(session_id, user_id, message, metadata)
+            return
+        
+        try:
+            message_data = self._message_document(session_id, user_id, message, metadata)
+            if self.write_behind and not self._closed and self._enqueue(message_data):
+                return
             
+            # Write-behind off, or its queue is full
+            await self.acollection.insert_one(message_data)
+            await self.asessions.update_one(
+                {"_id": session_id},
+                self._session_update(user_id, message_data["timestamp"]),
+                upsert=True
+            )
+            await self.acollection.update_many(*self._message_expiry_update(session_id, message_data["timestamp"]))
             logger.debug(f"Saved message for session {session_id}")
             
         except Exception as e:
             logger.error(f"Failed to save message: {e}")
     
-    def get_conversation_history(self, session_id: str, limit: int = 20) -> List[BaseMessage]:
+    def _message_document(self, session_id: str, user_id: str, message: BaseMessage, metadata: Optional[Dict]) -> Dict[str, Any]:
+        timestamp = datetime.utcnow()
+        return {
+            "session_id": session_id,
+            "user_id": user_id,
+            "message_type": message.__class__.__name__,
+            "content": message.content,
+            "timestamp": timestamp,
+            # The session's expiry after this message (extended on every turn)
+            "expires_at": timestamp + timedelta(seconds=self.session_ttl_seconds),
+            "metadata": metadata or {}
+        }
+    
+    def _enqueue(self, message_data: Dict[str, Any]) -> bool:
+        """Add a message to the write-behind queue; False when the queue is full"""
+        with self._pending_cond:
+            if len(self._pending) >= self.max_pending:
+                logger.warning(f"Write-behind queue full ({self.max_pending}), saving synchronously")
+                return False
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="memory-writer", daemon=True)
+                self._flusher.start()
+                atexit.register(self.close)
+            self._pending.append(message_data)
+            if len(self._pending) >= self.flush_batch_size:
+                self._pending_cond.notify()
+        return True
+    
+    def _flush_loop(self):
+        while not self._closed:
+            with self._pending_cond:
+                self._pending_cond.wait(timeout=max(self.flush_interval, self._retry_at - time.monotonic()))
+            self.flush()
+    
+    def _backoff(self):
+        """Delay the next flush after a failed write (exponential, capped)"""
+        self._retry_delay = min(max(self._retry_delay * 2, self.flush_interval), self.max_backoff)
+        self._retry_at = time.monotonic() + self._retry_delay
+        logger.warning(f"Retrying message writes in {self._retry_delay:.1f}s")
+    
+    def _has_pending(self, session_id: str) -> bool:
+        """Whether the session has messages queued or in a batch being written"""
+        with self._pending_cond:
+            return session_id in self._in_flight or any(
+                msg["session_id"] == session_id for msg in self._pending
+            )
+    
+    def _sync_session(self, session_id: str):
+        """
+        Flush queued writes before reading a session that has some (read-your-writes)
+        
+        While writes are backing off after a failure, flush() returns at once and
+        the read does not see the queued messages rather than blocking on MongoDB.
+        """
+        # flush() waits on _flush_lock for an in-flight batch before writing the rest
+        if (self._pending or self._in_flight) and self._has_pending(session_id):
+            self.flush()
+    
+    async def _async_sync_session(self, session_id: str):
+        """_sync_session without blocking the event loop"""
+        if (self._pending or self._in_flight) and self._has_pending(session_id):
+            await asyncio.to_thread(self.flush)
+    
+    def flush(self, force: bool = False):
+        """
+        Write queued messages with one ordered insert_many and update their
+        sessions' counters with one bulk_write
+        
+        Args:
+            force: Write even while backing off after a failed write (shutdown)
+        """
+        if not force and time.monotonic() < self._retry_at:
+            return
+        with self._flush_lock:
+            with self._pending_cond:
+                batch, self._pending = self._pending, []
+                self._in_flight = {msg["session_id"] for msg in batch}
+            if not batch:
+                return
+            
+            try:
+                self._write_batch(batch)
+            finally:
+                # Unwritten messages are back in _pending by now
+                with self._pending_cond:
+                    self._in_flight = set()
+    
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        """Insert a batch and update its sessions' counters (called under _flush_lock)"""
+        try:
+            self.collection.insert_many(batch, ordered=True)
+            inserted = batch
+        except BulkWriteError as e:
+            # Ordered insert stops at the first error
+            n_inserted = e.details.get("nInserted", 0)
+            inserted, remaining = batch[:n_inserted], batch[n_inserted:]
+            write_errors = e.details.get("writeErrors") or []
+            logger.error(f"Failed to write message batch ({n_inserted}/{len(batch)} inserted): {e}")
+            if remaining and write_errors and write_errors[0].get("code") == _DUPLICATE_KEY:
+                # Already written by an earlier partial attempt: skip it, retry the rest now
+                self._write_attempts.pop(remaining[0].get("_id"), None)
+                self._requeue(remaining[1:])
+            elif remaining:
+                self._requeue(self._retry_or_drop(remaining[0]) + remaining[1:])
+                self._backoff()
+        except Exception as e:
+            logger.error(f"Failed to write message batch of {len(batch)}: {e}")
+            self._requeue(batch)
+            self._backoff()
+            return
+        else:
+            self._retry_delay = 0.0
+            self._retry_at = 0.0
+        
+        if self._write_attempts:
+            for msg in inserted:
+                self._write_attempts.pop(msg.get("_id"), None)
+        
+        # One counter update per session in the batch
+        sessions: Dict[str, Dict[str, Any]] = {}
+        for msg in inserted:
+            session = sessions.setdefault(msg["session_id"], {"count": 0, "user_id": msg["user_id"], "last": msg["timestamp"]})
+            session["count"] += 1
+            session["last"] = max(session["last"], msg["timestamp"])
+        if sessions:
+            try:
+                self.sessions.bulk_write([
+                    UpdateOne({"_id": session_id}, self._session_update(s["user_id"], s["last"], s["count"]), upsert=True)
+                    for session_id, s in sessions.items()
+                ], ordered=False)
+            except Exception as e:
+                logger.error(f"Failed to update session counters: {e}")
+            try:
+                # Keep the batch's sessions and their messages expiring together
+                self.collection.bulk_write([
+                    UpdateMany(*self._message_expiry_update(session_id, s["last"]))
+                    for session_id, s in sessions.items()
+                ], ordered=False)
+            except Exception as e:
+                logger.error(f"Failed to extend message expiry: {e}")
+        logger.debug(f"Flushed {len(inserted)} messages for {len(sessions)} sessions")
+    
+    def _retry_or_drop(self, message_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Retry a message MongoDB rejected, or log it for recovery after _MAX_WRITE_ATTEMPTS"""
+        key = message_data.get("_id")
+        attempts = self._write_attempts.get(key, 0) + 1
+        if attempts < _MAX_WRITE_ATTEMPTS:
+            self._write_attempts[key] = attempts
+            return [message_data]
+        self._write_attempts.pop(key, None)
+        logger.error(
+            f"Dropping message of session {message_data['session_id']} after {attempts} failed writes; "
+            f"recover from: {json.dumps(message_data, default=str, ensure_ascii=False)}"
+        )
+        return []
+    
+    def _requeue(self, batch: List[Dict[str, Any]]):
+        """Put unwritten messages back at the head of the queue (keeps ordering)"""
+        if not batch:
+            return
+        with self._pending_cond:
+            self._pending = batch + self._pending
+    
+    def close(self):
+        """Stop the write-behind thread and write everything still queued"""
+        self._closed = True
+        with self._pending_cond:
+            self._pending_cond.notify()
+        self.flush(force=True)
+    
+    def _session_update(self, user_id: str, timestamp: datetime, count: int = 1) -> Dict[str, Any]:
+        """Update document adding count messages to a session's counter"""
+        return {
+            "$inc": {"message_count": count},
+            "$max": {
+                "last_activity": timestamp,
+                # Each turn pushes the session's expiry out again
+                "expires_at": timestamp + timedelta(seconds=self.session_ttl_seconds)
+            },
+            "$set": {"user_id": user_id},
+            "$setOnInsert": {"memories": {}, "created_at": timestamp},
+        }
+    
+    def _message_expiry_update(self, session_id: str, timestamp: datetime) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Filter and update moving a session's messages to its expiry after timestamp"""
+        expires_at = timestamp + timedelta(seconds=self.session_ttl_seconds)
+        return (
+            {"session_id": session_id, "expires_at": {"$lt": expires_at}},
+            {"$set": {"expires_at": expires_at}}
+        )
+    
+    def _touch_session(self, session_id: str, user_id: str, timestamp: datetime, count: int = 1):
+        """Bump the session's message counter and last activity, and extend its messages' expiry"""
+        self.sessions.update_one(
+            {"_id": session_id},
+            self._session_update(user_id, timestamp, count),
+            upsert=True
+        )
+        self.collection.update_many(*self._message_expiry_update(session_id, timestamp))
+    
+    @staticmethod
+    def _to_messages(messages_data: List[Dict[str, Any]], include_metadata: bool = False) -> List[BaseMessage]:
+        """Convert stored message documents to LangChain messages"""
+        messages = []
+        for msg_data in messages_data:
+            kwargs = {}
+            if include_metadata:
+                kwargs = {"metadata": msg_data.get("metadata", {}), "timestamp": msg_data.get("timestamp")}
+            if msg_data["message_type"] == "HumanMessage":
+                messages.append(HumanMessage(content=msg_data["content"], additional_kwargs=kwargs))
+            elif msg_data["message_type"] == "AIMessage":
+                messages.append(AIMessage(content=msg_data["content"], additional_kwargs=kwargs))
+        return messages
+    
+    def _backfill_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Create the counter document of a session saved before counters existed"""
+        latest = self.collection.find_one(
+            {"session_id": session_id},
+            {"_id": 0, "user_id": 1, "timestamp": 1},
+            sort=[("timestamp", DESCENDING)]
+        )
+        if not latest:
+            return None
+        
+        count = self.collection.count_documents({"session_id": session_id})
+        self._touch_session(session_id, latest.get("user_id"), latest["timestamp"], count=count)
+        logger.info(f"Backfilled session counter for {session_id} ({count} messages)")
+        return self.sessions.find_one({"_id": session_id})
+    
+    def load_session(self, session_id: str, limit: int = 8) -> Dict[str, Any]:
         """
-        Get conversation history for a session
+        Load everything a chat turn needs about a session in one round-trip
         
         Args:
             session_id: Session identifier
-            limit: Maximum number of messages to return
+            limit: Maximum number of recent messages to return
+            
+        Returns:
+            Dictionary with messages (chronological), last_activity,
+            message_count and memories
+        """
+        try:
+            if self.connected:
+                self._sync_session(session_id)
+                pipeline = self._session_pipeline(session_id, limit)
+                session = next(self.sessions.aggregate(pipeline), None)
+                if session is None:
+                    # New session, or one saved before counters existed
+                    if not self._backfill_session(session_id):
+                        return self._session_result(session_id, None)
+                    session = next(self.sessions.aggregate(pipeline), None)
+                return self._session_result(session_id, session)
+            
+            # Get from the fallback store
+            stored = self._fallback.get(session_id)
+            if not stored:
+                return self._session_result(session_id, None)
+            return self._session_result(session_id, {
+                "message_count": len(stored),
+                "last_activity": stored[-1]["timestamp"],
+                "recent_messages": list(reversed(stored[-limit:]))
+            })
+            
+        except Exception as e:
+            logger.error(f"Failed to load session: {e}")
+            return self._session_result(session_id, None)
+    
+    async def aload_session(self, session_id: str, limit: int = 8) -> Dict[str, Any]:
+        """Async variant of load_session"""
+        if not self.connected or self.asessions is None:
+            return await asyncio.to_thread(self.load_session, session_id, limit)
+        
+        try:
+            await self._async_sync_session(session_id)
+            pipeline = self._session_pipeline(session_id, limit)
+            sessions = await self.asessions.aggregate(pipeline).to_list(length=1)
+            if not sessions:
+                # New session, or one saved before counters existed
+                if not await asyncio.to_thread(self._backfill_session, session_id):
+                    return self._session_result(session_id, None)
+                sessions = await self.asessions.aggregate(pipeline).to_list(length=1)
+            return self._session_result(session_id, sessions[0] if sessions else None)
+            
+        except Exception as e:
+            logger.error(f"Failed to load session: {e}")
+            return self._session_result(session_id, None)
+    
+    def _session_pipeline(self, session_id: str, limit: int) -> List[Dict[str, Any]]:
+        """Session counter document joined with its newest messages (tail read on the
+        (session_id, timestamp) index)"""
+        return [
+            {"$match": {"_id": session_id}},
+            {"$lookup": {
+                "from": self.collection_name,
+                "localField": "_id",
+                "foreignField": "session_id",
+                "pipeline": [
+                    {"$sort": {"timestamp": -1}},
+                    {"$limit": limit},
+                    {"$project": self._history_projection()}
+                ],
+                "as": "recent_messages"
+            }}
+        ]
+    
+    def _session_result(self, session_id: str, session: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """load_session payload from a session document with newest-first recent_messages"""
+        session = session or {}
+        return {
+            "session_id": session_id,
+            "messages": self._to_messages(list(reversed(session.get("recent_messages", [])))),
+            "last_activity": session.get("last_activity"),
+            "message_count": session.get("message_count", 0),
+            "memories": session.get("memories", {})
+        }
+    
+    @staticmethod
+    def _history_projection(include_metadata: bool = False) -> Dict[str, int]:
+        projection = {"_id": 0, "message_type": 1, "content": 1}
+        if include_metadata:
+            projection.update({"metadata": 1, "timestamp": 1})
+        return projection
+    
+    def get_conversation_history(
+        self,
+        session_id: str,
+        limit: int = 20,
+        include_metadata: bool = False
+    ) -> List[BaseMessage]:
+        """
+        Get the most recent messages of a session
+        
+        Args:
+            session_id: Session identifier
+            limit: Maximum number of messages to return (newest ones are kept)
+            include_metadata: Also load each message's metadata into additional_kwargs
             
         Returns:
             List of messages in chronological order
         """
         try:
             if self.connected:
-                # Get from MongoDB
+                self._sync_session(session_id)
+                # Tail read: walk the (session_id, timestamp) index from the newest end
                 cursor = self.collection.find(
-                    {"session_id": session_id}
-                ).sort("timestamp", 1).limit(limit)
+                    {"session_id": session_id},
+                    self._history_projection(include_metadata)
+                ).sort("timestamp", DESCENDING).limit(limit)
                 messages_data = list(cursor)
+                messages_data.reverse()
             else:
-                # Get from in-memory store
-                messages_data = self._memory_store.get(session_id, [])[-limit:]
+                # Get from the fallback store
+                messages_data = self._fallback.get(session_id)[-limit:]
             
             # Convert to LangChain messages
-            messages = []
-            for msg_data in messages_data:
-                if msg_data["message_type"] == "HumanMessage":
-                    messages.append(HumanMessage(content=msg_data["content"]))
-                elif msg_data["message_type"] == "AIMessage":
-                    messages.append(AIMessage(content=msg_data["content"]))
+            return self._to_messages(messages_data, include_metadata)
             
-            return messages
+        except Exception as e:
+            logger.error(f"Failed to get conversation history: {e}")
+            return []
+    
+    async def aget_conversation_history(
+        self,
+        session_id: str,
+        limit: int = 20,
+        include_metadata: bool = False
+    ) -> List[BaseMessage]:
+        """Async variant of get_conversation_history"""
+        if not self.connected or self.acollection is None:
+            return await asyncio.to_thread(self.get_conversation_history, session_id, limit, include_metadata)
+        
+        try:
+            await self._async_sync_session(session_id)
+            cursor = self.acollection.find(
+                {"session_id": session_id},
+                self._history_projection(include_metadata)
+            ).sort("timestamp", DESCENDING).limit(limit)
+            messages_data = await cursor.to_list(length=limit)
+            messages_data.reverse()
+            return self._to_messages(messages_data, include_metadata)
             
         except Exception as e:
             logger.error(f"Failed to get conversation history: {e}")
@@ -146,6 +739,7 @@ class ConversationMemoryService:
         """
         try:
             if self.connected:
+                self._sync_session(session_id)
                 # Get latest message with metadata
                 latest_msg = self.collection.find_one(
                     {"session_id": session_id},
@@ -153,15 +747,18 @@ class ConversationMemoryService:
                 )
                 
                 if latest_msg:
+                    session = self.sessions.find_one({"_id": session_id}, {"message_count": 1})
+                    if session is None:
+                        session = self._backfill_session(session_id) or {}
                     return {
                         "session_id": session_id,
                         "last_activity": latest_msg["timestamp"],
-                        "message_count": self.collection.count_documents({"session_id": session_id}),
+                        "message_count": session.get("message_count", 0),
                         "metadata": latest_msg.get("metadata", {})
                     }
             else:
-                # Get from in-memory store
-                messages = self._memory_store.get(session_id, [])
+                # Get from the fallback store
+                messages = self._fallback.get(session_id)
                 if messages:
                     return {
                         "session_id": session_id,
@@ -177,34 +774,19 @@ class ConversationMemoryService:
             return {"session_id": session_id, "message_count": 0}
     
     def cleanup_old_sessions(self):
-        """Clean up old sessions based on timeout"""
+        """
+        Expire old sessions
+        
+        MongoDB and Redis expire conversations on their own (TTL indexes and key
+        TTLs, the indexes created at API startup); this only drops expired
+        sessions from the in-process fallback store.
+        """
         try:
-            cutoff_time = datetime.utcnow() - timedelta(hours=self.session_timeout_hours)
-            
             if self.connected:
-                # Delete from MongoDB
-                result = self.collection.delete_many({"timestamp": {"$lt": cutoff_time}})
-                logger.info(f"Cleaned up {result.deleted_count} old messages")
+                logger.info("Conversation expiry is handled by MongoDB TTL indexes")
             else:
-                # Clean up in-memory store
-                sessions_to_remove = []
-                for session_id, messages in self._memory_store.items():
-                    # Remove old messages
-                    recent_messages = [
-                        msg for msg in messages 
-                        if msg["timestamp"] > cutoff_time
-                    ]
-                    
-                    if recent_messages:
-                        self._memory_store[session_id] = recent_messages
-                    else:
-                        sessions_to_remove.append(session_id)
-                
-                # Remove empty sessions
-                for session_id in sessions_to_remove:
-                    del self._memory_store[session_id]
-                
-                logger.info(f"Cleaned up {len(sessions_to_remove)} old sessions")
+                purged = self._fallback.purge_expired()
+                logger.info(f"Cleaned up {purged} expired sessions from {self._fallback.name} storage")
                 
         except Exception as e:
             logger.error(f"Failed to cleanup old sessions: {e}")
@@ -220,46 +802,37 @@ class ConversationMemoryService:
             List of active session information
         """
         try:
-            cutoff_time = datetime.utcnow() - timedelta(hours=self.session_timeout_hours)
-            
             if self.connected:
-                # Query MongoDB
-                filter_query = {"timestamp": {"$gte": cutoff_time}}
+                # Session documents whose rolling expiry has not passed
+                filter_query = {"expires_at": {"$gt": datetime.utcnow()}}
                 if user_id:
                     filter_query["user_id"] = user_id
                 
-                pipeline = [
-                    {"$match": filter_query},
-                    {"$group": {
-                        "_id": "$session_id",
-                        "user_id": {"$first": "$user_id"},
-                        "last_activity": {"$max": "$timestamp"},
-                        "message_count": {"$sum": 1}
-                    }}
-                ]
-                
-                sessions = list(self.collection.aggregate(pipeline))
+                sessions = self.sessions.find(
+                    filter_query,
+                    {"user_id": 1, "last_activity": 1, "message_count": 1}
+                )
                 return [
                     {
                         "session_id": session["_id"],
-                        "user_id": session["user_id"],
-                        "last_activity": session["last_activity"],
-                        "message_count": session["message_count"]
+                        "user_id": session.get("user_id"),
+                        "last_activity": session.get("last_activity"),
+                        "message_count": session.get("message_count", 0)
                     }
                     for session in sessions
                 ]
             else:
-                # Get from in-memory store
+                # Get from the fallback store (expired sessions are already gone)
                 sessions = []
-                for session_id, messages in self._memory_store.items():
-                    if messages and messages[-1]["timestamp"] > cutoff_time:
-                        if not user_id or messages[0].get("user_id") == user_id:
-                            sessions.append({
-                                "session_id": session_id,
-                                "user_id": messages[0].get("user_id"),
-                                "last_activity": messages[-1]["timestamp"],
-                                "message_count": len(messages)
-                            })
+                for session_id in self._fallback.session_ids():
+                    messages = self._fallback.get(session_id)
+                    if messages and (not user_id or messages[0].get("user_id") == user_id):
+                        sessions.append({
+                            "session_id": session_id,
+                            "user_id": messages[0].get("user_id"),
+                            "last_activity": messages[-1]["timestamp"],
+                            "message_count": len(messages)
+                        })
                 
                 return sessions
                 
@@ -1,7 +1,9 @@
 """
 MongoDB database module for document management
 """
+import time
 import uuid
+import asyncio
 from datetime import datetime
 from typing import List, Dict, Optional
 import logging
@@ -11,8 +13,37 @@ from pymongo.collection import Collection
 from pymongo.errors import ConnectionFailure, PyMongoError
 from ..core.config import Config
 
+# Async MongoDB driver (optional, async functions fall back to in-memory storage)
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    AsyncIOMotorClient = None
+
 logger = logging.getLogger(__name__)
 
+
+def create_async_client(url: str = None):
+    """
+    Create a Motor client with the API connection pool settings
+    
+    Args:
+        url: MongoDB connection URL (defaults to Config.MONGODB_URL)
+        
+    Returns:
+        AsyncIOMotorClient, or None if motor is not installed
+    """
+    if AsyncIOMotorClient is None:
+        return None
+    return AsyncIOMotorClient(
+        url or Config.MONGODB_URL,
+        maxPoolSize=Config.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=Config.MONGODB_MIN_POOL_SIZE,
+        waitQueueTimeoutMS=Config.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        serverSelectionTimeoutMS=5000,
+        connectTimeoutMS=5000,
+        socketTimeoutMS=5000
+    )
+
 class DatabaseManager:
     """MongoDB database manager for document operations"""
     
@@ -77,8 +108,74 @@ class DatabaseManager:
             self.client.close()
             logger.info("🔴 MongoDB connection closed")
 
-# Global database manager instance
+
+class AsyncDatabaseManager:
+    """Motor (async) database manager used from the API event loop"""
+    
+    # Seconds between connection attempts while MongoDB is unreachable
+    RECONNECT_INTERVAL = 30
+    
+    def __init__(self):
+        self.client = None
+        self.db = None
+        self.documents_collection = None
+        self.connected = False
+        self._last_attempt: Optional[float] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+    
+    async def connect(self) -> bool:
+        """Create the client and verify the server is reachable"""
+        self._last_attempt = time.monotonic()
+        try:
+            if self.get_client() is None:
+                logger.warning("⚠️ motor is not installed, async database calls run the sync client in a thread")
+                return False
+            
+            await self.client.admin.command('ping')
+            self.db = self.client[Config.MONGODB_DATABASE]
+            self.documents_collection = self.db.documents
+            self.connected = True
+            logger.info(f"✅ Async MongoDB pool ready (max {Config.MONGODB_MAX_POOL_SIZE} connections)")
+            
+        except Exception as e:
+            logger.warning(f"⚠️ Cannot connect to MongoDB (async): {e}")
+            self.connected = False
+        
+        return self.connected
+    
+    def get_client(self):
+        """Shared Motor client for the API process (None if motor is not installed)"""
+        if self.client is None:
+            # Motor connects lazily, so this is safe before the event loop starts
+            self.client = create_async_client()
+        return self.client
+    
+    def _should_connect(self) -> bool:
+        if self.connected:
+            return False
+        return self._last_attempt is None or time.monotonic() - self._last_attempt >= self.RECONNECT_INTERVAL
+    
+    async def collection(self):
+        """Documents collection, connecting on first use (None when unavailable)"""
+        if self._should_connect():
+            if self._connect_lock is None:
+                self._connect_lock = asyncio.Lock()
+            async with self._connect_lock:
+                if self._should_connect():
+                    await self.connect()
+        return self.documents_collection if self.connected else None
+    
+    def close(self):
+        """Close the connection pool"""
+        if self.client:
+            self.client.close()
+            self.client = None
+            self.connected = False
+            logger.info("🔴 Async MongoDB connection closed")
+
+# Global database manager instances
 db_manager = DatabaseManager()
+async_db_manager = AsyncDatabaseManager()
 
 # Fallback in-memory storage for when MongoDB is not available
 _fallback_documents: List[Dict] = []
@@ -322,8 +419,144 @@ def get_database_status() -> Dict:
     
     return status
 
+async def aadd_document(filename: str, file_type: str, size: int, public_url: str = None, stored_filename: str = None) -> Dict:
+    """Async variant of add_document"""
+    if AsyncIOMotorClient is None:
+        return await asyncio.to_thread(add_document, filename, file_type, size, public_url, stored_filename)
+    document = {
+        "id": str(uuid.uuid4()),
+        "filename": filename,
+        "file_type": file_type,
+        "upload_date": datetime.now().isoformat(),
+        "size": size,
+        "public_url": public_url,
+        "status": "completed",
+        "stored_filename": stored_filename or filename
+    }
+    
+    try:
+        collection = await async_db_manager.collection()
+        if collection is not None:
+            # insert_one adds _id to the dict; return the API shape without it
+            await collection.insert_one(dict(document))
+            logger.info(f"📝 Document added to MongoDB: {filename} (ID: {document['id']})")
+            return document
+            
+    except Exception as e:
+        logger.warning(f"⚠️ MongoDB insert failed: {e}, using fallback storage")
+    
+    _fallback_documents.append(document)
+    logger.info(f"📝 Document added to fallback storage: {filename} (ID: {document['id']})")
+    return document
+
+async def aget_documents() -> List[Dict]:
+    """Async variant of get_documents"""
+    if AsyncIOMotorClient is None:
+        return await asyncio.to_thread(get_documents)
+    try:
+        collection = await async_db_manager.collection()
+        if collection is not None:
+            documents = await collection.find({}, {"_id": 0}).to_list(length=None)
+            logger.debug(f"📖 Retrieved {len(documents)} documents from MongoDB")
+            return documents
+            
+    except Exception as e:
+        logger.warning(f"⚠️ MongoDB query failed: {e}, using fallback storage")
+    
+    return _fallback_documents.copy()
+
+async def aget_document_by_id(document_id: str) -> Optional[Dict]:
+    """Async variant of get_document_by_id"""
+    if AsyncIOMotorClient is None:
+        return await asyncio.to_thread(get_document_by_id, document_id)
+    try:
+        collection = await async_db_manager.collection()
+        if collection is not None:
+            return await collection.find_one({"id": document_id}, {"_id": 0})
+            
+    except Exception as e:
+        logger.warning(f"⚠️ MongoDB query failed: {e}, using fallback storage")
+    
+    return next((doc for doc in _fallback_documents if doc["id"] == document_id), None)
+
+async def adelete_document(document_id: str) -> bool:
+    """Async variant of delete_document"""
+    if AsyncIOMotorClient is None:
+        return await asyncio.to_thread(delete_document, document_id)
+    try:
+        collection = await async_db_manager.collection()
+        if collection is not None:
+            result = await collection.delete_one({"id": document_id})
+            if result.deleted_count > 0:
+                logger.info(f"🗑️ Document deleted from MongoDB: {document_id}")
+                return True
+            logger.debug(f"🔍 Document not found for deletion in MongoDB: {document_id}")
+            return False
+            
+    except Exception as e:
+        logger.warning(f"⚠️ MongoDB delete failed: {e}, using fallback storage")
+    
+    for i, doc in enumerate(_fallback_documents):
+        if doc["id"] == document_id:
+            deleted_doc = _fallback_documents.pop(i)
+            logger.info(f"🗑️ Document deleted from fallback storage: {deleted_doc['filename']} (ID: {document_id})")
+            return True
+    return False
+
+async def aget_documents_count() -> int:
+    """Async variant of get_documents_count"""
+    if AsyncIOMotorClient is None:
+        return await asyncio.to_thread(get_documents_count)
+    try:
+        collection = await async_db_manager.collection()
+        if collection is not None:
+            return await collection.count_documents({})
+            
+    except Exception as e:
+        logger.warning(f"⚠️ MongoDB count failed: {e}, using fallback storage")
+    
+    return len(_fallback_documents)
+
+async def aget_documents_by_type(file_type: str) -> List[Dict]:
+    """Async variant of get_documents_by_type"""
+    if AsyncIOMotorClient is None:
+        return await asyncio.to_thread(get_documents_by_type, file_type)
+    try:
+        collection = await async_db_manager.collection()
+        if collection is not None:
+            return await collection.find({"file_type": file_type}, {"_id": 0}).to_list(length=None)
+            
+    except Exception as e:
+        logger.warning(f"⚠️ MongoDB query failed: {e}, using fallback storage")
+    
+    return [doc for doc in _fallback_documents if doc["file_type"] == file_type]
+
+async def aget_database_status() -> Dict:
+    """Async variant of get_database_status"""
+    if AsyncIOMotorClient is None:
+        return await asyncio.to_thread(get_database_status)
+    connected = await async_db_manager.collection() is not None
+    status = {
+        "mongodb_connected": connected,
+        "mongodb_url": Config.MONGODB_URL,
+        "database_name": Config.MONGODB_DATABASE,
+        "documents_count": await aget_documents_count(),
+        "using_fallback": not connected,
+        "max_pool_size": Config.MONGODB_MAX_POOL_SIZE
+    }
+    
+    if connected:
+        try:
+            server_info = await async_db_manager.client.server_info()
+            status["mongodb_version"] = server_info.get("version", "unknown")
+        except Exception:
+            status["mongodb_version"] = "unknown"
+    
+    return status
+
 # Cleanup function for graceful shutdown
 def cleanup():
     """Cleanup database connections"""
     if db_manager:
-        db_manager.close()
\ No newline at end of file
+        db_manager.close()
+    async_db_manager.close()
\ No newline at end of file
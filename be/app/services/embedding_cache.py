@@ -0,0 +1,275 @@
+"""
+Embedding Cache Service
+
+Content-addressed cache for embedding vectors keyed by (model, normalized text hash).
+Lookups go through an in-process LRU tier first, then a persistent tier
+(Redis when reachable, otherwise a local SQLite file).
+"""
+
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+from ..core.config import Config
+
+# Redis persistent tier (optional)
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing so trivially different inputs share a key"""
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_cache_key(model: str, text: str) -> str:
+    """Build the content-addressed key for a (model, text) pair"""
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"emb:{model}:{digest}"
+
+
+def _pack_vector(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack_vector(data: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(data)
+    return vector.tolist()
+
+
+class _RedisTier:
+    """Persistent tier backed by Redis"""
+
+    name = "redis"
+
+    def __init__(self, url: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self.client.ping()
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.client.mget(keys)
+
+    def set_many(self, items: Dict[str, bytes]):
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(key, value, ex=self.ttl_seconds or None)
+        pipe.execute()
+
+
+class _DiskTier:
+    """Persistent tier backed by a local SQLite file"""
+
+    name = "disk"
+
+    def __init__(self, cache_dir: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "embeddings.sqlite3")
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        min_created = time.time() - self.ttl_seconds if self.ttl_seconds else 0
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders}) AND created_at >= ?",
+                    [*batch, min_created],
+                ).fetchall()
+                found.update(rows)
+        return [found.get(key) for key in keys]
+
+    def set_many(self, items: Dict[str, bytes]):
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()],
+            )
+            self.conn.commit()
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        backend: str = None,
+        memory_size: int = None,
+        ttl_days: int = None,
+        redis_url: str = None,
+        cache_dir: str = None,
+    ):
+        """
+        Initialize embedding cache
+
+        Args:
+            backend: Persistent tier - "redis", "disk" or "memory" (LRU only)
+            memory_size: Maximum number of vectors kept in the in-process LRU
+            ttl_days: Expiry for persisted vectors (0 disables expiry)
+            redis_url: Redis URL for the redis tier
+            cache_dir: Directory for the disk tier
+        """
+        self.backend = (backend or Config.EMBEDDING_CACHE_BACKEND).lower()
+        self.memory_size = memory_size if memory_size is not None else Config.EMBEDDING_CACHE_MEMORY_SIZE
+        ttl_days = ttl_days if ttl_days is not None else Config.EMBEDDING_CACHE_TTL_DAYS
+        self.ttl_seconds = ttl_days * 24 * 3600
+        self.redis_url = redis_url or Config.EMBEDDING_CACHE_REDIS_URL
+        self.cache_dir = cache_dir or Config.EMBEDDING_CACHE_DIR
+
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.persistent = None
+
+        # Counters reported through get_stats()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+        self._setup_persistent_tier()
+
+    def _setup_persistent_tier(self):
+        """Setup persistent tier, falling back from redis to disk"""
+        if self.backend == "redis":
+            if redis is None:
+                logger.warning("⚠️ [EMB-CACHE] redis package not installed, falling back to disk tier")
+            else:
+                try:
+                    self.persistent = _RedisTier(self.redis_url, self.ttl_seconds)
+                    logger.info(f"✅ [EMB-CACHE] Using Redis tier at {self.redis_url}")
+                    return
+                except Exception as e:
+                    logger.warning(f"⚠️ [EMB-CACHE] Redis tier unavailable ({e}), falling back to disk tier")
+            self.backend = "disk"
+
+        if self.backend == "disk":
+            try:
+                self.persistent = _DiskTier(self.cache_dir, self.ttl_seconds)
+                logger.info(f"✅ [EMB-CACHE] Using disk tier at {self.persistent.path}")
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ [EMB-CACHE] Disk tier unavailable ({e}), using in-process LRU only")
+
+        self.backend = "memory"
+        self.persistent = None
+
+    def _memory_get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+            return vector
+
+    def _memory_put(self, key: str, vector: List[float]):
+        if self.memory_size <= 0:
+            return
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up cached vectors for texts
+
+        Args:
+            model: Embedding model name
+            texts: Texts to look up
+
+        Returns:
+            List aligned with texts, None where the vector is not cached
+        """
+        keys = [make_cache_key(model, text) for text in texts]
+        results: List[Optional[List[float]]] = [self._memory_get(key) for key in keys]
+        memory_hits = sum(1 for vector in results if vector is not None)
+
+        persistent_hits = 0
+        pending = [i for i, vector in enumerate(results) if vector is None]
+        if pending and self.persistent:
+            try:
+                stored = self.persistent.get_many([keys[i] for i in pending])
+                for i, data in zip(pending, stored):
+                    if data:
+                        vector = _unpack_vector(data)
+                        results[i] = vector
+                        self._memory_put(keys[i], vector)
+                        persistent_hits += 1
+            except Exception as e:
+                logger.warning(f"⚠️ [EMB-CACHE] {self.persistent.name} lookup failed: {e}")
+
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.persistent_hits += persistent_hits
+            self.misses += len(texts) - memory_hits - persistent_hits
+
+        return results
+
+    def set_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        """
+        Store vectors for texts in every tier
+
+        Args:
+            model: Embedding model name
+            texts: Embedded texts
+            vectors: Vectors aligned with texts
+        """
+        items = {}
+        for text, vector in zip(texts, vectors):
+            if not vector:
+                continue
+            key = make_cache_key(model, text)
+            self._memory_put(key, vector)
+            items[key] = _pack_vector(vector)
+
+        if items and self.persistent:
+            try:
+                self.persistent.set_many(items)
+            except Exception as e:
+                logger.warning(f"⚠️ [EMB-CACHE] {self.persistent.name} store failed: {e}")
+
+    def clear_memory(self):
+        """Drop the in-process LRU tier"""
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            hits = self.memory_hits + self.persistent_hits
+            lookups = hits + self.misses
+            return {
+                "backend": self.backend,
+                "memory_entries": len(self._memory),
+                "memory_size": self.memory_size,
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
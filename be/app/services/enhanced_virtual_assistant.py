@@ -5,12 +5,15 @@ Modular RAG and Conversational AI with LangGraph
 
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional
+from types import SimpleNamespace
+from typing import Dict, Any, Optional, AsyncIterator
 from langchain_core.messages import HumanMessage, AIMessage
 
 from ..agent.graph_builder import MainGraphBuilder
 from ..agent.state import InputState
 from ..agent.configuration import Configuration
+from ..agent.chains import STREAM_TAG, ANSWER_TOKEN_EVENT, SOURCES_EVENT
+from ..agent.router import query_router
 from .conversation_memory import conversation_memory
 
 logger = logging.getLogger(__name__)
@@ -34,6 +37,85 @@ class EnhancedVirtualAssistantService:
         
         logger.info("Enhanced Virtual Assistant initialized successfully")
     
+    async def _prepare_run(self, message: str, session_id: str, user_id: str):
+        """Build the graph input state and run config for a chat turn."""
+        
+        # Recent history, counters and memories in one round-trip
+        session = await self.memory_service.aload_session(session_id, limit=8)
+        
+        # Create input state
+        input_state = InputState(
+            messages=[*session["messages"], HumanMessage(content=message)],
+            session_id=session_id,
+            user_id=user_id,
+            memories=session["memories"]
+        )
+        
+        # Create configuration with thread_id
+        config = {
+            "configurable": {
+                **Configuration().__dict__,
+                "thread_id": session_id  # Add thread_id for LangGraph checkpointer
+            }
+        }
+        
+        return input_state, config
+    
+    async def _finalize_run(
+        self,
+        final_state: Dict[str, Any],
+        message: str,
+        session_id: str,
+        user_id: str
+    ) -> Dict[str, Any]:
+        """Extract the AI response from the final state, save it and build the response payload."""
+        
+        # Extract AI response
+        ai_response = None
+        if final_state.get("messages"):
+            ai_response = final_state["messages"][-1]
+        
+        if not ai_response or not isinstance(ai_response, AIMessage):
+            return {
+                "response": "Xin lỗi, có lỗi xảy ra trong quá trình xử lý.",
+                "session_id": session_id,
+                "timestamp": datetime.now().isoformat(),
+                "metadata": {"error": "No AI response generated"}
+            }
+        
+        # Save conversation to memory
+        await self._save_conversation(
+            session_id=session_id,
+            user_id=user_id,
+            user_message=HumanMessage(content=message),
+            ai_message=ai_response
+        )
+        
+        # Prepare response with metadata
+        return {
+            "response": ai_response.content,
+            "session_id": session_id,
+            "timestamp": datetime.now().isoformat(),
+            "metadata": {
+                "rag_used": ai_response.additional_kwargs.get("rag_used", False),
+                "confidence": ai_response.additional_kwargs.get("confidence", 0.0),
+                "extracted_entities": ai_response.additional_kwargs.get("extracted_entities", []),
+                "source_info": ai_response.additional_kwargs.get("source_info", ""),
+                "response_type": ai_response.additional_kwargs.get("response_type", "unknown"),
+                "cache_hit": ai_response.additional_kwargs.get("cache_hit", False),
+                "conversation_length": len(final_state.get("messages", []))
+            }
+        }
+    
+    def _error_response(self, error: Exception, session_id: str) -> Dict[str, Any]:
+        """Response payload for a failed chat turn."""
+        return {
+            "response": f"Xin lỗi, có lỗi xảy ra: {str(error)}",
+            "session_id": session_id,
+            "timestamp": datetime.now().isoformat(),
+            "metadata": {"error": str(error)}
+        }
+    
     async def chat(self, message: str, session_id: str, user_id: str = "anonymous") -> Dict[str, Any]:
         """
         Main chat interface using advanced agent workflow.
@@ -48,68 +130,13 @@ class EnhancedVirtualAssistantService:
         """
         
         try:
-            # Get conversation history for context
-            history = self.memory_service.get_conversation_history(session_id, limit=8)
-            
-            # Get session context/memories
-            session_context = self.memory_service.get_session_context(session_id)
-            memories = session_context.get("memories", {})
-            
-            # Create input state
-            input_state = InputState(
-                messages=[*history, HumanMessage(content=message)],
-                session_id=session_id,
-                user_id=user_id,
-                memories=memories
-            )
-            
-            # Create configuration with thread_id
-            config = {
-                "configurable": {
-                    **Configuration().__dict__,
-                    "thread_id": session_id  # Add thread_id for LangGraph checkpointer
-                }
-            }
+            input_state, config = await self._prepare_run(message, session_id, user_id)
             
             # Run the agent workflow
             logger.info(f"Processing message for user {user_id}, session {session_id}")
             final_state = await self.workflow.ainvoke(input_state, config=config)
             
-            # Extract AI response
-            ai_response = None
-            if final_state.get("messages"):
-                ai_response = final_state["messages"][-1]
-            
-            if not ai_response or not isinstance(ai_response, AIMessage):
-                return {
-                    "response": "Xin lỗi, có lỗi xảy ra trong quá trình xử lý.",
-                    "session_id": session_id,
-                    "timestamp": datetime.now().isoformat(),
-                    "metadata": {"error": "No AI response generated"}
-                }
-            
-            # Save conversation to memory
-            await self._save_conversation(
-                session_id=session_id,
-                user_id=user_id,
-                user_message=HumanMessage(content=message),
-                ai_message=ai_response
-            )
-            
-            # Prepare response with metadata
-            response_data = {
-                "response": ai_response.content,
-                "session_id": session_id,
-                "timestamp": datetime.now().isoformat(),
-                "metadata": {
-                    "rag_used": ai_response.additional_kwargs.get("rag_used", False),
-                    "confidence": ai_response.additional_kwargs.get("confidence", 0.0),
-                    "extracted_entities": ai_response.additional_kwargs.get("extracted_entities", []),
-                    "source_info": ai_response.additional_kwargs.get("source_info", ""),
-                    "response_type": ai_response.additional_kwargs.get("response_type", "unknown"),
-                    "conversation_length": len(final_state.get("messages", []))
-                }
-            }
+            response_data = await self._finalize_run(final_state, message, session_id, user_id)
             
             logger.info(f"Chat completed successfully for session {session_id}")
             return response_data
@@ -119,12 +146,101 @@ class EnhancedVirtualAssistantService:
             import traceback
             traceback.print_exc()
             
+            return self._error_response(e, session_id)
+    
+    async def astream_chat(
+        self,
+        message: str,
+        session_id: str,
+        user_id: str = "anonymous"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming chat interface: yields progress as each graph node finishes and
+        answer tokens as the generation nodes produce them.
+        
+        Args:
+            message: User message
+            session_id: Session identifier
+            user_id: User identifier
+            
+        Yields:
+            {"type": "route", "route": "cache" | "rag" | "generic", ...} once routed,
+            {"type": "sources", "sources": [...]} once retrieval finishes (RAG only),
+            {"type": "token", "content": str} for each answer token, then
+            {"type": "final", "data": <same payload as chat()>}
+        """
+        
+        try:
+            input_state, config = await self._prepare_run(message, session_id, user_id)
+            
+            logger.info(f"Streaming message for user {user_id}, session {session_id}")
+            async for event in self.workflow.astream_events(input_state, config=config, version="v2"):
+                token = self._extract_token(event)
+                if token:
+                    yield {"type": "token", "content": token}
+                    continue
+                
+                progress = self._extract_progress(event)
+                if progress:
+                    yield progress
+            
+            # Final state is persisted by the checkpointer under the thread_id
+            snapshot = await self.workflow.aget_state(config)
+            response_data = await self._finalize_run(snapshot.values, message, session_id, user_id)
+            
+            logger.info(f"Streamed chat completed successfully for session {session_id}")
+            yield {"type": "final", "data": response_data}
+            
+        except Exception as e:
+            logger.error(f"Error in streaming chat processing: {e}")
+            yield {"type": "final", "data": self._error_response(e, session_id)}
+    
+    @staticmethod
+    def _extract_token(event: Dict[str, Any]) -> Optional[str]:
+        """Get the user-facing answer token from an astream_events event, if any."""
+        kind = event.get("event")
+        
+        # GenericResponseNode: LangChain chat model tagged for streaming
+        if kind == "on_chat_model_stream" and STREAM_TAG in event.get("tags", []):
+            chunk = event.get("data", {}).get("chunk")
+            content = getattr(chunk, "content", "")
+            return content if isinstance(content, str) else None
+        
+        # rag_response: tokens dispatched from RAGService's OpenAI stream
+        if kind == "on_custom_event" and event.get("name") == ANSWER_TOKEN_EVENT:
+            return event.get("data", {}).get("token")
+        
+        return None
+    
+    def _extract_progress(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get a route/sources progress update from an astream_events event, if any."""
+        kind = event.get("event")
+        
+        if kind == "on_custom_event" and event.get("name") == SOURCES_EVENT:
+            return {"type": "sources", "sources": event.get("data", {}).get("sources", [])}
+        
+        # Only top-level graph nodes (not runs nested inside them)
+        if kind != "on_chain_end" or event.get("metadata", {}).get("langgraph_node") != event.get("name"):
+            return None
+        
+        output = event.get("data", {}).get("output")
+        if not isinstance(output, dict):
+            return None
+        
+        if event["name"] == "check_cache" and output.get("cache_hit"):
+            return {"type": "route", "route": "cache"}
+        
+        if event["name"] == "analyze_query":
+            analysis = SimpleNamespace(**output)
             return {
-                "response": f"Xin lỗi, có lỗi xảy ra: {str(e)}",
-                "session_id": session_id,
-                "timestamp": datetime.now().isoformat(),
-                "metadata": {"error": str(e)}
+                "type": "route",
+                "route": self.graph_builder.route_query(analysis),
+                "needs_search": output.get("needs_search", False),
+                "route_destination": output.get("route_destination", "casual"),
+                "language": output.get("language", "vi")
             }
+        
+        return None
     
     async def _save_conversation(
         self, 
@@ -145,7 +261,7 @@ class EnhancedVirtualAssistantService:
             }
             
             # Save user message
-            self.memory_service.save_message(
+            await self.memory_service.asave_message(
                 session_id=session_id,
                 user_id=user_id,
                 message=user_message,
@@ -153,7 +269,7 @@ class EnhancedVirtualAssistantService:
             )
             
             # Save AI message
-            self.memory_service.save_message(
+            await self.memory_service.asave_message(
                 session_id=session_id,
                 user_id=user_id,
                 message=ai_message,
@@ -165,17 +281,17 @@ class EnhancedVirtualAssistantService:
         except Exception as e:
             logger.error(f"Error saving conversation: {e}")
     
-    def get_session_info(self, session_id: str) -> Dict[str, Any]:
+    async def aget_session_info(self, session_id: str) -> Dict[str, Any]:
         """Get session information and context."""
         
         try:
-            context = self.memory_service.get_session_context(session_id)
-            history = self.memory_service.get_conversation_history(session_id, limit=5)
+            session = await self.memory_service.aload_session(session_id, limit=5)
+            history = session["messages"]
             
             return {
                 "session_id": session_id,
-                "message_count": context.get("message_count", 0),
-                "last_activity": context.get("last_activity"),
+                "message_count": session["message_count"],
+                "last_activity": session["last_activity"],
                 "recent_messages": [
                     {
                         "type": msg.__class__.__name__,
@@ -211,6 +327,8 @@ class EnhancedVirtualAssistantService:
                     "conversation_memory",
                     "query_transformation"
                 ],
+                "router": query_router.get_stats(),
+                "speculative_retrieval": self.graph_builder.get_speculation_stats(),
                 "timestamp": datetime.now().isoformat()
             }
             
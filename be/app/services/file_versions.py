@@ -0,0 +1,127 @@
+"""
+File Version Registry
+
+Monotonic per-file version counters bumped whenever a source file's chunks are
+(re-)ingested or deleted. Stored in a Redis hash so the API process sees bumps
+made by Celery workers; falls back to an in-process dict when Redis is unreachable.
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable
+
+from ..core.config import Config
+
+# Redis backend (optional)
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FileVersionRegistry:
+    def __init__(self, redis_url: str = None, key: str = "dvc:file_versions"):
+        """
+        Initialize file version registry
+
+        Args:
+            redis_url: Redis URL (defaults to Config.REDIS_URL)
+            key: Redis hash holding {file_name: version}
+        """
+        self.redis_url = redis_url or Config.REDIS_URL
+        self.key = key
+        self._local: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.client = None
+
+        if redis is None:
+            logger.warning("⚠️ [FILE-VERSIONS] redis package not installed, using in-process registry")
+            return
+        try:
+            self.client = redis.Redis.from_url(self.redis_url, socket_timeout=2, socket_connect_timeout=2)
+            self.client.ping()
+        except Exception as e:
+            logger.warning(f"⚠️ [FILE-VERSIONS] Redis unavailable ({e}), using in-process registry")
+            self.client = None
+
+    def bump(self, file_names: Iterable[str]):
+        """
+        Mark files as changed
+
+        Args:
+            file_names: Files whose chunks were inserted, replaced or deleted
+        """
+        file_names = sorted(set(file_names))
+        if not file_names:
+            return
+
+        with self._lock:
+            for name in file_names:
+                self._local[name] = self._local.get(name, 0) + 1
+
+        if self.client:
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                for name in file_names:
+                    pipe.hincrby(self.key, name, 1)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"⚠️ [FILE-VERSIONS] Failed to bump versions in Redis: {e}")
+
+        logger.info(f"🔖 [FILE-VERSIONS] Bumped versions for {len(file_names)} file(s)")
+
+    @property
+    def shared(self) -> bool:
+        """Whether versions are shared across processes (Redis reachable)"""
+        return self.client is not None
+
+    def get_all(self) -> Dict[str, int]:
+        """
+        Get versions of every file that was ever bumped
+
+        Returns:
+            {file_name: version}
+        """
+        if self.client:
+            try:
+                return {
+                    name.decode("utf-8"): int(value)
+                    for name, value in self.client.hgetall(self.key).items()
+                }
+            except Exception as e:
+                logger.warning(f"⚠️ [FILE-VERSIONS] Failed to read versions from Redis: {e}")
+
+        with self._lock:
+            return dict(self._local)
+
+    def get_many(self, file_names: Iterable[str]) -> Dict[str, int]:
+        """
+        Get current versions
+
+        Args:
+            file_names: Files to look up
+
+        Returns:
+            {file_name: version}, 0 for files never bumped
+        """
+        file_names = list(file_names)
+        if not file_names:
+            return {}
+
+        if self.client:
+            try:
+                values = self.client.hmget(self.key, file_names)
+                return {name: int(value or 0) for name, value in zip(file_names, values)}
+            except Exception as e:
+                logger.warning(f"⚠️ [FILE-VERSIONS] Failed to read versions from Redis: {e}")
+
+        with self._lock:
+            return {name: self._local.get(name, 0) for name in file_names}
+
+
+# Global file version registry instance
+file_versions = FileVersionRegistry()
@@ -0,0 +1,311 @@
+"""
+Lexical Index Service
+
+In-process BM25 inverted index over Milvus chunk content with Vietnamese-aware
+tokenization, used alongside dense vector search for hybrid retrieval.
+The index is built once from Milvus and then refreshed per file whenever the
+file version registry reports a re-ingest or delete.
+"""
+
+import re
+import math
+import time
+import logging
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import List, Dict, Any, Tuple, Iterable
+
+from .file_versions import file_versions
+from ..core.config import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Form codes, document numbers and dotted/slashed references: "CT01", "01/2021/TT-BCA", "20.1"
+_CODE_PATTERN = re.compile(r"\w+(?:[/\-.]\w+)+|\w*\d\w*")
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Milvus limits offset + limit for a single query
+_QUERY_WINDOW = 16384
+_OUTPUT_FIELDS = ["id", "file_name", "content", "title", "section"]
+
+
+def _fold_diacritics(token: str) -> str:
+    """Strip Vietnamese diacritics so unaccented queries ("dang ky") still match"""
+    decomposed = unicodedata.normalize("NFD", token.replace("đ", "d"))
+    return "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize Vietnamese text for lexical matching
+
+    Vietnamese words are mostly multi-syllable ("đăng ký", "thường trú"), so
+    adjacent syllable bigrams are indexed in addition to single syllables.
+    Codes and numbered references are kept whole.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        List of index terms
+    """
+    text = unicodedata.normalize("NFC", text or "").lower()
+    syllables = _WORD_PATTERN.findall(text)
+
+    terms = list(syllables)
+    terms.extend(f"{a}_{b}" for a, b in zip(syllables, syllables[1:]))
+    terms.extend(code for code in _CODE_PATTERN.findall(text) if code not in syllables)
+
+    folded = [_fold_diacritics(syllable) for syllable in syllables]
+    terms.extend(f for f, s in zip(folded, syllables) if f != s)
+    return terms
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[Any]], k: int = 60) -> List[Tuple[Any, float]]:
+    """
+    Fuse ranked id lists with Reciprocal Rank Fusion
+
+    Args:
+        rankings: Ranked lists of ids (best first)
+        k: RRF constant damping the weight of top ranks
+
+    Returns:
+        [(id, fused_score)] sorted by fused score, best first
+    """
+    scores: Dict[Any, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class LexicalIndex:
+    def __init__(
+        self,
+        k1: float = 1.5,
+        b: float = 0.75,
+        refresh_interval: int = None,
+        rebuild_interval: int = None,
+    ):
+        """
+        Initialize lexical index
+
+        Args:
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+            refresh_interval: Minimum seconds between checks for changed files
+            rebuild_interval: Seconds between full rebuilds when file versions are
+                              not shared across processes (no Redis)
+        """
+        self.k1 = k1
+        self.b = b
+        self.refresh_interval = (
+            refresh_interval if refresh_interval is not None else Config.LEXICAL_INDEX_REFRESH_INTERVAL
+        )
+        self.rebuild_interval = (
+            rebuild_interval if rebuild_interval is not None else Config.LEXICAL_INDEX_REBUILD_INTERVAL
+        )
+
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+
+        # term -> {pk: term frequency}
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        # pk -> document length in terms, pk -> distinct terms (for removal)
+        self._lengths: Dict[int, int] = {}
+        self._doc_terms: Dict[int, List[str]] = {}
+        # pk -> file_name, file_name -> {pk}
+        self._doc_files: Dict[int, str] = {}
+        self._file_docs: Dict[str, set] = defaultdict(set)
+        self._total_length = 0
+
+        self._built = False
+        self._versions: Dict[str, int] = {}
+        self._last_refresh = 0.0
+        self._last_rebuild = 0.0
+
+    # ---- mutation -------------------------------------------------------
+
+    def _add(self, pk: int, file_name: str, text: str):
+        """Index one chunk (caller holds the lock)"""
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self._postings[term][pk] = tf
+        self._doc_terms[pk] = list(counts)
+        length = sum(counts.values())
+        self._lengths[pk] = length
+        self._total_length += length
+        self._doc_files[pk] = file_name
+        self._file_docs[file_name].add(pk)
+
+    def _remove_file(self, file_name: str):
+        """Drop every chunk of a file (caller holds the lock)"""
+        pks = self._file_docs.pop(file_name, set())
+        if not pks:
+            return
+        for pk in pks:
+            for term in self._doc_terms.pop(pk, []):
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                posting.pop(pk, None)
+                if not posting:
+                    del self._postings[term]
+            self._total_length -= self._lengths.pop(pk, 0)
+            self._doc_files.pop(pk, None)
+
+    @staticmethod
+    def _chunk_text(row: Dict[str, Any]) -> str:
+        # Titles and sections carry procedure names, so index them with the content
+        return " ".join(filter(None, [row.get("title"), row.get("section"), row.get("content")]))
+
+    @staticmethod
+    def _iter_all_chunks(collection):
+        """Yield every chunk in the collection"""
+        if hasattr(collection, "query_iterator"):
+            iterator = collection.query_iterator(
+                batch_size=1000, expr='file_name != ""', output_fields=_OUTPUT_FIELDS
+            )
+            try:
+                while True:
+                    batch = iterator.next()
+                    if not batch:
+                        break
+                    yield from batch
+            finally:
+                iterator.close()
+            return
+
+        # Older pymilvus: paged query (bounded by the Milvus query window)
+        offset = 0
+        while offset < _QUERY_WINDOW:
+            batch = collection.query(
+                expr='file_name != ""',
+                output_fields=_OUTPUT_FIELDS,
+                limit=min(1000, _QUERY_WINDOW - offset),
+                offset=offset,
+            )
+            if not batch:
+                break
+            yield from batch
+            offset += len(batch)
+
+    def rebuild(self, collection):
+        """Build the whole index from Milvus"""
+        versions = file_versions.get_all()
+        fresh = LexicalIndex(self.k1, self.b, self.refresh_interval, self.rebuild_interval)
+        for row in self._iter_all_chunks(collection):
+            fresh._add(row["id"], row["file_name"], self._chunk_text(row))
+
+        with self._lock:
+            self._postings = fresh._postings
+            self._lengths = fresh._lengths
+            self._doc_terms = fresh._doc_terms
+            self._doc_files = fresh._doc_files
+            self._file_docs = fresh._file_docs
+            self._total_length = fresh._total_length
+            self._versions = versions
+            self._built = True
+            self._last_rebuild = time.time()
+
+        logger.info(f"📚 [LEXICAL] Built index with {len(self._lengths)} chunks from {len(self._file_docs)} files")
+
+    def reindex_file(self, collection, file_name: str):
+        """Replace a file's chunks with what Milvus currently holds"""
+        escaped = file_name.replace("\\", "\\\\").replace('"', '\\"')
+        rows = collection.query(
+            expr=f'file_name == "{escaped}"',
+            output_fields=_OUTPUT_FIELDS,
+            limit=_QUERY_WINDOW,
+        )
+        with self._lock:
+            self._remove_file(file_name)
+            for row in rows:
+                self._add(row["id"], row["file_name"], self._chunk_text(row))
+        logger.info(f"📚 [LEXICAL] Reindexed {len(rows)} chunks for file: {file_name}")
+
+    def refresh(self, collection, force: bool = False):
+        """
+        Bring the index up to date with Milvus (cheap when nothing changed)
+
+        Args:
+            collection: Loaded Milvus collection
+            force: Skip the refresh interval check
+        """
+        now = time.time()
+        if not force and self._built and now - self._last_refresh < self.refresh_interval:
+            return
+
+        # One refresher at a time; concurrent searches use the current snapshot
+        if not self._refresh_lock.acquire(blocking=not self._built):
+            return
+        try:
+            self._last_refresh = now
+            if not self._built or (not file_versions.shared and now - self._last_rebuild > self.rebuild_interval):
+                self.rebuild(collection)
+                return
+
+            versions = file_versions.get_all()
+            changed = [
+                name for name in set(versions) | set(self._versions)
+                if versions.get(name, 0) != self._versions.get(name, 0)
+            ]
+            for name in changed:
+                self.reindex_file(collection, name)
+            self._versions = versions
+        except Exception as e:
+            logger.error(f"💥 [LEXICAL] Failed to refresh index: {e}")
+        finally:
+            self._refresh_lock.release()
+
+    # ---- search ---------------------------------------------------------
+
+    def search(self, query: str, top_k: int = 20) -> List[Tuple[int, float]]:
+        """
+        BM25 search
+
+        Args:
+            query: Search query
+            top_k: Number of results
+
+        Returns:
+            [(pk, bm25_score)] best first
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            doc_count = len(self._lengths)
+            if not doc_count:
+                return []
+            avg_length = self._total_length / doc_count
+
+            scores: Dict[int, float] = defaultdict(float)
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for pk, tf in posting.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[pk] / avg_length)
+                    scores[pk] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        with self._lock:
+            return {
+                "built": self._built,
+                "chunks": len(self._lengths),
+                "files": len(self._file_docs),
+                "terms": len(self._postings),
+            }
+
+
+# Global lexical index instance
+lexical_index = LexicalIndex()
@@ -0,0 +1,160 @@
+"""
+Milvus Index Configuration
+
+Index type presets (build + search parameters) and per-collection overrides
+read from configuration, shared by MilvusService and the index benchmark.
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from ..core.config import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Default build/search parameters per index type
+INDEX_PRESETS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "FLAT": {"build": {}, "search": {}},
+    "IVF_FLAT": {"build": {"nlist": 128}, "search": {"nprobe": 10}},
+    "IVF_SQ8": {"build": {"nlist": 128}, "search": {"nprobe": 16}},
+    "HNSW": {"build": {"M": 16, "efConstruction": 200}, "search": {"ef": 64}},
+    "DISKANN": {"build": {}, "search": {"search_list": 100}},
+}
+
+# Search parameters that must be at least top_k
+_MIN_TOP_K_PARAMS = {"HNSW": "ef", "DISKANN": "search_list"}
+
+
+@dataclass
+class IndexConfig:
+    """Vector index definition for a collection."""
+
+    index_type: str = "IVF_FLAT"
+    metric_type: str = "IP"
+    build_params: Dict[str, Any] = field(default_factory=dict)
+    search_params: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def preset(cls, index_type: str, metric_type: str = "IP", **overrides) -> "IndexConfig":
+        """
+        Build a config from the preset for an index type
+
+        Args:
+            index_type: FLAT, IVF_FLAT, IVF_SQ8, HNSW or DISKANN
+            metric_type: Similarity metric
+            **overrides: build_params / search_params merged over the preset
+
+        Returns:
+            IndexConfig
+        """
+        index_type = index_type.upper()
+        if index_type not in INDEX_PRESETS:
+            raise ValueError(f"Unsupported index type: {index_type} (supported: {', '.join(INDEX_PRESETS)})")
+
+        preset = INDEX_PRESETS[index_type]
+        return cls(
+            index_type=index_type,
+            metric_type=metric_type,
+            build_params={**preset["build"], **(overrides.get("build_params") or {})},
+            search_params={**preset["search"], **(overrides.get("search_params") or {})},
+        )
+
+    def index_params(self) -> Dict[str, Any]:
+        """Parameters for Collection.create_index"""
+        return {
+            "metric_type": self.metric_type,
+            "index_type": self.index_type,
+            "params": dict(self.build_params),
+        }
+
+    def search_param(self, top_k: int) -> Dict[str, Any]:
+        """Parameters for Collection.search"""
+        params = dict(self.search_params)
+        min_param = _MIN_TOP_K_PARAMS.get(self.index_type)
+        if min_param:
+            params[min_param] = max(int(params.get(min_param, top_k)), top_k)
+        return {"metric_type": self.metric_type, "params": params}
+
+    def score(self, query: List[float], vectors: List[List[float]]) -> np.ndarray:
+        """
+        Score stored vectors against a query the way Milvus search reports it
+
+        Args:
+            query: Query vector
+            vectors: Stored vectors
+
+        Returns:
+            One score per vector: inner product (IP), cosine similarity (COSINE)
+            or squared Euclidean distance (L2, lower is closer)
+        """
+        q = np.asarray(query, dtype=np.float32)
+        m = np.asarray(vectors, dtype=np.float32).reshape(-1, q.shape[0])
+        metric = self.metric_type.upper()
+        if metric == "L2":
+            diff = m - q
+            return np.einsum("ij,ij->i", diff, diff)
+        scores = m @ q
+        if metric == "COSINE":
+            norms = np.linalg.norm(m, axis=1) * np.linalg.norm(q)
+            scores = np.divide(scores, norms, out=np.zeros_like(scores), where=norms > 0)
+        return scores
+
+    def label(self) -> str:
+        """Short description for logs and reports"""
+        build = ",".join(f"{k}={v}" for k, v in self.build_params.items())
+        search = ",".join(f"{k}={v}" for k, v in self.search_params.items())
+        return f"{self.index_type}[{build}|{search}]"
+
+
+def _load_json(name: str, raw: str) -> Dict[str, Any]:
+    if not raw:
+        return {}
+    try:
+        value = json.loads(raw)
+        if isinstance(value, dict):
+            return value
+        logger.warning(f"⚠️ [MILVUS-INDEX] {name} must be a JSON object, ignoring")
+    except json.JSONDecodeError as e:
+        logger.warning(f"⚠️ [MILVUS-INDEX] Invalid JSON in {name}: {e}")
+    return {}
+
+
+def get_index_config(collection_name: Optional[str] = None) -> IndexConfig:
+    """
+    Resolve the index configuration for a collection
+
+    MILVUS_COLLECTION_INDEXES overrides take precedence over the global
+    MILVUS_INDEX_TYPE / MILVUS_INDEX_PARAMS / MILVUS_SEARCH_PARAMS settings.
+
+    Args:
+        collection_name: Collection name
+
+    Returns:
+        IndexConfig
+    """
+    index_type = Config.MILVUS_INDEX_TYPE
+    build_params = _load_json("MILVUS_INDEX_PARAMS", Config.MILVUS_INDEX_PARAMS)
+    search_params = _load_json("MILVUS_SEARCH_PARAMS", Config.MILVUS_SEARCH_PARAMS)
+
+    overrides = _load_json("MILVUS_COLLECTION_INDEXES", Config.MILVUS_COLLECTION_INDEXES)
+    collection_override = overrides.get(collection_name) if collection_name else None
+    if collection_override:
+        if collection_override.get("index_type", index_type).upper() != index_type.upper():
+            # Global params belong to a different index type
+            build_params, search_params = {}, {}
+        index_type = collection_override.get("index_type", index_type)
+        build_params = {**build_params, **collection_override.get("build_params", {})}
+        search_params = {**search_params, **collection_override.get("search_params", {})}
+
+    try:
+        return IndexConfig.preset(index_type, build_params=build_params, search_params=search_params)
+    except ValueError as e:
+        logger.error(f"❌ [MILVUS-INDEX] {e}; falling back to IVF_FLAT")
+        return IndexConfig.preset("IVF_FLAT")
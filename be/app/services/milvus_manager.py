@@ -0,0 +1,177 @@
+"""
+Milvus Connection Manager
+
+Process-wide registry of named Milvus connections and loaded collection handles,
+shared by every MilvusService instance so callers stop paying for
+connect/load on each request.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+from pymilvus import connections, utility, Collection
+
+from ..core.config import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MilvusConnectionManager:
+    def __init__(self, health_check_interval: int = None):
+        """
+        Initialize connection manager
+
+        Args:
+            health_check_interval: Seconds between server health checks per connection
+        """
+        self.health_check_interval = (
+            health_check_interval
+            if health_check_interval is not None
+            else Config.MILVUS_HEALTH_CHECK_INTERVAL
+        )
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+        # {alias: {"host", "port", "last_check"}}
+        self._connections: Dict[str, Dict[str, Any]] = {}
+        # {(alias, collection_name): Collection}
+        self._collections: Dict[Tuple[str, str], Collection] = {}
+        self._loaded: set = set()
+
+    def _reset_after_fork(self):
+        """gRPC channels are not fork-safe; forget parent connections in a child process"""
+        if os.getpid() != self._pid:
+            logger.info("🔁 [MILVUS-POOL] Process fork detected, resetting pooled connections")
+            self._pid = os.getpid()
+            self._connections.clear()
+            self._collections.clear()
+            self._loaded.clear()
+
+    def _is_healthy(self, alias: str) -> bool:
+        try:
+            utility.get_server_version(using=alias)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ [MILVUS-POOL] Health check failed for '{alias}': {e}")
+            return False
+
+    def _drop(self, alias: str):
+        """Forget a connection and every collection handle bound to it"""
+        try:
+            connections.disconnect(alias)
+        except Exception:
+            pass
+        self._connections.pop(alias, None)
+        for key in [key for key in self._collections if key[0] == alias]:
+            self._collections.pop(key, None)
+            self._loaded.discard(key)
+
+    def get_connection(self, alias: str = "default", host: str = None, port: str = None) -> bool:
+        """
+        Get (or open) a pooled connection
+
+        Args:
+            alias: Connection name
+            host: Milvus server host
+            port: Milvus server port
+
+        Returns:
+            True if the connection is usable
+        """
+        host = host or Config.MILVUS_HOST
+        port = str(port or Config.MILVUS_PORT)
+
+        with self._lock:
+            self._reset_after_fork()
+            info = self._connections.get(alias)
+
+            if info and info["host"] == host and info["port"] == port:
+                if time.time() - info["last_check"] < self.health_check_interval:
+                    return True
+                if self._is_healthy(alias):
+                    info["last_check"] = time.time()
+                    return True
+                logger.warning(f"🔌 [MILVUS-POOL] Reconnecting '{alias}' to {host}:{port}")
+
+            if info:
+                self._drop(alias)
+
+            try:
+                connections.connect(alias, host=host, port=port)
+                self._connections[alias] = {"host": host, "port": port, "last_check": time.time()}
+                logger.info(f"✅ [MILVUS-POOL] Opened connection '{alias}' to {host}:{port}")
+                return True
+            except Exception as e:
+                logger.error(f"❌ [MILVUS-POOL] Failed to connect '{alias}' to {host}:{port}: {e}")
+                return False
+
+    def get_collection(self, name: str, alias: str = "default", load: bool = True) -> Optional[Collection]:
+        """
+        Get a cached collection handle, loading it into memory once
+
+        Args:
+            name: Collection name
+            alias: Connection name
+            load: Whether the collection should be loaded for search/query
+
+        Returns:
+            Collection handle, or None if it does not exist
+        """
+        key = (alias, name)
+        with self._lock:
+            self._reset_after_fork()
+            collection = self._collections.get(key)
+
+            if collection is None:
+                if not utility.has_collection(name, using=alias):
+                    return None
+                collection = Collection(name, using=alias)
+                self._collections[key] = collection
+
+            if load and key not in self._loaded:
+                collection.load()
+                self._loaded.add(key)
+                logger.info(f"💾 [MILVUS-POOL] Loaded collection '{name}' on '{alias}'")
+
+            return collection
+
+    def register_collection(self, name: str, collection: Collection, alias: str = "default"):
+        """Register a handle for a collection created by the caller"""
+        with self._lock:
+            self._collections[(alias, name)] = collection
+
+    def ensure_loaded(self, name: str, alias: str = "default") -> bool:
+        """Load a registered collection once per process"""
+        return self.get_collection(name, alias=alias, load=True) is not None
+
+    def invalidate_collection(self, name: str, alias: str = "default"):
+        """Forget a collection handle (e.g. after the collection was dropped)"""
+        with self._lock:
+            self._collections.pop((alias, name), None)
+            self._loaded.discard((alias, name))
+
+    def close_all(self):
+        """Close every pooled connection (application shutdown)"""
+        with self._lock:
+            for alias in list(self._connections.keys()):
+                self._drop(alias)
+            logger.info("🔌 [MILVUS-POOL] Closed all pooled connections")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        with self._lock:
+            return {
+                "connections": {
+                    alias: f"{info['host']}:{info['port']}"
+                    for alias, info in self._connections.items()
+                },
+                "collections": [f"{alias}/{name}" for alias, name in self._collections],
+                "loaded": [f"{alias}/{name}" for alias, name in self._loaded],
+            }
+
+
+# Global Milvus connection manager instance
+milvus_manager = MilvusConnectionManager()
@@ -1,46 +1,143 @@
 import os
 import json
-from typing import List, Dict, Any
+import asyncio
+import hashlib
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
 from pymilvus import (
-    connections,
-    utility,
     FieldSchema,
     CollectionSchema,
     DataType,
     Collection,
 )
 from .openai_service import openai_service
+from .milvus_manager import milvus_manager
+from .milvus_index import IndexConfig, get_index_config
+from .file_versions import file_versions
+from .lexical_index import lexical_index, reciprocal_rank_fusion
+from ..core.config import Config
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rows per insert call; keeps large multi-file batches under the gRPC message limit
+_INSERT_BATCH_SIZE = 1000
+# Primary keys per "id in [...]" query/delete expression
+_ID_BATCH_SIZE = 1000
+
 class MilvusService:
-    def __init__(self, host: str = "localhost", port: str = "19530"):
+    def __init__(
+        self,
+        host: str = None,
+        port: str = None,
+        alias: str = "default",
+        collection_name: str = "document_embeddings",
+        index_config: IndexConfig = None
+    ):
         """
         Initialize Milvus service
         
         Args:
-            host: Milvus server host
-            port: Milvus server port
+            host: Milvus server host (defaults to Config.MILVUS_HOST)
+            port: Milvus server port (defaults to Config.MILVUS_PORT)
+            alias: Name of the pooled connection to use
+            collection_name: Collection to operate on
+            index_config: Vector index definition (defaults to the configured one for the collection)
         """
-        self.host = host
-        self.port = port
-        self.collection_name = "document_embeddings"
+        self.host = host or Config.MILVUS_HOST
+        self.port = port or Config.MILVUS_PORT
+        self.alias = alias
+        self.collection_name = collection_name
+        self.index_config = index_config or get_index_config(collection_name)
         # Use OpenAI embeddings instead of sentence transformers
         self.collection = None
+        # Write-buffering state (see bulk_write)
+        self._bulk_depth = 0
+        self._flush_pending = False
         
     def connect(self):
-        """Connect to Milvus server"""
+        """Connect to Milvus server (reuses the process-wide pooled connection)"""
         try:
-            connections.connect("default", host=self.host, port=self.port)
-            logger.info(f"Connected to Milvus at {self.host}:{self.port}")
-            return True
+            if milvus_manager.get_connection(self.alias, host=self.host, port=self.port):
+                logger.debug(f"Using pooled Milvus connection '{self.alias}' at {self.host}:{self.port}")
+                return True
+            return False
         except Exception as e:
             logger.error(f"Failed to connect to Milvus: {e}")
             return False
     
+    def attach_collection(self) -> bool:
+        """
+        Attach to the existing collection using the shared, already-loaded handle
+        
+        Returns:
+            True if the collection exists and is loaded
+        """
+        try:
+            self.collection = milvus_manager.get_collection(self.collection_name, alias=self.alias)
+            if self.collection is None:
+                logger.error(f"Collection '{self.collection_name}' does not exist")
+                return False
+            self._sync_index_config()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to attach collection: {e}")
+            return False
+    
+    def _sync_index_config(self):
+        """Use search parameters matching the index the collection actually has"""
+        try:
+            indexes = self.collection.indexes
+            if not indexes:
+                return
+            actual_type = indexes[0].params.get("index_type", "").upper()
+            if actual_type and actual_type != self.index_config.index_type:
+                logger.warning(
+                    f"⚠️ [MILVUS] Collection '{self.collection_name}' has a {actual_type} index but "
+                    f"{self.index_config.index_type} is configured; using {actual_type} search parameters "
+                    f"until the index is rebuilt"
+                )
+                self.index_config = IndexConfig.preset(
+                    actual_type, metric_type=indexes[0].params.get("metric_type", self.index_config.metric_type)
+                )
+        except Exception as e:
+            logger.debug(f"Could not inspect index of '{self.collection_name}': {e}")
+    
+    def rebuild_index(self, index_config: IndexConfig = None) -> bool:
+        """
+        Drop and recreate the vector index, then reload the collection
+        
+        Args:
+            index_config: New index definition (defaults to the current one)
+            
+        Returns:
+            True if the index was rebuilt and loaded
+        """
+        try:
+            if not self.collection:
+                logger.error("❌ [MILVUS] Collection not initialized")
+                return False
+            
+            index_config = index_config or self.index_config
+            logger.info(f"🏗️ [MILVUS] Rebuilding index on '{self.collection_name}' as {index_config.label()}")
+            
+            self.collection.release()
+            milvus_manager.invalidate_collection(self.collection_name, alias=self.alias)
+            if self.collection.has_index():
+                self.collection.drop_index()
+            self.collection.create_index("embedding", index_config.index_params())
+            
+            milvus_manager.register_collection(self.collection_name, self.collection, alias=self.alias)
+            self.index_config = index_config
+            return self.load_collection()
+            
+        except Exception as e:
+            logger.error(f"💥 [MILVUS] Failed to rebuild index: {e}", exc_info=True)
+            return False
+    
     def create_collection(self, dimension: int = None):
         """
         Create collection for storing document embeddings
@@ -53,10 +150,12 @@ class MilvusService:
             dimension = openai_service.get_embedding_dimension()
             logger.info(f"Using embedding dimension: {dimension} for model: {openai_service.embedding_model}")
         try:
-            # Check if collection exists
-            if utility.has_collection(self.collection_name):
-                logger.info(f"Collection '{self.collection_name}' already exists")
-                self.collection = Collection(self.collection_name)
+            # Reuse the shared handle if the collection already exists
+            existing = milvus_manager.get_collection(self.collection_name, alias=self.alias, load=False)
+            if existing is not None:
+                logger.debug(f"Collection '{self.collection_name}' already exists")
+                self.collection = existing
+                self._sync_index_config()
                 return True
             
             # Define fields
@@ -67,24 +166,23 @@ class MilvusService:
                 FieldSchema(name="content", dtype=DataType.VARCHAR, max_length=8192),
                 FieldSchema(name="title", dtype=DataType.VARCHAR, max_length=512),
                 FieldSchema(name="section", dtype=DataType.VARCHAR, max_length=512),
-                FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=dimension)
+                FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=dimension),
+                # Change detection for incremental re-ingestion (see sync_documents)
+                FieldSchema(name="content_hash", dtype=DataType.VARCHAR, max_length=64),
+                FieldSchema(name="doc_version", dtype=DataType.INT64)
             ]
             
             # Create schema
             schema = CollectionSchema(fields, "Document embeddings for RAG")
             
             # Create collection
-            self.collection = Collection(self.collection_name, schema)
+            self.collection = Collection(self.collection_name, schema, using=self.alias)
+            milvus_manager.register_collection(self.collection_name, self.collection, alias=self.alias)
             logger.info(f"Created collection '{self.collection_name}'")
             
             # Create index for vector field
-            index_params = {
-                "metric_type": "IP",  # Inner Product
-                "index_type": "IVF_FLAT",
-                "params": {"nlist": 128}
-            }
-            self.collection.create_index("embedding", index_params)
-            logger.info("Created index for embedding field")
+            self.collection.create_index("embedding", self.index_config.index_params())
+            logger.info(f"Created {self.index_config.label()} index for embedding field")
             
             return True
             
@@ -93,17 +191,324 @@ class MilvusService:
             return False
     
     def load_collection(self):
-        """Load collection to memory"""
+        """Load collection to memory (once per process, shared across services)"""
         try:
             if self.collection:
-                self.collection.load()
-                logger.info(f"Loaded collection '{self.collection_name}' to memory")
-                return True
+                return milvus_manager.ensure_loaded(self.collection_name, alias=self.alias)
             return False
         except Exception as e:
             logger.error(f"Failed to load collection: {e}")
             return False
     
+    def _flush(self):
+        """Flush now, or defer to the end of the enclosing bulk_write block"""
+        if self._bulk_depth:
+            self._flush_pending = True
+            return
+        self.collection.flush()
+    
+    @contextmanager
+    def bulk_write(self, compact: bool = True):
+        """
+        Buffer writes for a bulk operation
+        
+        Inside the block inserts and deletes do not flush; Milvus's own
+        auto-flush seals segments as they fill up. On exit the collection is
+        flushed once and, optionally, a compaction is scheduled to merge the
+        small segments and purge deleted rows. Blocks may be nested; only the
+        outermost one flushes.
+        
+        Args:
+            compact: Schedule a compaction after the final flush
+        """
+        self._bulk_depth += 1
+        try:
+            yield self
+        finally:
+            self._bulk_depth -= 1
+            if not self._bulk_depth and self._flush_pending and self.collection:
+                self._flush_pending = False
+                try:
+                    self.collection.flush()
+                    logger.info(f"💾 [MILVUS] Flushed buffered writes for '{self.collection_name}'")
+                    if compact:
+                        # Runs asynchronously on the Milvus side
+                        self.collection.compact()
+                        logger.info(f"🧹 [MILVUS] Scheduled compaction for '{self.collection_name}'")
+                except Exception as e:
+                    logger.error(f"💥 [MILVUS] Failed to flush/compact after bulk write: {e}")
+    
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """Hash identifying a chunk's content"""
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+    
+    def _has_field(self, name: str) -> bool:
+        """Whether the collection schema has a field (legacy collections lack newer fields)"""
+        return any(field.name == name for field in self.collection.schema.fields)
+    
+    def _insert_rows(self, documents: List[Dict[str, Any]], embeddings: List[List[float]]):
+        """
+        Insert chunks with precomputed embeddings (no flush)
+        
+        Args:
+            documents: Chunk dictionaries (file_name, chunk_id, content, title, section,
+                       optional doc_version)
+            embeddings: Vectors aligned with documents
+            
+        Returns:
+            Milvus insert result
+        """
+        # Prepare data for insertion - ensure correct data types
+        file_names = []
+        chunk_ids = []
+        contents = []
+        titles = []
+        sections = []
+        embedding_vectors = []
+        
+        for i, doc in enumerate(documents):
+            file_names.append(str(doc["file_name"]))
+            chunk_ids.append(int(doc["chunk_id"]))
+            contents.append(str(doc["content"]))
+            titles.append(str(doc["title"]))
+            sections.append(str(doc["section"]))
+            embedding_vectors.append(embeddings[i])
+            logger.debug(f"📄 [MILVUS] Doc {i}: {doc['file_name']}, chunk {doc['chunk_id']}, content length: {len(doc['content'])}")
+        
+        # Insert data with correct structure (column order follows the schema)
+        data = [file_names, chunk_ids, contents, titles, sections, embedding_vectors]
+        if self._has_field("content_hash"):
+            data.append([self.content_hash(content) for content in contents])
+            data.append([int(doc.get("doc_version", 1)) for doc in documents])
+        
+        return self.collection.insert(data)
+    
+    def _query_file_chunks(self, file_name: str, output_fields: List[str]) -> List[Dict[str, Any]]:
+        """Query every stored chunk of a file"""
+        escaped = file_name.replace("\\", "\\\\").replace('"', '\\"')
+        return self.collection.query(
+            expr=f'file_name == "{escaped}"',
+            output_fields=output_fields,
+            limit=16384
+        )
+    
+    def _plan_sync(self, file_name: str, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Diff a file's new chunk list against what Milvus holds
+        
+        Stored chunks are matched to the new chunks by content hash (as a
+        multiset, preferring the same position).
+        
+        Returns:
+            {"to_embed": [doc], "moved": [(doc, stored_pk)], "stale_ids": [pk],
+             "reused": int, "doc_version": int}
+        """
+        has_hash = self._has_field("content_hash")
+        fields = ["id", "chunk_id", "title", "section"]
+        fields += ["content_hash", "doc_version"] if has_hash else ["content"]
+        existing = self._query_file_chunks(file_name, fields)
+        
+        # Legacy collections: hash the stored content instead
+        for row in existing:
+            if not has_hash:
+                row["content_hash"] = self.content_hash(row.pop("content", ""))
+        
+        doc_version = max((int(row.get("doc_version") or 0) for row in existing), default=0) + 1
+        
+        by_hash: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for row in existing:
+            by_hash[row["content_hash"]].append(row)
+        
+        to_embed, moved, reused = [], [], 0
+        for doc in documents:
+            candidates = by_hash.get(self.content_hash(doc["content"]))
+            if not candidates:
+                to_embed.append({**doc, "doc_version": doc_version})
+                continue
+            
+            match = next((row for row in candidates if row["chunk_id"] == doc["chunk_id"]), candidates[0])
+            candidates.remove(match)
+            
+            if (match["chunk_id"], match["title"], match["section"]) == (doc["chunk_id"], doc["title"], doc["section"]):
+                reused += 1
+            else:
+                moved.append(({**doc, "doc_version": doc_version}, match["id"]))
+        
+        stale_ids = [row["id"] for rows in by_hash.values() for row in rows]
+        
+        logger.info(
+            f"🔁 [MILVUS] Sync {file_name}: {reused} unchanged, {len(moved)} moved, "
+            f"{len(to_embed)} new/changed, {len(stale_ids)} stale"
+        )
+        return {
+            "to_embed": to_embed,
+            "moved": moved,
+            "stale_ids": stale_ids,
+            "reused": reused,
+            "doc_version": doc_version,
+        }
+    
+    def _insert_rows_batched(self, documents: List[Dict[str, Any]], embeddings: List[List[float]]):
+        """Insert rows in slices that stay under the Milvus gRPC message limit (no flush)"""
+        for start in range(0, len(documents), _INSERT_BATCH_SIZE):
+            end = start + _INSERT_BATCH_SIZE
+            self._insert_rows(documents[start:end], embeddings[start:end])
+    
+    def _query_embeddings(self, ids: List[int]) -> Dict[int, List[float]]:
+        """Fetch stored embeddings by primary key, one page of ids per query"""
+        stored = {}
+        for start in range(0, len(ids), _ID_BATCH_SIZE):
+            page = ids[start:start + _ID_BATCH_SIZE]
+            for row in self.collection.query(expr=f"id in {page}", output_fields=["id", "embedding"]):
+                stored[row["id"]] = row["embedding"]
+        return stored
+    
+    def _delete_ids(self, ids: List[int]):
+        """Delete rows by primary key, one page of ids per expression (no flush)"""
+        for start in range(0, len(ids), _ID_BATCH_SIZE):
+            self.collection.delete(f"id in {ids[start:start + _ID_BATCH_SIZE]}")
+    
+    def _embed_documents(self, documents: List[Dict[str, Any]]) -> List[Optional[List[float]]]:
+        """
+        Embed document contents, retrying only the texts whose batch failed
+        
+        Returns:
+            Embeddings aligned with documents, None where a chunk could not be embedded
+        """
+        texts = [doc["content"] for doc in documents]
+        embeddings = openai_service.get_embeddings(texts, partial=True)
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            # Embedded texts are cached by now, so only the failed ones are sent again
+            logger.warning(f"⚠️ [MILVUS] Retrying embeddings for {len(missing)}/{len(texts)} chunks")
+            retried = openai_service.get_embeddings([texts[i] for i in missing], partial=True)
+            for i, embedding in zip(missing, retried):
+                embeddings[i] = embedding
+        return embeddings
+    
+    def sync_files(self, files: Dict[str, List[Dict[str, Any]]]) -> Optional[Dict[str, Optional[Dict[str, int]]]]:
+        """
+        Incrementally re-ingest several files in one write stage
+        
+        Every file is diffed against Milvus first; then all new/changed chunks
+        are embedded in a single batched embeddings call, inserted together,
+        stale chunks of every file are deleted with one expression and the
+        collection is flushed once.
+        
+        A matched chunk whose position/metadata changed is re-inserted with its
+        stored embedding, so only genuinely new content is sent to the
+        embeddings API.
+        
+        Embedding happens before any write. A file with chunks that still cannot
+        be embedded after a retry is left as stored; the other files are synced.
+        
+        Args:
+            files: {file_name: full new chunk list for the file (file_name,
+                   chunk_id, content, title, section)}
+            
+        Returns:
+            {file_name: {"inserted", "reused", "moved", "deleted", "doc_version"}}
+            with None for files that could not be embedded, or None on failure
+        """
+        try:
+            if not self.collection:
+                logger.error("❌ [MILVUS] Collection not initialized")
+                return None
+            
+            self.load_collection()
+            
+            plans = {name: self._plan_sync(name, documents) for name, documents in files.items()}
+            
+            # Fetch moved embeddings before writing anything; a row that vanished
+            # since planning (e.g. a concurrent delete) is re-embedded instead
+            moved_ids = [pk for plan in plans.values() for _, pk in plan["moved"]]
+            stored = self._query_embeddings(moved_ids) if moved_ids else {}
+            for name, plan in plans.items():
+                missing = [doc for doc, pk in plan["moved"] if pk not in stored]
+                if missing:
+                    logger.warning(f"⚠️ [MILVUS] {len(missing)} moved chunk(s) of {name} no longer stored, re-embedding")
+                    plan["to_embed"] += missing
+                    plan["moved"] = [(doc, pk) for doc, pk in plan["moved"] if pk in stored]
+            
+            # Embed every file's new chunks in one call before writing anything
+            pending = [doc for plan in plans.values() for doc in plan["to_embed"]]
+            if pending:
+                logger.info(f"🤖 [MILVUS] Embedding {len(pending)} chunks from {len(files)} file(s)")
+            vectors = iter(self._embed_documents(pending) if pending else [])
+            for plan in plans.values():
+                plan["embeddings"] = [next(vectors) for _ in plan["to_embed"]]
+            
+            failed = [name for name, plan in plans.items() if any(e is None for e in plan["embeddings"])]
+            for name in failed:
+                logger.error(f"❌ [MILVUS] Could not embed every chunk of {name}, keeping its stored chunks")
+                del plans[name]
+            
+            to_embed = [doc for plan in plans.values() for doc in plan["to_embed"]]
+            embeddings = [e for plan in plans.values() for e in plan["embeddings"]]
+            moved = [item for plan in plans.values() for item in plan["moved"]]
+            delete_ids = [pk for plan in plans.values() for pk in plan["stale_ids"]]
+            delete_ids += [pk for _, pk in moved]
+            
+            changed = [
+                name for name, plan in plans.items()
+                if plan["to_embed"] or plan["moved"] or plan["stale_ids"]
+            ]
+            results = {
+                name: {
+                    "inserted": len(plan["to_embed"]),
+                    "reused": plan["reused"],
+                    "moved": len(plan["moved"]),
+                    "deleted": len(plan["stale_ids"]),
+                    "doc_version": plan["doc_version"] if name in changed else plan["doc_version"] - 1,
+                }
+                for name, plan in plans.items()
+            }
+            results.update({name: None for name in failed})
+            
+            if not changed:
+                return results
+            
+            # Insert before deleting so readers never see a file without content
+            if to_embed:
+                self._insert_rows_batched(to_embed, embeddings)
+            
+            if moved:
+                self._insert_rows_batched([doc for doc, _ in moved], [stored[pk] for _, pk in moved])
+            
+            if delete_ids:
+                self._delete_ids(delete_ids)
+            
+            self._flush()
+            
+            # Invalidate cached answers built from these files
+            file_versions.bump(changed)
+            
+            logger.info(f"🎉 [MILVUS] Synced {len(changed)} changed file(s) of {len(files)}")
+            return results
+            
+        except Exception as e:
+            logger.error(f"💥 [MILVUS] Failed to sync documents for {len(files)} file(s): {e}", exc_info=True)
+            return None
+    
+    def sync_documents(self, file_name: str, documents: List[Dict[str, Any]]) -> Optional[Dict[str, int]]:
+        """
+        Incrementally re-ingest a file: only new or changed chunks are embedded
+        and inserted, and stale chunks are deleted in one batch
+        
+        Args:
+            file_name: File being re-ingested
+            documents: Full new chunk list for the file (file_name, chunk_id,
+                       content, title, section)
+            
+        Returns:
+            Counts {"inserted", "reused", "moved", "deleted", "doc_version"},
+            or None on failure
+        """
+        results = self.sync_files({file_name: documents})
+        return results[file_name] if results is not None else None
+    
     def insert_documents(self, documents: List[Dict[str, Any]]):
         """
         Insert documents into Milvus
@@ -127,41 +532,27 @@ class MilvusService:
             
             # Generate embeddings using OpenAI
             logger.info(f"🤖 [MILVUS] Generating embeddings using OpenAI...")
-            embeddings = openai_service.get_embeddings(texts)
+            embeddings = self._embed_documents(documents)
             
-            if not embeddings:
-                logger.error("❌ [MILVUS] Failed to generate embeddings")
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            if missing:
+                logger.error(
+                    f"❌ [MILVUS] Failed to generate embeddings for {len(missing)}/{len(texts)} chunks "
+                    f"(indices {missing[:20]})"
+                )
                 return False
             
             logger.info(f"✅ [MILVUS] Generated {len(embeddings)} embeddings")
             logger.info(f"📊 [MILVUS] Embedding dimension: {len(embeddings[0]) if embeddings else 'Unknown'}")
             
-            # Prepare data for insertion - ensure correct data types
-            file_names = []
-            chunk_ids = []
-            contents = []
-            titles = []
-            sections = []
-            embedding_vectors = []
-            
-            logger.info(f"🔧 [MILVUS] Preparing data for insertion...")
-            for i, doc in enumerate(documents):
-                file_names.append(str(doc["file_name"]))
-                chunk_ids.append(int(doc["chunk_id"]))
-                contents.append(str(doc["content"]))
-                titles.append(str(doc["title"]))
-                sections.append(str(doc["section"]))
-                embedding_vectors.append(embeddings[i])
-                logger.debug(f"📄 [MILVUS] Doc {i}: {doc['file_name']}, chunk {doc['chunk_id']}, content length: {len(doc['content'])}")
-            
-            # Insert data with correct structure
-            data = [file_names, chunk_ids, contents, titles, sections, embedding_vectors]
+            # Insert data
             logger.info(f"💾 [MILVUS] Inserting data into collection...")
+            insert_result = self._insert_rows(documents, embeddings)
+            logger.info(f"✅ [MILVUS] Data inserted")
+            self._flush()
             
-            # Insert data
-            insert_result = self.collection.insert(data)
-            logger.info(f"✅ [MILVUS] Data inserted, flushing collection...")
-            self.collection.flush()
+            # Invalidate cached answers built from these files
+            file_versions.bump(doc["file_name"] for doc in documents)
             
             logger.info(f"🎉 [MILVUS] Successfully inserted {len(documents)} documents")
             logger.info(f"🔑 [MILVUS] Primary keys sample: {insert_result.primary_keys[:5]}...")
@@ -194,13 +585,8 @@ class MilvusService:
             
             logger.info(f"📋 [MILVUS] Fetching chunks with limit={limit}, offset={offset}")
             
-            # Load collection to ensure data is available
-            logger.info("🔄 [MILVUS] Loading collection...")
-            self.collection.load()
-            
-            # Wait a moment for loading to complete
-            import time
-            time.sleep(1)
+            # Ensure collection is loaded (no-op if already loaded in this process)
+            self.load_collection()
             
             # Get total count
             total_count = self.collection.num_entities
@@ -312,8 +698,7 @@ class MilvusService:
             logger.info(f"📋 [MILVUS] Fetching chunks for file: {file_name}")
             
             # Load collection if needed
-            if not self.collection.is_loaded:
-                self.collection.load()
+            self.load_collection()
             
             # Query chunks for specific file
             results = self.collection.query(
@@ -365,11 +750,7 @@ class MilvusService:
             logger.info(f"🗑️ [MILVUS] Deleting chunks for file: {file_name}")
             
             # Load collection if needed
-            logger.info("🔄 [MILVUS] Loading collection for deletion...")
-            self.collection.load()
-            
-            import time
-            time.sleep(1)  # Wait for loading
+            self.load_collection()
             
             # Get collection schema to identify primary key field
             primary_key_field = None
@@ -452,7 +833,6 @@ class MilvusService:
                     # Delete batch using the identified primary key field
                     delete_expr_pk = f"{pk_field} in {batch_pks}"
                     delete_result = self.collection.delete(delete_expr_pk)
-                    self.collection.flush()
                     
                     total_deleted += len(batch_pks)
                     logger.info(f"✅ [MILVUS] Deleted batch {i//batch_size + 1}: {len(batch_pks)} chunks")
@@ -461,6 +841,13 @@ class MilvusService:
                     logger.error(f"💥 [MILVUS] Failed to delete batch {i//batch_size + 1}: {e}")
                     # Continue with next batch
             
+            if total_deleted:
+                # One flush for all batches (deferred inside bulk_write)
+                self._flush()
+                
+                # Invalidate cached answers built from this file
+                file_versions.bump([file_name])
+            
             logger.info(f"🎉 [MILVUS] Successfully deleted {total_deleted} chunks for file: {file_name}")
             return total_deleted > 0
             
@@ -480,14 +867,49 @@ class MilvusService:
                 return 0
             
             # Load collection if needed
-            if not self.collection.is_loaded:
-                self.collection.load()
+            self.load_collection()
             
             return self.collection.num_entities
         except Exception as e:
             logger.error(f"💥 [MILVUS] Failed to get collection stats: {e}")
             return 0
     
+    def _search_by_vector(self, query_embedding: List[float], top_k: int) -> List[Dict]:
+        """
+        Run a vector search for an already computed query embedding
+        
+        Args:
+            query_embedding: Query vector
+            top_k: Number of top results to return
+            
+        Returns:
+            List of similar documents with metadata
+        """
+        # Perform search
+        results = self.collection.search(
+            data=[query_embedding],
+            anns_field="embedding",
+            param=self.index_config.search_param(top_k),
+            limit=top_k,
+            output_fields=["file_name", "chunk_id", "content", "title", "section"]
+        )
+        
+        # Format results
+        formatted_results = []
+        for hits in results:
+            for hit in hits:
+                formatted_results.append({
+                    "id": hit.id,
+                    "score": hit.score,
+                    "file_name": hit.entity.get("file_name"),
+                    "chunk_id": hit.entity.get("chunk_id"),
+                    "content": hit.entity.get("content"),
+                    "title": hit.entity.get("title"),
+                    "section": hit.entity.get("section")
+                })
+        
+        return formatted_results
+    
     def search_similar(self, query: str, top_k: int = 5) -> List[Dict]:
         """
         Search for similar documents
@@ -511,36 +933,159 @@ class MilvusService:
                 logger.error("Failed to generate query embedding")
                 return []
             
-            # Search parameters
-            search_params = {
-                "metric_type": "IP",
-                "params": {"nprobe": 10}
-            }
+            return self._search_by_vector(query_embedding, top_k)
             
-            # Perform search
-            results = self.collection.search(
-                data=[query_embedding],
-                anns_field="embedding",
-                param=search_params,
-                limit=top_k,
-                output_fields=["file_name", "chunk_id", "content", "title", "section"]
+        except Exception as e:
+            logger.error(f"Failed to search: {e}")
+            return []
+    
+    async def asearch_similar(self, query: str, top_k: int = 5) -> List[Dict]:
+        """
+        Async variant of search_similar that keeps the event loop free
+        
+        The query embedding uses the async OpenAI client; the blocking Milvus
+        gRPC search runs in a worker thread.
+        
+        Args:
+            query: Search query
+            top_k: Number of top results to return
+            
+        Returns:
+            List of similar documents with metadata
+        """
+        try:
+            if not self.collection:
+                logger.error("Collection not initialized")
+                return []
+            
+            query_embedding = await openai_service.aget_embedding(query)
+            
+            if not query_embedding:
+                logger.error("Failed to generate query embedding")
+                return []
+            
+            return await asyncio.to_thread(self._search_by_vector, query_embedding, top_k)
+            
+        except Exception as e:
+            logger.error(f"Failed to search: {e}")
+            return []
+    
+    def _hybrid_search_by_vector(self, query: str, query_embedding: List[float], top_k: int) -> List[Dict]:
+        """
+        Fuse dense vector and BM25 results with reciprocal rank fusion
+        
+        Results keep the dense similarity as "score" (so confidence thresholds
+        still apply) and carry "rrf_score"/"lexical_score"; lexical-only hits get
+        the same score computed from the stored embeddings with the index metric.
+        
+        Args:
+            query: Search query (for the lexical leg)
+            query_embedding: Query vector (for the dense leg)
+            top_k: Number of fused results to return
+            
+        Returns:
+            List of documents with metadata, best first
+        """
+        candidates = max(top_k, Config.HYBRID_CANDIDATES)
+        
+        dense = self._search_by_vector(query_embedding, candidates)
+        
+        lexical_index.refresh(self.collection)
+        lexical = lexical_index.search(query, candidates)
+        lexical_scores = dict(lexical)
+        
+        fused = reciprocal_rank_fusion(
+            [[doc["id"] for doc in dense], [pk for pk, _ in lexical]],
+            k=Config.RRF_K
+        )[:top_k]
+        
+        by_id = {doc["id"]: doc for doc in dense}
+        missing = [pk for pk, _ in fused if pk not in by_id]
+        if missing:
+            rows = self.collection.query(
+                expr=f"id in {missing}",
+                output_fields=["id", "file_name", "chunk_id", "content", "title", "section", "embedding"]
             )
+            scores = self.index_config.score(query_embedding, [row["embedding"] for row in rows]) if rows else []
+            for row, score in zip(rows, scores):
+                by_id[row["id"]] = {
+                    "id": row["id"],
+                    "score": float(score),
+                    "file_name": row.get("file_name"),
+                    "chunk_id": row.get("chunk_id"),
+                    "content": row.get("content"),
+                    "title": row.get("title"),
+                    "section": row.get("section")
+                }
+        
+        results = []
+        for pk, rrf_score in fused:
+            doc = by_id.get(pk)
+            if doc is None:
+                continue  # Deleted since the lexical index was refreshed
+            results.append({
+                **doc,
+                "rrf_score": rrf_score,
+                "lexical_score": lexical_scores.get(pk, 0.0)
+            })
+        
+        logger.info(
+            f"🔀 [MILVUS] Hybrid search: {len(dense)} dense + {len(lexical)} lexical candidates, "
+            f"{len(missing)} lexical-only in top {len(results)}"
+        )
+        return results
+    
+    def search_hybrid(self, query: str, top_k: int = 5) -> List[Dict]:
+        """
+        Search with dense vectors and BM25 fused by reciprocal rank fusion
+        
+        Args:
+            query: Search query
+            top_k: Number of top results to return
             
-            # Format results
-            formatted_results = []
-            for hits in results:
-                for hit in hits:
-                    formatted_results.append({
-                        "id": hit.id,
-                        "score": hit.score,
-                        "file_name": hit.entity.get("file_name"),
-                        "chunk_id": hit.entity.get("chunk_id"),
-                        "content": hit.entity.get("content"),
-                        "title": hit.entity.get("title"),
-                        "section": hit.entity.get("section")
-                    })
-            
-            return formatted_results
+        Returns:
+            List of similar documents with metadata
+        """
+        try:
+            if not self.collection:
+                logger.error("Collection not initialized")
+                return []
+            
+            query_embedding = openai_service.get_embedding(query)
+            
+            if not query_embedding:
+                logger.error("Failed to generate query embedding")
+                return []
+            
+            return self._hybrid_search_by_vector(query, query_embedding, top_k)
+            
+        except Exception as e:
+            logger.error(f"Failed to search: {e}")
+            return []
+    
+    async def asearch_hybrid(self, query: str, top_k: int = 5) -> List[Dict]:
+        """
+        Async variant of search_hybrid
+        
+        Args:
+            query: Search query
+            top_k: Number of top results to return
+            
+        Returns:
+            List of similar documents with metadata
+        """
+        try:
+            if not self.collection:
+                logger.error("Collection not initialized")
+                return []
+            
+            query_embedding = await openai_service.aget_embedding(query)
+            
+            if not query_embedding:
+                logger.error("Failed to generate query embedding")
+                return []
+            
+            return await asyncio.to_thread(self._hybrid_search_by_vector, query, query_embedding, top_k)
             
         except Exception as e:
             logger.error(f"Failed to search: {e}")
@@ -559,9 +1104,6 @@ class MilvusService:
             return 0
     
     def disconnect(self):
-        """Disconnect from Milvus"""
-        try:
-            connections.disconnect("default")
-            logger.info("Disconnected from Milvus")
-        except Exception as e:
-            logger.error(f"Failed to disconnect: {e}")
+        """Release this service's collection handle; the pooled connection stays open"""
+        self.collection = None
+        logger.debug(f"Released pooled Milvus connection '{self.alias}'")
@@ -5,15 +5,20 @@ Direct integration with OpenAI API for embeddings and chat completions.
 """
 
 import os
+import time
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, AsyncIterator
+from openai import OpenAI, AsyncOpenAI, BadRequestError, AuthenticationError
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 from ..core.config import Config
+from .embedding_cache import EmbeddingCache
+from ..utils.tokenizer import count_tokens, truncate_to_tokens
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -30,8 +35,20 @@ class OpenAIService:
         self.max_tokens = Config.OPENAI_MAX_TOKENS
         self.timeout = Config.OPENAI_TIMEOUT
         
-        # Initialize OpenAI client
+        # Embedding batching parameters
+        self.embedding_batch_tokens = Config.OPENAI_EMBEDDING_BATCH_TOKENS
+        self.embedding_batch_size = Config.OPENAI_EMBEDDING_BATCH_SIZE
+        self.embedding_max_input_tokens = Config.OPENAI_EMBEDDING_MAX_INPUT_TOKENS
+        self.embedding_workers = Config.OPENAI_EMBEDDING_WORKERS
+        self.embedding_max_retries = Config.OPENAI_EMBEDDING_MAX_RETRIES
+        self.embedding_retry_backoff = Config.OPENAI_EMBEDDING_RETRY_BACKOFF
+        
+        # Content-addressed embedding cache (only misses go to the API)
+        self.embedding_cache = EmbeddingCache() if Config.EMBEDDING_CACHE_ENABLED else None
+        
+        # Initialize OpenAI clients (sync for workers/scripts, async for the API event loop)
         self.client = None
+        self.async_client = None
         self.enabled = False
         
         self._setup_client()
@@ -47,6 +64,10 @@ class OpenAIService:
                 api_key=self.api_key,
                 timeout=self.timeout
             )
+            self.async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                timeout=self.timeout
+            )
             
             # Test connection
             self._test_connection()
@@ -73,35 +94,195 @@ class OpenAIService:
             logger.warning(f"OpenAI API connection test failed: {e}")
             raise e
     
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def _build_embedding_batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Split texts into request batches by token budget and input count
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            List of batches, each a list of indices into texts
+        """
+        batches = []
+        current = []
+        current_tokens = 0
+        
+        for i, text in enumerate(texts):
+            tokens = min(count_tokens(text, self.embedding_model), self.embedding_max_input_tokens)
+            if current and (
+                current_tokens + tokens > self.embedding_batch_tokens
+                or len(current) >= self.embedding_batch_size
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(i)
+            current_tokens += tokens
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    def _embed_batch(self, batch_texts: List[str], batch_num: int) -> List[List[float]]:
+        """
+        Embed one batch, retrying transient failures with exponential backoff
+        
+        Args:
+            batch_texts: Texts in this batch
+            batch_num: Batch number for logging
+            
+        Returns:
+            Embedding vectors in batch order
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self.client.embeddings.create(
+                    model=self.embedding_model,
+                    input=batch_texts
+                )
+                return [data.embedding for data in sorted(response.data, key=lambda d: d.index)]
+            except (BadRequestError, AuthenticationError):
+                # Retrying will not fix a malformed request or a bad key
+                raise
+            except Exception as e:
+                attempt += 1
+                if attempt > self.embedding_max_retries:
+                    raise
+                delay = self.embedding_retry_backoff * (2 ** (attempt - 1))
+                logger.warning(f"⚠️ [OPENAI] Embedding batch {batch_num} failed ({e}), retry {attempt}/{self.embedding_max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+    
+    def _embed_texts(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embed texts in token-bounded batches dispatched concurrently
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            List aligned with texts, None where the batch failed after retries
+        """
+        texts = [
+            truncate_to_tokens(text, self.embedding_max_input_tokens, self.embedding_model)
+            for text in texts
+        ]
+        batches = self._build_embedding_batches(texts)
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        
+        logger.info(f"📦 [OPENAI] Dispatching {len(batches)} embedding batches with up to {self.embedding_workers} workers")
+        
+        max_workers = max(1, min(self.embedding_workers, len(batches)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embedding") as executor:
+            futures = {
+                executor.submit(self._embed_batch, [texts[i] for i in batch], batch_num): batch_num
+                for batch_num, batch in enumerate(batches, 1)
+            }
+            for future in as_completed(futures):
+                batch_num = futures[future]
+                batch = batches[batch_num - 1]
+                try:
+                    for i, embedding in zip(batch, future.result()):
+                        embeddings[i] = embedding
+                except Exception as e:
+                    logger.error(f"❌ [OPENAI] Embedding batch {batch_num} failed after retries: {e}")
+        
+        return embeddings
+    
+    def _lookup_cached(self, texts: List[str]) -> tuple:
+        """
+        Look up texts in the embedding cache
+        
+        Returns:
+            Tuple of (embeddings aligned with texts with None for misses,
+            {miss text: [indices]} with duplicate misses collapsed)
+        """
+        if self.embedding_cache:
+            embeddings = self.embedding_cache.get_many(self.embedding_model, texts)
+        else:
+            embeddings = [None] * len(texts)
+        
+        # Deduplicate misses so repeated chunks are embedded once
+        miss_indices: Dict[str, List[int]] = {}
+        for i, embedding in enumerate(embeddings):
+            if embedding is None:
+                miss_indices.setdefault(texts[i], []).append(i)
+        
+        logger.info(f"🗃️ [OPENAI] Embedding cache: {len(texts) - sum(len(v) for v in miss_indices.values())} hits, {len(miss_indices)} unique misses")
+        return embeddings, miss_indices
+    
+    def _merge_misses(
+        self,
+        embeddings: List[Optional[List[float]]],
+        miss_indices: Dict[str, List[int]],
+        miss_embeddings: List[Optional[List[float]]]
+    ) -> int:
+        """
+        Fill embedded misses into the result and cache the successful ones
+        
+        Returns:
+            Number of miss texts that could not be embedded
+        """
+        miss_texts = list(miss_indices.keys())
+        for text, embedding in zip(miss_texts, miss_embeddings):
+            for i in miss_indices[text]:
+                embeddings[i] = embedding
+        
+        # Cache successful batches even if others failed, so a retry only pays for the rest
+        succeeded = [(t, e) for t, e in zip(miss_texts, miss_embeddings) if e is not None]
+        if self.embedding_cache and succeeded:
+            self.embedding_cache.set_many(
+                self.embedding_model,
+                [t for t, _ in succeeded],
+                [e for _, e in succeeded]
+            )
+        
+        return len(miss_texts) - len(succeeded)
+    
+    def _log_miss_stats(self, miss_texts: List[str]):
+        """Log statistics for texts about to be sent to the API"""
+        total_chars = sum(len(text) for text in miss_texts)
+        avg_chars = total_chars / len(miss_texts)
+        logger.info(f"📊 [OPENAI] Text stats: {total_chars} total chars, {avg_chars:.0f} avg chars per text")
+        logger.info(f"🔧 [OPENAI] Using model: {self.embedding_model}")
+    
+    def get_embeddings(self, texts: List[str], partial: bool = False) -> List[Optional[List[float]]]:
         """
         Get embeddings for a list of texts
         
+        Cached vectors are served from the embedding cache. Cache misses are
+        split into token-bounded batches and sent concurrently; output order
+        always matches input order.
+        
         Args:
             texts: List of text strings to embed
+            partial: Return what could be embedded instead of nothing when a batch fails
             
         Returns:
-            List of embedding vectors
+            List of embedding vectors (empty list if any batch failed); with
+            partial=True always aligned with texts, None where a text could not be
+            embedded (the others are cached, so retrying the missing texts is cheap)
         """
         logger.info(f"🤖 [OPENAI] Starting embedding generation for {len(texts)} texts")
         
         if not self.enabled:
             logger.error("❌ [OPENAI] OpenAI service is not enabled")
-            return []
+            return [None] * len(texts) if partial else []
         
         try:
-            # Log text stats
-            total_chars = sum(len(text) for text in texts)
-            avg_chars = total_chars / len(texts) if texts else 0
-            logger.info(f"📊 [OPENAI] Text stats: {total_chars} total chars, {avg_chars:.0f} avg chars per text")
-            logger.info(f"🔧 [OPENAI] Using model: {self.embedding_model}")
+            embeddings, miss_indices = self._lookup_cached(texts)
             
-            response = self.client.embeddings.create(
-                model=self.embedding_model,
-                input=texts
-            )
+            if miss_indices:
+                miss_texts = list(miss_indices.keys())
+                self._log_miss_stats(miss_texts)
+                
+                failed = self._merge_misses(embeddings, miss_indices, self._embed_texts(miss_texts))
+                if failed:
+                    logger.error(f"❌ [OPENAI] {failed}/{len(miss_texts)} texts could not be embedded")
+                    return embeddings if partial else []
             
-            embeddings = [data.embedding for data in response.data]
             logger.info(f"✅ [OPENAI] Generated {len(embeddings)} embeddings successfully")
             logger.info(f"📏 [OPENAI] Embedding dimension: {len(embeddings[0]) if embeddings else 'Unknown'}")
             
@@ -109,7 +290,97 @@ class OpenAIService:
             
         except Exception as e:
             logger.error(f"💥 [OPENAI] Error generating embeddings: {e}", exc_info=True)
-            return []
+            return [None] * len(texts) if partial else []
+    
+    async def _aembed_batch(self, batch_texts: List[str], batch_num: int) -> List[List[float]]:
+        """Async variant of _embed_batch using the AsyncOpenAI client"""
+        attempt = 0
+        while True:
+            try:
+                response = await self.async_client.embeddings.create(
+                    model=self.embedding_model,
+                    input=batch_texts
+                )
+                return [data.embedding for data in sorted(response.data, key=lambda d: d.index)]
+            except (BadRequestError, AuthenticationError):
+                raise
+            except Exception as e:
+                attempt += 1
+                if attempt > self.embedding_max_retries:
+                    raise
+                delay = self.embedding_retry_backoff * (2 ** (attempt - 1))
+                logger.warning(f"⚠️ [OPENAI] Embedding batch {batch_num} failed ({e}), retry {attempt}/{self.embedding_max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+    
+    async def _aembed_texts(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Async variant of _embed_texts; concurrency is bounded by a semaphore"""
+        texts = [
+            truncate_to_tokens(text, self.embedding_max_input_tokens, self.embedding_model)
+            for text in texts
+        ]
+        batches = self._build_embedding_batches(texts)
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        semaphore = asyncio.Semaphore(max(1, self.embedding_workers))
+        
+        async def run_batch(batch_num: int, batch: List[int]):
+            async with semaphore:
+                try:
+                    vectors = await self._aembed_batch([texts[i] for i in batch], batch_num)
+                except Exception as e:
+                    logger.error(f"❌ [OPENAI] Embedding batch {batch_num} failed after retries: {e}")
+                    return
+            for i, embedding in zip(batch, vectors):
+                embeddings[i] = embedding
+        
+        await asyncio.gather(*(run_batch(n, b) for n, b in enumerate(batches, 1)))
+        return embeddings
+    
+    async def aget_embeddings(self, texts: List[str], partial: bool = False) -> List[Optional[List[float]]]:
+        """
+        Async variant of get_embeddings for use on the event loop
+        
+        Args:
+            texts: List of text strings to embed
+            partial: Return what could be embedded instead of nothing when a batch fails
+            
+        Returns:
+            List of embedding vectors (empty list if any batch failed); with
+            partial=True aligned with texts, None where a text could not be embedded
+        """
+        if not self.enabled:
+            logger.error("❌ [OPENAI] OpenAI service is not enabled")
+            return [None] * len(texts) if partial else []
+        
+        try:
+            # Cache tiers may do network or disk I/O, keep them off the event loop
+            embeddings, miss_indices = await asyncio.to_thread(self._lookup_cached, texts)
+            
+            if miss_indices:
+                miss_texts = list(miss_indices.keys())
+                miss_embeddings = await self._aembed_texts(miss_texts)
+                failed = await asyncio.to_thread(self._merge_misses, embeddings, miss_indices, miss_embeddings)
+                if failed:
+                    logger.error(f"❌ [OPENAI] {failed}/{len(miss_texts)} texts could not be embedded")
+                    return embeddings if partial else []
+            
+            return embeddings
+            
+        except Exception as e:
+            logger.error(f"💥 [OPENAI] Error generating embeddings: {e}", exc_info=True)
+            return [None] * len(texts) if partial else []
+    
+    async def aget_embedding(self, text: str) -> List[float]:
+        """
+        Async variant of get_embedding
+        
+        Args:
+            text: Text string to embed
+            
+        Returns:
+            Embedding vector
+        """
+        embeddings = await self.aget_embeddings([text])
+        return embeddings[0] if embeddings else []
     
     def get_embedding(self, text: str) -> List[float]:
         """
@@ -124,6 +395,16 @@ class OpenAIService:
         embeddings = self.get_embeddings([text])
         return embeddings[0] if embeddings else []
     
+    def _chat_params(self, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        """Merge default chat parameters with provided kwargs"""
+        return {
+            "model": self.chat_model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            **kwargs
+        }
+    
     def chat_completion(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """
         Generate chat completion
@@ -140,16 +421,7 @@ class OpenAIService:
             return "OpenAI service is not available."
         
         try:
-            # Merge default parameters with provided kwargs
-            params = {
-                "model": self.chat_model,
-                "messages": messages,
-                "temperature": self.temperature,
-                "max_tokens": self.max_tokens,
-                **kwargs
-            }
-            
-            response = self.client.chat.completions.create(**params)
+            response = self.client.chat.completions.create(**self._chat_params(messages, **kwargs))
             
             content = response.choices[0].message.content
             logger.info(f"Generated chat completion with {len(content)} characters")
@@ -159,6 +431,75 @@ class OpenAIService:
             logger.error(f"Error generating chat completion: {e}")
             return f"Error generating response: {str(e)}"
     
+    async def achat_completion(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """
+        Async variant of chat_completion using the AsyncOpenAI client
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            **kwargs: Additional parameters for the API call
+            
+        Returns:
+            Generated response text
+            
+        Raises:
+            RuntimeError: If the service is not enabled
+            Exception: The API error when the completion fails (unlike chat_completion,
+                no error text is returned, so it cannot be mistaken for an answer)
+        """
+        if not self.enabled:
+            logger.error("OpenAI service is not enabled")
+            raise RuntimeError("OpenAI service is not available")
+        
+        try:
+            response = await self.async_client.chat.completions.create(**self._chat_params(messages, **kwargs))
+            
+            content = response.choices[0].message.content
+            logger.info(f"Generated chat completion with {len(content)} characters")
+            return content
+            
+        except Exception as e:
+            logger.error(f"Error generating chat completion: {e}")
+            raise
+    
+    async def astream_chat_completion(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """
+        Stream a chat completion token by token using the AsyncOpenAI client
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            **kwargs: Additional parameters for the API call
+            
+        Yields:
+            Content deltas as they arrive
+            
+        Raises:
+            RuntimeError: If the service is not enabled
+            Exception: The API error when the stream fails (after any deltas already yielded)
+        """
+        if not self.enabled:
+            logger.error("OpenAI service is not enabled")
+            raise RuntimeError("OpenAI service is not available")
+        
+        total_chars = 0
+        try:
+            stream = await self.async_client.chat.completions.create(
+                **self._chat_params(messages, stream=True, **kwargs)
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    total_chars += len(delta)
+                    yield delta
+            
+            logger.info(f"Streamed chat completion with {total_chars} characters")
+            
+        except Exception as e:
+            logger.error(f"Error streaming chat completion: {e}")
+            raise
+    
     def get_embedding_dimension(self) -> int:
         """
         Get the dimension of embeddings for the current model
@@ -181,7 +522,8 @@ class OpenAIService:
             "embedding_model": self.embedding_model,
             "chat_model": self.chat_model,
             "embedding_dimension": self.get_embedding_dimension(),
-            "api_key_configured": bool(self.api_key)
+            "api_key_configured": bool(self.api_key),
+            "embedding_cache": self.embedding_cache.get_stats() if self.embedding_cache else {"enabled": False}
         }
 
 
@@ -5,9 +5,11 @@ Combines Milvus vector search with Azure OpenAI for intelligent Q&A
 
 import os
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Awaitable
 from .milvus_service import MilvusService
 from .openai_service import openai_service
+from ..core.config import Config
+from ..utils.tokenizer import count_tokens
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,21 +27,26 @@ class RAGService:
         
         # RAG parameters
         self.top_k = 5  # Number of documents to retrieve
+        self.retrieval_mode = Config.RETRIEVAL_MODE  # "dense" or "hybrid"
         self.max_context_length = 4000  # Maximum context characters
+        # With token-based chunking the context is budgeted in chat-model tokens instead
+        self.max_context_tokens = (
+            Config.RAG_CONTEXT_MAX_TOKENS if Config.CHUNK_LENGTH_UNIT == "tokens" else None
+        )
         
 
     
     def connect_milvus(self) -> bool:
         """Connect to Milvus vector database"""
         try:
-            if self.milvus.connect():
-                # Load collection
-                from pymilvus import Collection
-                self.milvus.collection = Collection("document_embeddings")
-                if self.milvus.load_collection():
-                    self.milvus_connected = True
+            # Cheap after the first call: the connection and loaded collection are pooled
+            if self.milvus.connect() and self.milvus.attach_collection():
+                if not self.milvus_connected:
                     logger.info("Connected to Milvus successfully")
-                    return True
+                self.milvus_connected = True
+                return True
+            
+            self.milvus_connected = False
             
             logger.error("Failed to connect to Milvus")
             return False
@@ -48,13 +55,19 @@ class RAGService:
             logger.error(f"Error connecting to Milvus: {e}")
             return False
     
-    def retrieve_documents(self, query: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    def retrieve_documents(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        mode: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant documents from Milvus
         
         Args:
             query: User question/query
             top_k: Number of documents to retrieve
+            mode: "dense" or "hybrid" (defaults to Config.RETRIEVAL_MODE)
             
         Returns:
             List of relevant documents with metadata
@@ -66,7 +79,45 @@ class RAGService:
         k = top_k or self.top_k
         
         try:
-            results = self.milvus.search_similar(query, top_k=k)
+            if (mode or self.retrieval_mode) == "hybrid":
+                results = self.milvus.search_hybrid(query, top_k=k)
+            else:
+                results = self.milvus.search_similar(query, top_k=k)
+            logger.info(f"Retrieved {len(results)} documents for query: {query}")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error retrieving documents: {e}")
+            return []
+    
+    async def aretrieve_documents(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        mode: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async variant of retrieve_documents
+        
+        Args:
+            query: User question/query
+            top_k: Number of documents to retrieve
+            mode: "dense" or "hybrid" (defaults to Config.RETRIEVAL_MODE)
+            
+        Returns:
+            List of relevant documents with metadata
+        """
+        if not self.milvus_connected:
+            logger.error("Milvus not connected")
+            return []
+        
+        k = top_k or self.top_k
+        
+        try:
+            if (mode or self.retrieval_mode) == "hybrid":
+                results = await self.milvus.asearch_hybrid(query, top_k=k)
+            else:
+                results = await self.milvus.asearch_similar(query, top_k=k)
             logger.info(f"Retrieved {len(results)} documents for query: {query}")
             return results
             
@@ -89,6 +140,12 @@ class RAGService:
         
         context_parts = []
         current_length = 0
+        if self.max_context_tokens:
+            max_length = self.max_context_tokens
+            measure = lambda text: count_tokens(text, Config.OPENAI_CHAT_MODEL)
+        else:
+            max_length = self.max_context_length
+            measure = len
         
         for doc in documents:
             # Format document info
@@ -100,31 +157,28 @@ Nội dung: {doc['content']}
 """
             
             # Check if adding this document exceeds max length
-            if current_length + len(doc_info) > self.max_context_length:
+            doc_length = measure(doc_info)
+            if current_length + doc_length > max_length:
                 break
             
             context_parts.append(doc_info)
-            current_length += len(doc_info)
+            current_length += doc_length
         
         return "\n".join(context_parts)
     
-    def generate_response(self, query: str, context: str) -> str:
+    def _build_messages(self, query: str, context: str) -> List[Dict[str, str]]:
         """
-        Generate response using OpenAI with context
+        Build chat messages for answer generation
         
         Args:
             query: User question
             context: Retrieved context from documents
             
         Returns:
-            Generated response
+            Messages for the chat completion API
         """
-        if not openai_service.enabled:
-            return "Xin lỗi, dịch vụ AI hiện không khả dụng."
-        
-        try:
-            # Create system prompt
-            system_prompt = """Bạn là một trợ lý AI chuyên về thủ tục hành chính công dân Việt Nam. 
+        # Create system prompt
+        system_prompt = """Bạn là một trợ lý AI chuyên về thủ tục hành chính công dân Việt Nam. 
 Hãy trả lời câu hỏi dựa trên thông tin được cung cấp một cách chính xác, chi tiết và hữu ích.
 
 Quy tắc:
@@ -133,31 +187,129 @@ Quy tắc:
 3. Trả lời bằng tiếng Việt
 4. Cấu trúc câu trả lời rõ ràng, dễ hiểu
 5. Nếu có quy trình, hãy liệt kê từng bước cụ thể"""
-            
-            # Create user prompt
-            user_prompt = f"""
+        
+        # Create user prompt
+        user_prompt = f"""
 Thông tin tham khảo:
 {context}
 
 Câu hỏi: {query}
 
 Hãy trả lời câu hỏi dựa trên thông tin trên."""
+        
+        # Prepare messages for OpenAI
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def generate_response(self, query: str, context: str) -> str:
+        """
+        Generate response using OpenAI with context
+        
+        Args:
+            query: User question
+            context: Retrieved context from documents
             
-            # Prepare messages for OpenAI
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-            
+        Returns:
+            Generated response
+        """
+        if not openai_service.enabled:
+            return "Xin lỗi, dịch vụ AI hiện không khả dụng."
+        
+        try:
             # Call OpenAI
-            response = openai_service.chat_completion(messages)
-            
-            return response
+            return openai_service.chat_completion(self._build_messages(query, context))
             
         except Exception as e:
             logger.error(f"Error generating response: {e}")
             return f"Xin lỗi, đã có lỗi xảy ra khi tạo câu trả lời: {str(e)}"
     
+    async def agenerate_response(
+        self,
+        query: str,
+        context: str,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> str:
+        """
+        Async variant of generate_response
+        
+        Args:
+            query: User question
+            context: Retrieved context from documents
+            on_token: Optional callback awaited with each token as it is generated
+            
+        Returns:
+            Generated response
+            
+        Raises:
+            Exception: When the completion fails; aquery turns it into an error result
+        """
+        messages = self._build_messages(query, context)
+        if on_token is None:
+            return await openai_service.achat_completion(messages)
+        
+        parts = []
+        async for token in openai_service.astream_chat_completion(messages):
+            parts.append(token)
+            await on_token(token)
+        return "".join(parts)
+    
+    def _no_documents_result(self) -> Dict[str, Any]:
+        """Result returned when retrieval finds nothing"""
+        return {
+            "response": "Xin lỗi, tôi không tìm thấy thông tin liên quan đến câu hỏi của bạn.",
+            "sources": [],
+            "confidence": 0.0
+        }
+    
+    def _format_sources(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format the top retrieved documents as citation sources"""
+        return [
+            {
+                "title": doc["title"],
+                "section": doc["section"],
+                "file_name": doc["file_name"],
+                "score": doc["score"],
+                "content_preview": doc["content"][:200] + "..." if len(doc["content"]) > 200 else doc["content"]
+            }
+            for doc in documents[:3]  # Top 3 sources
+        ]
+    
+    def _build_result(
+        self,
+        documents: List[Dict[str, Any]],
+        response: str,
+        include_sources: bool,
+        generated: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Assemble the query result with optional sources
+        
+        Args:
+            documents: Retrieved documents
+            response: Generated response
+            include_sources: Whether to include source documents
+            generated: False when response is an error message rather than an answer
+            
+        Returns:
+            Dictionary with response and metadata
+        """
+        result = {
+            "response": response,
+            "generated": generated,
+            "confidence": documents[0]["score"] if documents else 0.0,
+            # Every file the answer was generated from (used for cache invalidation)
+            "source_files": sorted({doc["file_name"] for doc in documents})
+        }
+        
+        if include_sources:
+            result["sources"] = self._format_sources(documents)
+        else:
+            result["sources"] = []
+        
+        return result
+    
     def query(self, question: str, include_sources: bool = True) -> Dict[str, Any]:
         """
         Main RAG query function
@@ -174,11 +326,7 @@ Hãy trả lời câu hỏi dựa trên thông tin trên."""
             documents = self.retrieve_documents(question)
             
             if not documents:
-                return {
-                    "response": "Xin lỗi, tôi không tìm thấy thông tin liên quan đến câu hỏi của bạn.",
-                    "sources": [],
-                    "confidence": 0.0
-                }
+                return self._no_documents_result()
             
             # Step 2: Format context
             context = self.format_context(documents)
@@ -187,26 +335,67 @@ Hãy trả lời câu hỏi dựa trên thông tin trên."""
             response = self.generate_response(question, context)
             
             # Step 4: Prepare result
-            result = {
-                "response": response,
-                "confidence": documents[0]["score"] if documents else 0.0
+            return self._build_result(documents, response, include_sources)
+            
+        except Exception as e:
+            logger.error(f"Error in RAG query: {e}")
+            return {
+                "response": f"Xin lỗi, đã có lỗi xảy ra: {str(e)}",
+                "sources": [],
+                "confidence": 0.0
             }
+    
+    async def aquery(
+        self,
+        question: str,
+        include_sources: bool = True,
+        on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+        on_sources: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+        mode: Optional[str] = None,
+        documents: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of query for callers running on the event loop
+        
+        Args:
+            question: User question
+            include_sources: Whether to include source documents
+            on_token: Optional callback awaited with each answer token (streaming)
+            on_sources: Optional callback awaited with the sources once retrieval finishes
+            mode: Retrieval mode, "dense" or "hybrid" (defaults to Config.RETRIEVAL_MODE)
+            documents: Documents already retrieved for the question (skips retrieval)
             
-            if include_sources:
-                result["sources"] = [
-                    {
-                        "title": doc["title"],
-                        "section": doc["section"],
-                        "file_name": doc["file_name"],
-                        "score": doc["score"],
-                        "content_preview": doc["content"][:200] + "..." if len(doc["content"]) > 200 else doc["content"]
-                    }
-                    for doc in documents[:3]  # Top 3 sources
-                ]
-            else:
-                result["sources"] = []
+        Returns:
+            Dictionary with response and metadata
+        """
+        try:
+            if documents is None:
+                documents = await self.aretrieve_documents(question, mode=mode)
+            
+            if not documents:
+                return self._no_documents_result()
+            
+            if on_sources is not None:
+                await on_sources(self._format_sources(documents))
+            
+            if not openai_service.enabled:
+                return self._build_result(
+                    documents, "Xin lỗi, dịch vụ AI hiện không khả dụng.", include_sources, generated=False
+                )
+            
+            context = self.format_context(documents)
+            try:
+                response = await self.agenerate_response(question, context, on_token=on_token)
+            except Exception as e:
+                logger.error(f"Error generating response: {e}")
+                return self._build_result(
+                    documents,
+                    f"Xin lỗi, đã có lỗi xảy ra khi tạo câu trả lời: {str(e)}",
+                    include_sources,
+                    generated=False
+                )
             
-            return result
+            return self._build_result(documents, response, include_sources)
             
         except Exception as e:
             logger.error(f"Error in RAG query: {e}")
@@ -0,0 +1,212 @@
+"""
+Semantic Answer Cache
+
+Caches RAG answers keyed by the question embedding. A new question whose
+embedding is within the similarity threshold of a recently answered one gets the
+stored answer and citations back without retrieval or generation. Entries are
+invalidated when any of their source files is re-ingested or deleted.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from .file_versions import file_versions
+from .openai_service import openai_service
+from ..core.config import Config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        threshold: float = None,
+        ttl_seconds: int = None,
+        max_entries: int = None,
+        enabled: bool = None,
+    ):
+        """
+        Initialize semantic cache
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Entry lifetime (0 disables expiry)
+            max_entries: Maximum number of cached answers (oldest evicted first)
+            enabled: Whether lookups/stores are performed
+        """
+        self.enabled = enabled if enabled is not None else Config.SEMANTIC_CACHE_ENABLED
+        self.threshold = threshold if threshold is not None else Config.SEMANTIC_CACHE_THRESHOLD
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else Config.SEMANTIC_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else Config.SEMANTIC_CACHE_MAX_ENTRIES
+
+        self._lock = threading.Lock()
+        # Row i of _matrix is the unit-normalized embedding of _entries[i]
+        self._matrix: Optional[np.ndarray] = None
+        self._entries: List[Dict[str, Any]] = []
+
+        # Counters reported through get_stats()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if not norm:
+            return None
+        return vector / norm
+
+    def _remove(self, indices: List[int]):
+        """Remove entries by index (caller holds the lock)"""
+        if not indices:
+            return
+        drop = set(indices)
+        self._entries = [entry for i, entry in enumerate(self._entries) if i not in drop]
+        if self._entries:
+            self._matrix = np.delete(self._matrix, list(drop), axis=0)
+        else:
+            self._matrix = None
+
+    def lookup(self, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a question embedding
+
+        Args:
+            embedding: Question embedding
+
+        Returns:
+            Cached entry {"question", "result", "similarity"}, or None
+        """
+        if not self.enabled or not embedding:
+            return None
+
+        query = self._normalize(embedding)
+        if query is None:
+            return None
+
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            # Drop expired entries before matching
+            if self.ttl_seconds:
+                now = time.time()
+                self._remove([
+                    i for i, entry in enumerate(self._entries)
+                    if now - entry["created_at"] > self.ttl_seconds
+                ])
+                if self._matrix is None:
+                    self.misses += 1
+                    return None
+
+            similarities = self._matrix @ query
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                self.misses += 1
+                return None
+            entry = self._entries[best]
+
+        # Validate against current source file versions outside the lock (may hit Redis)
+        current = file_versions.get_many(entry["file_versions"].keys())
+        if current != entry["file_versions"]:
+            with self._lock:
+                if best < len(self._entries) and self._entries[best] is entry:
+                    self._remove([best])
+                self.invalidations += 1
+                self.misses += 1
+            logger.info(f"♻️ [SEMANTIC-CACHE] Entry for '{entry['question'][:50]}' invalidated by source file update")
+            return None
+
+        with self._lock:
+            self.hits += 1
+        logger.info(f"🎯 [SEMANTIC-CACHE] Hit (similarity {similarity:.3f}) for cached question '{entry['question'][:50]}'")
+        return {"question": entry["question"], "result": entry["result"], "similarity": similarity}
+
+    def store(self, question: str, embedding: List[float], result: Dict[str, Any], source_files: List[str]):
+        """
+        Cache an answer
+
+        Args:
+            question: Answered question
+            embedding: Question embedding
+            result: RAG result (response, sources, confidence)
+            source_files: Files whose chunks the answer was generated from
+        """
+        if not self.enabled or not embedding or not source_files:
+            return
+
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+
+        entry = {
+            "question": question,
+            "result": result,
+            "file_versions": file_versions.get_many(source_files),
+            "created_at": time.time(),
+        }
+
+        with self._lock:
+            if self._matrix is not None and self._matrix.shape[1] != vector.shape[0]:
+                # Embedding model changed; old vectors are not comparable
+                self._matrix = None
+                self._entries = []
+
+            if self._matrix is None:
+                self._matrix = vector[np.newaxis, :]
+            else:
+                self._matrix = np.vstack([self._matrix, vector])
+            self._entries.append(entry)
+
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self._remove(list(range(overflow)))
+
+    async def alookup_question(self, question: str) -> Optional[Dict[str, Any]]:
+        """Embed a question and look it up (embedding goes through the embedding cache)"""
+        if not self.enabled or not question.strip():
+            return None
+        embedding = await openai_service.aget_embedding(question)
+        # lookup() reads file versions (Redis) and scans the matrix under the lock
+        return await asyncio.to_thread(self.lookup, embedding)
+
+    async def astore_question(self, question: str, result: Dict[str, Any], source_files: List[str]):
+        """Embed a question and cache its answer"""
+        if not self.enabled or not question.strip() or not source_files:
+            return
+        embedding = await openai_service.aget_embedding(question)
+        await asyncio.to_thread(self.store, question, embedding, result, source_files)
+
+    def clear(self):
+        """Drop all cached answers"""
+        with self._lock:
+            self._matrix = None
+            self._entries = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global semantic cache instance
+semantic_cache = SemanticCache()
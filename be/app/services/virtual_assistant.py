@@ -4,6 +4,7 @@ Advanced conversational AI with memory, RAG and workflow management
 """
 
 import json
+import asyncio
 import logging
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Annotated, TypedDict
@@ -323,8 +324,8 @@ Nguồn tham khảo:
                 "conversation_summary": "",
             }
 
-            # Run workflow
-            final_state = self.workflow.invoke(state)
+            # Run workflow (sync graph with blocking LLM/RAG calls) off the event loop
+            final_state = await asyncio.to_thread(self.workflow.invoke, state)
 
             # Extract response
             ai_response = (
@@ -1,11 +1,15 @@
 import os
 import re
-from typing import List, Dict, Any, Optional
+import bisect
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from pathlib import Path
 import logging
 import base64
 from io import BytesIO
 from ..core.config import Config
+from .tokenizer import count_tokens
 
 # LangChain text splitter
 try:
@@ -69,6 +73,27 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# PDF text is chunked incrementally once this many chunks' worth of pages is buffered
+_PDF_CHUNK_WINDOW = 8
+
+# Break candidates for _fixed_size_split (lookahead so "\n\n\n" yields two paragraph breaks)
+_PARAGRAPH_BREAK = re.compile(r"\n(?=\n)")
+_SENTENCE_BREAK = re.compile(r"[.!?](?=[ \n])")
+_LINE_BREAK = re.compile(r"\n")
+
+
+def _extract_pdf_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract text of pages [start, end) of a PDF (runs in a worker process)"""
+    pages = []
+    with open(file_path, "rb") as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page_num in range(start, end):
+            try:
+                pages.append((page_num, pdf_reader.pages[page_num].extract_text() or ""))
+            except Exception as e:
+                logger.warning(f"Error extracting text from page {page_num + 1}: {e}")
+    return pages
+
 
 class DocumentProcessor:
     def __init__(self, data_dir: str = "data/thutuccongdan", openai_service=None):
@@ -80,38 +105,48 @@ class DocumentProcessor:
             openai_service: OpenAI service instance for LLM-based extraction
         """
         self.data_dir = data_dir
-        self.chunk_size = Config.CHUNK_SIZE
-        self.chunk_overlap = Config.CHUNK_OVERLAP
         self.separators = Config.CHUNK_SEPARATORS
         self.openai_service = openai_service
 
+        # Chunk sizes are measured in characters or in embedding-model tokens
+        self.token_based = Config.CHUNK_LENGTH_UNIT == "tokens"
+        if self.token_based:
+            self.chunk_size = Config.CHUNK_SIZE_TOKENS
+            self.chunk_overlap = Config.CHUNK_OVERLAP_TOKENS
+            self.length_function = count_tokens
+        else:
+            self.chunk_size = Config.CHUNK_SIZE
+            self.chunk_overlap = Config.CHUNK_OVERLAP
+            self.length_function = len
+        unit = "tokens" if self.token_based else "chars"
+
         # Initialize LangChain fixed-size text splitter (CharacterTextSplitter for consistency)
         if CharacterTextSplitter:
             self.text_splitter = CharacterTextSplitter(
-                chunk_size=Config.CHUNK_SIZE,
-                chunk_overlap=Config.CHUNK_OVERLAP,
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
                 separator="\n\n",  # Split by paragraphs primarily
-                length_function=len,
+                length_function=self.length_function,
             )
             logger.info(
-                f"🔧 [PROCESSOR] Initialized LangChain CharacterTextSplitter (fixed-size) with chunk_size={Config.CHUNK_SIZE}, overlap={Config.CHUNK_OVERLAP}"
+                f"🔧 [PROCESSOR] Initialized LangChain CharacterTextSplitter (fixed-size) with chunk_size={self.chunk_size}, overlap={self.chunk_overlap} ({unit})"
             )
         elif RecursiveCharacterTextSplitter:
             # Fallback to RecursiveCharacterTextSplitter with limited separators
             self.text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=Config.CHUNK_SIZE,
-                chunk_overlap=Config.CHUNK_OVERLAP,
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
                 separators=[
                     "\n\n",
                     "\n",
                     ". ",
                     " ",
                 ],  # Limited separators for more consistent sizes
-                length_function=len,
+                length_function=self.length_function,
                 is_separator_regex=False,
             )
             logger.info(
-                f"🔧 [PROCESSOR] Initialized RecursiveCharacterTextSplitter as fallback with chunk_size={Config.CHUNK_SIZE}, overlap={Config.CHUNK_OVERLAP}"
+                f"🔧 [PROCESSOR] Initialized RecursiveCharacterTextSplitter as fallback with chunk_size={self.chunk_size}, overlap={self.chunk_overlap} ({unit})"
             )
         else:
             self.text_splitter = None
@@ -223,35 +258,137 @@ class DocumentProcessor:
         title = re.sub(r"[_-]", " ", title)
         return title.strip()
 
-    def _extract_pdf_content(self, file_path: str) -> str:
-        """Extract text content from PDF file"""
-        if not PyPDF2:
-            logger.error("PyPDF2 not available. Install PyPDF2 to process PDF files.")
-            return ""
+    def iter_pdf_pages(self, file_path: str) -> Iterator[Tuple[int, str]]:
+        """
+        Stream the text of a PDF page by page
 
-        try:
-            content = ""
-            with open(file_path, "rb") as file:
-                pdf_reader = PyPDF2.PdfReader(file)
+        PDFs with at least Config.PDF_PARALLEL_MIN_PAGES pages are extracted in a
+        process pool, Config.PDF_PAGES_PER_TASK pages per task; pages are still
+        yielded in order as soon as their range is done.
 
+        Args:
+            file_path: Path to the PDF file
+
+        Yields:
+            (page_number, text) for every page with text, page_number 0-based
+        """
+        with open(file_path, "rb") as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            page_count = len(pdf_reader.pages)
+
+            workers = min(
+                Config.PDF_EXTRACT_WORKERS,
+                -(-page_count // max(1, Config.PDF_PAGES_PER_TASK)),
+            )
+            # Daemonic processes (e.g. Celery prefork children) cannot start a pool
+            parallel = (
+                page_count >= Config.PDF_PARALLEL_MIN_PAGES
+                and workers > 1
+                and not multiprocessing.current_process().daemon
+            )
+
+            if not parallel:
                 for page_num, page in enumerate(pdf_reader.pages):
                     try:
-                        page_text = page.extract_text()
-                        if page_text.strip():
-                            content += f"\n\n--- Page {page_num + 1} ---\n"
-                            content += page_text
+                        page_text = page.extract_text() or ""
                     except Exception as e:
                         logger.warning(
                             f"Error extracting text from page {page_num + 1}: {e}"
                         )
                         continue
+                    if page_text.strip():
+                        yield page_num, page_text
+                return
 
-            return content.strip()
+        logger.info(
+            f"📑 [PROCESSOR] Extracting {page_count} PDF pages with {workers} worker processes"
+        )
+        starts = list(range(0, page_count, Config.PDF_PAGES_PER_TASK))
+        ends = [min(start + Config.PDF_PAGES_PER_TASK, page_count) for start in starts]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for pages in executor.map(
+                _extract_pdf_page_range, [file_path] * len(starts), starts, ends
+            ):
+                for page_num, page_text in pages:
+                    if page_text.strip():
+                        yield page_num, page_text
+
+    @staticmethod
+    def _format_pdf_page(page_num: int, page_text: str) -> str:
+        return f"\n\n--- Page {page_num + 1} ---\n{page_text}"
+
+    def _extract_pdf_content(self, file_path: str) -> str:
+        """Extract text content from PDF file"""
+        if not PyPDF2:
+            logger.error("PyPDF2 not available. Install PyPDF2 to process PDF files.")
+            return ""
+
+        try:
+            return "".join(
+                self._format_pdf_page(page_num, page_text)
+                for page_num, page_text in self.iter_pdf_pages(file_path)
+            ).strip()
 
         except Exception as e:
             logger.error(f"Error reading PDF file: {e}")
             return ""
 
+    def iter_pdf_chunks(self, file_path: str) -> Iterator[str]:
+        """
+        Chunk a PDF incrementally while its pages are being extracted
+
+        Pages are buffered until they hold about _PDF_CHUNK_WINDOW chunks of
+        text; the buffer is split and every chunk but the last is emitted. The
+        last chunk may continue on the next page, so it seeds the next buffer.
+
+        Args:
+            file_path: Path to the PDF file
+
+        Yields:
+            Text chunks in document order
+        """
+        window = self.chunk_size * _PDF_CHUNK_WINDOW
+        parts: List[str] = []
+        buffered = 0
+
+        for page_num, page_text in self.iter_pdf_pages(file_path):
+            part = self._format_pdf_page(page_num, page_text)
+            parts.append(part)
+            buffered += self.length_function(part)
+            if buffered < window:
+                continue
+
+            chunks = self._split_text("".join(parts).strip(), ".pdf")
+            yield from chunks[:-1]
+            parts = chunks[-1:]
+            buffered = sum(self.length_function(part) for part in parts)
+
+        if parts:
+            yield from self._split_text("".join(parts).strip(), ".pdf")
+
+    def iter_document_chunks(self, file_path: str, filename: str) -> Iterator[str]:
+        """
+        Extract a file and yield its text chunks
+
+        PDFs are streamed page by page into the chunker; other formats are
+        extracted whole and then split.
+
+        Args:
+            file_path: Path to the uploaded file
+            filename: Original filename
+
+        Yields:
+            Text chunks in document order
+        """
+        if os.path.splitext(filename)[1].lower() == ".pdf" and PyPDF2:
+            logger.info(f"📑 [PROCESSOR] Streaming PDF pages into the chunker: {filename}")
+            yield from self.iter_pdf_chunks(file_path)
+            return
+
+        doc = self.process_uploaded_file(file_path, filename)
+        if doc:
+            yield from self._split_text(doc["content"], doc["file_type"])
+
     def _extract_docx_content(self, file_path: str) -> str:
         """Extract text content from DOCX file (Office Open XML format)"""
         if not Document:
@@ -655,7 +792,7 @@ class DocumentProcessor:
             f"📝 [CHUNKER] Starting LangChain fixed-size split for {len(text)} characters"
         )
         logger.debug(
-            f"⚙️ [CHUNKER] Using CHUNK_SIZE={Config.CHUNK_SIZE}, OVERLAP={Config.CHUNK_OVERLAP}"
+            f"⚙️ [CHUNKER] Using CHUNK_SIZE={self.chunk_size}, OVERLAP={self.chunk_overlap} ({Config.CHUNK_LENGTH_UNIT})"
         )
         logger.debug(f"🔧 [CHUNKER] File type: {file_type}")
 
@@ -687,7 +824,7 @@ class DocumentProcessor:
                 header_context = self._build_header_context(doc.metadata)
 
                 # Split the content if it's too large
-                if len(doc.page_content) <= self.chunk_size:
+                if self.length_function(doc.page_content) <= self.chunk_size:
                     # Small enough, keep as is with header context
                     chunk_with_context = (
                         header_context + doc.page_content
@@ -777,19 +914,22 @@ class DocumentProcessor:
 
             # Validate chunks - if any chunk is still too large, force split it
             max_chunk_size = (
-                Config.CHUNK_SIZE * 2
+                self.chunk_size * 2
             )  # Allow 2x for safety, but enforce hard limit
             validated_chunks = []
 
             for chunk in chunks:
-                if len(chunk) <= max_chunk_size:
+                chunk_length = self.length_function(chunk)
+                if chunk_length <= max_chunk_size:
                     validated_chunks.append(chunk)
                 else:
                     # Chunk is too large, force split it
                     logger.warning(
-                        f"⚠️ Chunk too large ({len(chunk)} chars), force splitting..."
+                        f"⚠️ Chunk too large ({chunk_length} {Config.CHUNK_LENGTH_UNIT}), force splitting..."
+                    )
+                    sub_chunks = self._force_split_large_chunk(
+                        chunk, self._char_budget(chunk, self.chunk_size)
                     )
-                    sub_chunks = self._force_split_large_chunk(chunk, Config.CHUNK_SIZE)
                     validated_chunks.extend(sub_chunks)
 
             chunks = validated_chunks
@@ -839,8 +979,37 @@ class DocumentProcessor:
                 else self._simple_split(text)
             )
 
+    @staticmethod
+    def _find_break_offsets(text: str) -> Tuple[List[int], List[int], List[int]]:
+        """
+        Precompute candidate break offsets for _fixed_size_split in one pass each
+
+        Returns:
+            Sorted (paragraph, sentence, line) offsets: index of the first "\n"
+            of every "\n\n", of every ".!?" followed by a space or newline, and
+            of every "\n"
+        """
+        paragraphs = [m.start() for m in _PARAGRAPH_BREAK.finditer(text)]
+        sentences = [m.start() for m in _SENTENCE_BREAK.finditer(text)]
+        lines = [m.start() for m in _LINE_BREAK.finditer(text)]
+        return paragraphs, sentences, lines
+
+    @staticmethod
+    def _last_offset_in(offsets: List[int], low: int, high: int) -> Optional[int]:
+        """Largest offset in [low, high], or None"""
+        idx = bisect.bisect_right(offsets, high) - 1
+        if idx >= 0 and offsets[idx] >= low:
+            return offsets[idx]
+        return None
+
     def _fixed_size_split(self, text: str, file_type: str) -> List[str]:
-        """Fixed-size chunking with optional header preservation"""
+        """
+        Fixed-size chunking with optional header preservation
+
+        Not on the ingest path: _split_text chunks with _langchain_fixed_size_split.
+        Sizes are Config.CHUNK_SIZE / CHUNK_OVERLAP characters regardless of
+        CHUNK_LENGTH_UNIT.
+        """
         try:
             chunk_size = Config.CHUNK_SIZE
             chunk_overlap = Config.CHUNK_OVERLAP
@@ -849,6 +1018,11 @@ class DocumentProcessor:
             headers_context = ""
             if file_type == ".md" and Config.PRESERVE_HEADERS:
                 headers_context = self._extract_document_headers(text)
+            add_headers = bool(headers_context) and file_type == ".md"
+
+            # Break candidates are found once per document; each chunk then picks
+            # the last one inside its overlap zone with a bisect
+            paragraphs, sentences, lines = self._find_break_offsets(text)
 
             chunks = []
             start = 0
@@ -865,59 +1039,37 @@ class DocumentProcessor:
                         len(chunk_text) < chunk_size * 0.3 and chunks
                     ):  # Less than 30% of chunk_size
                         # Merge with last chunk
-                        chunks[-1] = chunks[-1] + "\n\n" + chunk_text
+                        chunks[-1] = f"{chunks[-1]}\n\n{chunk_text}"
                     else:
                         # Add header context if needed
-                        if headers_context and file_type == ".md":
+                        if add_headers:
                             chunk_text = headers_context + "\n\n" + chunk_text
                         chunks.append(chunk_text)
                     break
 
-                # Find a good break point within the overlap zone
-                break_point = end
-
-                # Look for natural break points in the overlap zone
+                # Look for natural break points in the overlap zone, in order of
+                # preference: paragraph, sentence, line; else cut at the fixed position
                 search_start = max(
                     start + chunk_size - chunk_overlap, start + chunk_size // 2
                 )
-                search_end = min(end + chunk_overlap, text_length)
-
-                # Try to find good break points in order of preference
-                break_candidates = []
-
-                # Look for paragraph breaks first
-                for i in range(search_end - 1, search_start - 1, -1):
-                    if i + 1 < text_length and text[i : i + 2] == "\n\n":
-                        break_candidates.append(i + 2)
-                        break
+                search_last = min(end + chunk_overlap, text_length) - 1
 
-                # Look for sentence breaks
-                if not break_candidates:
-                    for i in range(search_end - 1, search_start - 1, -1):
-                        if (
-                            text[i] in ".!?"
-                            and i + 1 < text_length
-                            and text[i + 1] in " \n"
-                        ):
-                            break_candidates.append(i + 1)
-                            break
-
-                # Look for line breaks
-                if not break_candidates:
-                    for i in range(search_end - 1, search_start - 1, -1):
-                        if text[i] == "\n":
-                            break_candidates.append(i + 1)
-                            break
-
-                # Use the best break point found, or default to fixed position
-                if break_candidates:
-                    break_point = break_candidates[0]
+                break_point = end
+                offset = self._last_offset_in(paragraphs, search_start, search_last)
+                if offset is not None:
+                    break_point = offset + 2
+                else:
+                    offset = self._last_offset_in(sentences, search_start, search_last)
+                    if offset is None:
+                        offset = self._last_offset_in(lines, search_start, search_last)
+                    if offset is not None:
+                        break_point = offset + 1
 
                 # Extract chunk
                 chunk_text = text[start:break_point].strip()
 
                 # Add header context for markdown files
-                if headers_context and file_type == ".md":
+                if add_headers:
                     chunk_text = headers_context + "\n\n" + chunk_text
 
                 if chunk_text:
@@ -1121,6 +1273,13 @@ class DocumentProcessor:
 
         return "\n".join(context_parts) if context_parts else ""
 
+    def _char_budget(self, text: str, size: int) -> int:
+        """Number of characters of text that corresponds to `size` chunk length units"""
+        if not self.token_based or not text:
+            return size
+        tokens = max(1, self.length_function(text))
+        return max(1, int(size * len(text) / tokens))
+
     def _force_split_large_chunk(self, text: str, target_size: int) -> List[str]:
         """
         Force split a large chunk into smaller pieces
@@ -1191,19 +1350,22 @@ class DocumentProcessor:
         """
         logger.debug(f"🔪 [CHUNKER] Simple fallback split for {len(text)} chars")
 
-        if len(text) <= self.chunk_size:
+        chunk_size = self._char_budget(text, self.chunk_size)
+        chunk_overlap = self._char_budget(text, self.chunk_overlap)
+
+        if len(text) <= chunk_size:
             return [text.strip()] if text.strip() else []
 
         chunks = []
         start = 0
 
         while start < len(text):
-            end = start + self.chunk_size
+            end = start + chunk_size
 
             # Try to find a good break point (sentence ending)
             if end < len(text):
                 # Look for sentence endings within the last 100 characters
-                search_start = max(start + self.chunk_size - 100, start)
+                search_start = max(start + chunk_size - 100, start)
                 search_text = text[search_start:end]
 
                 # Find sentence endings
@@ -1220,7 +1382,7 @@ class DocumentProcessor:
                 logger.debug(f"📦 [CHUNKER] Simple chunk: {len(chunk)} chars")
 
             # Move start position with overlap
-            start = max(end - self.chunk_overlap, start + 1)
+            start = max(end - chunk_overlap, start + 1)
 
             # Prevent infinite loop
             if start >= len(text):
@@ -1229,70 +1391,77 @@ class DocumentProcessor:
         logger.debug(f"✅ [CHUNKER] Simple split created {len(chunks)} chunks")
         return chunks
 
-    def process_and_save_to_milvus(
-        self, file_path: str, filename: str, milvus_service
-    ) -> bool:
+    def build_milvus_documents(
+        self, file_path: str, filename: str
+    ) -> Optional[List[Dict[str, Any]]]:
         """
-        Process file and save extracted content to Milvus
+        Extract a file's content and split it into Milvus chunk documents
 
         Args:
             file_path: Path to the uploaded file
             filename: Original filename
-            milvus_service: Milvus service instance
 
         Returns:
-            True if successful, False otherwise
+            Chunk dictionaries (file_name, chunk_id, content, title, section),
+            or None if extraction failed or produced no chunks
         """
-        logger.info(f"🚀 [MILVUS-PROCESSOR] Starting Milvus processing for: {filename}")
+        # Extract and split content with context preservation
+        logger.info(
+            f"📄 [MILVUS-PROCESSOR] Step 1: Extracting and chunking content from {filename}"
+        )
+        title = self._extract_title_from_filename(filename)
 
+        milvus_docs = []
         try:
-            # Extract content from file
-            logger.info(
-                f"📄 [MILVUS-PROCESSOR] Step 1: Extracting content from {filename}"
-            )
-            doc = self.process_uploaded_file(file_path, filename)
-            if not doc:
-                logger.error(
-                    f"❌ [MILVUS-PROCESSOR] Failed to extract content from {filename}"
-                )
-                return False
-
-            logger.info(f"✅ [MILVUS-PROCESSOR] Content extracted successfully")
-
-            # Split content into chunks with context preservation
-            logger.info(
-                f"✂️ [MILVUS-PROCESSOR] Step 2: Splitting content into chunks with header preservation"
-            )
-            chunks = self._split_text(doc["content"], doc["file_type"])
-            logger.info(
-                f"📊 [MILVUS-PROCESSOR] Generated {len(chunks)} chunks from content"
-            )
-
-            if not chunks:
-                logger.warning(
-                    f"⚠️ [MILVUS-PROCESSOR] No chunks generated from {filename}"
-                )
-                return False
-
-            # Prepare documents for Milvus
-            logger.info(f"🔧 [MILVUS-PROCESSOR] Step 3: Preparing documents for Milvus")
-            milvus_docs = []
-            for chunk_idx, chunk in enumerate(chunks):
-                milvus_doc = {
-                    "file_name": doc["file_name"],
+            for chunk_idx, chunk in enumerate(self.iter_document_chunks(file_path, filename)):
+                milvus_docs.append({
+                    "file_name": filename,
                     "chunk_id": chunk_idx,
                     "content": chunk,
-                    "title": doc["title"],
+                    "title": title,
                     "section": f"Chunk {chunk_idx + 1}",
-                }
-                milvus_docs.append(milvus_doc)
+                })
                 logger.debug(
                     f"📝 [MILVUS-PROCESSOR] Chunk {chunk_idx}: {len(chunk)} characters"
                 )
+        except Exception as e:
+            logger.error(
+                f"❌ [MILVUS-PROCESSOR] Failed to extract content from {filename}: {e}",
+                exc_info=True,
+            )
+            return None
 
-            logger.info(
-                f"✅ [MILVUS-PROCESSOR] Prepared {len(milvus_docs)} documents for Milvus"
+        if not milvus_docs:
+            logger.warning(
+                f"⚠️ [MILVUS-PROCESSOR] No chunks generated from {filename}"
             )
+            return None
+
+        logger.info(
+            f"✅ [MILVUS-PROCESSOR] Prepared {len(milvus_docs)} documents for Milvus"
+        )
+        return milvus_docs
+
+    def process_and_save_to_milvus(
+        self, file_path: str, filename: str, milvus_service
+    ) -> bool:
+        """
+        Process file and save extracted content to Milvus
+
+        Args:
+            file_path: Path to the uploaded file
+            filename: Original filename
+            milvus_service: Milvus service instance
+
+        Returns:
+            True if successful, False otherwise
+        """
+        logger.info(f"🚀 [MILVUS-PROCESSOR] Starting Milvus processing for: {filename}")
+
+        try:
+            milvus_docs = self.build_milvus_documents(file_path, filename)
+            if not milvus_docs:
+                return False
 
             # Save to Milvus
             logger.info(f"💾 [MILVUS-PROCESSOR] Step 4: Saving to Milvus database")
@@ -1300,10 +1469,14 @@ class DocumentProcessor:
                 f"🔌 [MILVUS-PROCESSOR] Milvus service available: {milvus_service is not None}"
             )
 
-            success = milvus_service.insert_documents(milvus_docs)
-            if success:
+            # Re-uploads only embed/insert new or changed chunks and drop stale ones
+            file_name = milvus_docs[0]["file_name"]
+            sync_result = milvus_service.sync_documents(file_name, milvus_docs)
+            if sync_result is not None:
                 logger.info(
-                    f"🎉 [MILVUS-PROCESSOR] Successfully saved {len(milvus_docs)} chunks from {filename} to Milvus"
+                    f"🎉 [MILVUS-PROCESSOR] Synced {len(milvus_docs)} chunks from {filename} to Milvus "
+                    f"({sync_result['inserted']} new, {sync_result['reused']} unchanged, "
+                    f"{sync_result['moved']} moved, {sync_result['deleted']} removed)"
                 )
 
                 # Verify data was saved
@@ -0,0 +1,74 @@
+"""
+Tokenizer Utilities
+
+Cached tokenizer access for token-based sizing of embedding and prompt inputs.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Optional
+
+from ..core.config import Config
+
+# Tokenizer (optional, falls back to a conservative estimate)
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Used when tiktoken is unavailable. Vietnamese diacritics push the token count
+# well above English, so estimate from UTF-8 bytes rather than characters.
+_BYTES_PER_TOKEN_ESTIMATE = 2
+
+
+@lru_cache(maxsize=8)
+def get_encoding(model: Optional[str] = None):
+    """
+    Get a cached tokenizer for a model
+
+    Args:
+        model: Model name (defaults to the configured embedding model)
+
+    Returns:
+        tiktoken Encoding, or None if tiktoken is not available
+    """
+    if tiktoken is None:
+        logger.warning("⚠️ [TOKENIZER] tiktoken not installed, using byte-length estimate")
+        return None
+
+    model = model or Config.OPENAI_EMBEDDING_MODEL
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"⚠️ [TOKENIZER] Could not load tokenizer for {model}: {e}")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Count tokens in text for the given model"""
+    encoding = get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text.encode("utf-8")) // _BYTES_PER_TOKEN_ESTIMATE + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Truncate text so it fits within max_tokens for the given model"""
+    encoding = get_encoding(model)
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
+
+    max_bytes = max_tokens * _BYTES_PER_TOKEN_ESTIMATE
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode("utf-8", errors="ignore")
@@ -26,5 +26,20 @@ celery_app.conf.update(
     worker_concurrency=2,
 )
 
+if Config.CELERY_WORKER_PROFILE == "production":
+    # Linux production: extraction and chunking are CPU-bound and serialize on the GIL
+    # in a threads pool, so they get their own queue served by a prefork worker
+    # (one process per core). GCS upload, embedding and Milvus writes stay on the
+    # threads worker, started with: -Q celery -P threads -c <n>
+    celery_app.conf.update(
+        task_routes={
+            'app.workers.tasks.extract_file_chunks': {'queue': Config.CELERY_EXTRACTION_QUEUE},
+        },
+        worker_pool='prefork',
+        worker_concurrency=Config.CELERY_EXTRACTION_CONCURRENCY,
+        # Recycle processes so memory from large PDFs is returned to the OS
+        worker_max_tasks_per_child=50,
+    )
+
 if __name__ == '__main__':
     celery_app.start()
@@ -0,0 +1,119 @@
+"""
+Worker Progress Notifications
+
+Celery tasks publish Socket.IO events to Redis through a write-only
+socketio.RedisManager; the API process, whose AsyncServer is attached to the
+same Redis channel, delivers them to the user's room. Progress updates are
+coalesced per task and flushed by one background thread per worker process,
+so bulk uploads neither flood clients nor spawn a thread per message.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Tuple, Any
+
+import socketio
+
+from ..core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Events that end a task; sent immediately and supersede pending progress
+TERMINAL_EVENTS = {
+    'file_upload_complete',
+    'file_upload_error',
+    'bulk_upload_complete',
+    'bulk_upload_error',
+}
+TERMINAL_STATUSES = {'completed', 'failed'}
+
+
+class ProgressNotifier:
+    def __init__(self, redis_url: str = None, channel: str = None, interval: float = None):
+        """
+        Initialize progress notifier
+
+        Args:
+            redis_url: Redis URL of the Socket.IO message queue
+            channel: Socket.IO pub/sub channel (must match the API server)
+            interval: Seconds between flushes of coalesced progress updates
+        """
+        self.redis_url = redis_url or Config.SOCKETIO_REDIS_URL
+        self.channel = channel or Config.SOCKETIO_CHANNEL
+        self.interval = interval if interval is not None else Config.PROGRESS_THROTTLE_SECONDS
+
+        self._lock = threading.Lock()
+        # (event, task key) -> (room, payload); only the latest update per key is kept
+        self._pending: Dict[Tuple[str, str], Tuple[str, Dict[str, Any]]] = {}
+        self._manager = None
+        self._flusher = None
+        # Prefork children inherit the parent's state; threads and sockets must be per process
+        self._pid = None
+
+    def _ensure_started(self):
+        """Create the Redis manager and flusher thread for the current process"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pending.clear()
+            self._manager = socketio.RedisManager(self.redis_url, channel=self.channel, write_only=True)
+            self._flusher = threading.Thread(target=self._flush_loop, name="progress-notifier", daemon=True)
+            self._flusher.start()
+            self._pid = os.getpid()
+            logger.info(f"📡 [NOTIFY] Publishing worker events to Redis channel '{self.channel}'")
+
+    @staticmethod
+    def _task_key(message: Dict[str, Any]) -> str:
+        return str(message.get('task_id') or message.get('bulk_task_id') or '')
+
+    def _publish(self, room: str, message: Dict[str, Any]):
+        try:
+            self._manager.emit(message['type'], message, room=room, namespace='/')
+        except Exception as e:
+            logger.error(f"Error publishing WebSocket message {message['type']}: {e}")
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        """Publish the latest pending update of every task"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for room, message in pending.values():
+            self._publish(room, message)
+
+    def send(self, user_id: str, message: Dict[str, Any]):
+        """
+        Send an event to every session of a user
+
+        Terminal events (and completed/failed statuses) are published at once,
+        dropping the task's pending progress; other updates are coalesced and
+        published on the next flush.
+
+        Args:
+            user_id: Recipient (room user_{user_id})
+            message: Event payload; message['type'] is the Socket.IO event name
+        """
+        self._ensure_started()
+        room = f"user_{user_id}"
+        key = self._task_key(message)
+
+        if message['type'] in TERMINAL_EVENTS or message.get('status') in TERMINAL_STATUSES:
+            with self._lock:
+                for pending_key in [k for k in self._pending if k[1] == key]:
+                    del self._pending[pending_key]
+            self._publish(room, message)
+            return
+
+        with self._lock:
+            self._pending[(message['type'], key)] = (room, message)
+
+
+# Global progress notifier instance
+progress_notifier = ProgressNotifier()
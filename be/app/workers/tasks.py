@@ -1,13 +1,12 @@
 import os
-import asyncio
-import threading
-from celery import current_task
+from concurrent.futures import ThreadPoolExecutor
+from celery import current_task, chain, chord, group
 from .celery_app import celery_app
 from ..services.gcs_service import gcs_service
 from ..services.milvus_service import MilvusService
 from ..services.openai_service import openai_service
 from ..utils.document_processor import DocumentProcessor
-from ..core.websocket import websocket_manager
+from .notifications import progress_notifier
 from ..core.config import Config
 import logging
 import uuid
@@ -18,202 +17,202 @@ logger = logging.getLogger(__name__)
 from ..services.database import add_document
 
 def send_websocket_message(user_id: str, message: dict):
-    """Helper function to send WebSocket message from sync context"""
+    """Publish a WebSocket event to the user's room via the Redis message queue"""
     try:
-        logger.info(f"WebSocket message for user {user_id}: {message['type']}")
-        
-        def run_async():
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                if message['type'] == 'file_upload_progress':
-                    loop.run_until_complete(
-                        websocket_manager.sio.emit('file_upload_progress', message)
-                    )
-                elif message['type'] == 'file_upload_complete':
-                    loop.run_until_complete(
-                        websocket_manager.sio.emit('file_upload_complete', message)
-                    )
-                elif message['type'] == 'file_upload_error':
-                    loop.run_until_complete(
-                        websocket_manager.sio.emit('file_upload_error', message)
-                    )
-                elif message['type'] == 'bulk_upload_progress':
-                    loop.run_until_complete(
-                        websocket_manager.sio.emit('bulk_upload_progress', message)
-                    )
-                elif message['type'] == 'bulk_upload_complete':
-                    loop.run_until_complete(
-                        websocket_manager.sio.emit('bulk_upload_complete', message)
-                    )
-                elif message['type'] == 'bulk_upload_error':
-                    loop.run_until_complete(
-                        websocket_manager.sio.emit('bulk_upload_error', message)
-                    )
-                elif message['type'] == 'file_processing_update':
-                    loop.run_until_complete(
-                        websocket_manager.sio.emit('file_processing_update', message)
-                    )
-                    
-                logger.info(f"WebSocket message sent successfully: {message['type']}")
-                
-            except Exception as e:
-                logger.error(f"Error in async WebSocket send: {e}")
-            finally:
-                try:
-                    loop.close()
-                except:
-                    pass
-        
-        thread = threading.Thread(target=run_async)
-        thread.daemon = True
-        thread.start()
-        
+        logger.debug(f"WebSocket message for user {user_id}: {message['type']}")
+        progress_notifier.send(user_id, message)
     except Exception as e:
         logger.error(f"Error sending WebSocket message: {e}")
 
-@celery_app.task(bind=True)
-def process_file_upload(self, file_path: str, filename: str, user_id: str, task_id: str):
-    """Process file upload with content extraction and Milvus storage"""
-    try:
-        current_task.update_state(
-            state='PROGRESS',
-            meta={'current': 0, 'total': 100, 'status': 'Starting upload...'}
-        )
-        
-        send_websocket_message(user_id, {
-            'type': 'file_upload_progress',
-            'task_id': task_id,
-            'filename': filename,
-            'status': 'uploading',
-            'progress': 5
-        })
-        
+def _store_extracted_files(extracted: list, user_id: str, file_task_id, on_file_done=None):
+    """
+    I/O stage shared by single and bulk uploads: upload the originals to GCS in
+    parallel, write the chunks of every file to Milvus in one batch (single
+    flush), then save document metadata and remove the temporary files.
+    
+    Args:
+        extracted: Successful results of extract_file_chunks
+        user_id: User receiving progress messages
+        file_task_id: Function mapping a filename to its progress task ID
+        on_file_done: Optional callback(filename, document, error) per finished file
+        
+    Returns:
+        (successful_uploads, failed_files)
+    """
+    successful_uploads = []
+    failed_files = []
+    
+    def upload(item):
         send_websocket_message(user_id, {
             'type': 'file_processing_update',
-            'task_id': task_id,
-            'filename': filename,
-            'status': 'uploading',
-            'progress': 5
-        })
-        
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File not found: {file_path}")
-        
-        # Step 1: Extract content using Document Processor
-        logger.info(f"🎬 [UPLOAD-TASK] Starting file processing for: {filename}")
-        logger.info(f"📍 [UPLOAD-TASK] Task ID: {task_id}, User: {user_id}")
-        logger.info(f"📁 [UPLOAD-TASK] File path: {file_path}")
-        
-        current_task.update_state(
-            state='PROGRESS',
-            meta={'current': 15, 'total': 100, 'status': 'Extracting content from file...'}
-        )
-        
-        send_websocket_message(user_id, {
-            'type': 'file_processing_update',
-            'task_id': task_id,
-            'filename': filename,
-            'status': 'extracting_content',
-            'progress': 15
-        })
-        
-        # Initialize document processor with OpenAI service
-        logger.info(f"🔧 [UPLOAD-TASK] Initializing document processor with OpenAI service")
-        doc_processor = DocumentProcessor(openai_service=openai_service)
-        
-        # Step 2: Upload to Google Cloud Storage
-        logger.info(f"☁️ [UPLOAD-TASK] Step 2: Uploading to Google Cloud Storage")
-        current_task.update_state(
-            state='PROGRESS',
-            meta={'current': 35, 'total': 100, 'status': 'Uploading to Google Cloud Storage...'}
-        )
-        
-        send_websocket_message(user_id, {
-            'type': 'file_processing_update',
-            'task_id': task_id,
-            'filename': filename,
+            'task_id': file_task_id(item['filename']),
+            'filename': item['filename'],
             'status': 'uploading_to_cloud',
             'progress': 35
         })
-        
-        public_url = gcs_service.upload_file(file_path, f"documents/{filename}")
-        logger.info(f"✅ [UPLOAD-TASK] File uploaded to GCS: {public_url}")
-        
-        # Step 3: Process and save to Milvus
-        logger.info(f"🗄️ [UPLOAD-TASK] Step 3: Processing and saving to Milvus vector database")
-        current_task.update_state(
-            state='PROGRESS',
-            meta={'current': 60, 'total': 100, 'status': 'Processing content and saving to vector database...'}
-        )
-        
+        return gcs_service.upload_file(item['file_path'], f"documents/{item['filename']}")
+    
+    # Step 1: Upload originals to Google Cloud Storage (network-bound, in parallel)
+    public_urls, upload_errors = {}, {}
+    if extracted:
+        with ThreadPoolExecutor(max_workers=max(1, min(Config.GCS_UPLOAD_WORKERS, len(extracted)))) as executor:
+            futures = {executor.submit(upload, item): item['filename'] for item in extracted}
+            for future, filename in futures.items():
+                try:
+                    public_urls[filename] = future.result()
+                except Exception as e:
+                    logger.error(f"❌ [UPLOAD-TASK] Failed to upload {filename} to GCS: {e}")
+                    upload_errors[filename] = str(e)
+    
+    # Step 2: Embed and insert every file's chunks in one Milvus write stage,
+    # keyed by the uploaded filename (chunks carry it as file_name)
+    files, emptied = {}, []
+    for item in extracted:
+        if item['filename'] not in public_urls:
+            continue
         send_websocket_message(user_id, {
             'type': 'file_processing_update',
-            'task_id': task_id,
-            'filename': filename,
+            'task_id': file_task_id(item['filename']),
+            'filename': item['filename'],
             'status': 'saving_to_vector_db',
             'progress': 60
         })
-        
-        # Initialize and connect to Milvus
+        if item['chunks']:
+            files[item['filename']] = item['chunks']
+        else:
+            # A re-upload without extractable text must not leave the old chunks searchable
+            emptied.append(item['filename'])
+    
+    if files or emptied:
         logger.info(f"🔌 [UPLOAD-TASK] Connecting to Milvus at {Config.MILVUS_HOST}:{Config.MILVUS_PORT}")
         milvus_service = MilvusService(host=Config.MILVUS_HOST, port=Config.MILVUS_PORT)
-        
         if milvus_service.connect():
-            logger.info(f"✅ [UPLOAD-TASK] Connected to Milvus successfully")
-            
-            logger.info(f"🏗️ [UPLOAD-TASK] Setting up Milvus collection")
             milvus_service.create_collection()
             milvus_service.load_collection()
             
-            # Process and save to Milvus
-            logger.info(f"💾 [UPLOAD-TASK] Processing and saving file to Milvus")
-            milvus_success = doc_processor.process_and_save_to_milvus(
-                file_path, filename, milvus_service
+            logger.info(
+                f"💾 [UPLOAD-TASK] Saving {sum(len(docs) for docs in files.values())} chunks "
+                f"from {len(files)} file(s) to Milvus"
             )
-            
-            if milvus_success:
-                logger.info(f"🎉 [UPLOAD-TASK] Successfully saved {filename} to Milvus")
-            else:
-                logger.error(f"❌ [UPLOAD-TASK] Failed to save {filename} to Milvus, but continuing with upload")
+            with milvus_service.bulk_write():
+                for filename in emptied:
+                    logger.info(f"🗑️ [UPLOAD-TASK] {filename} has no chunks, removing its previous chunks")
+                    milvus_service.delete_chunks_by_file(filename)
+                
+                results = milvus_service.sync_files(files) if files else {}
+                if results is None:
+                    logger.error(f"❌ [UPLOAD-TASK] Failed to save {len(files)} file(s) to Milvus, but continuing with upload")
+                else:
+                    for name in (name for name, counts in results.items() if counts is None):
+                        logger.error(f"❌ [UPLOAD-TASK] Could not embed {name}, its previous chunks were kept")
             
             milvus_service.disconnect()
-            logger.info(f"🔌 [UPLOAD-TASK] Disconnected from Milvus")
         else:
             logger.error(f"❌ [UPLOAD-TASK] Failed to connect to Milvus, skipping vector database storage")
             logger.error(f"🔧 [UPLOAD-TASK] Check if Milvus is running at {Config.MILVUS_HOST}:{Config.MILVUS_PORT}")
+    
+    # Step 3: Save document metadata
+    for item in extracted:
+        filename = item['filename']
+        document, error = None, upload_errors.get(filename)
         
-        # Step 4: Save document metadata
-        current_task.update_state(
-            state='PROGRESS',
-            meta={'current': 85, 'total': 100, 'status': 'Finalizing...'}
-        )
+        if error is None:
+            try:
+                send_websocket_message(user_id, {
+                    'type': 'file_processing_update',
+                    'task_id': file_task_id(filename),
+                    'filename': filename,
+                    'status': 'finalizing',
+                    'progress': 85
+                })
+                
+                document = add_document(
+                    filename=filename,
+                    file_type=item['file_type'],
+                    size=item['size'],
+                    public_url=public_urls[filename],
+                    stored_filename=filename
+                )
+                successful_uploads.append({
+                    'filename': filename,
+                    'public_url': public_urls[filename],
+                    'document_id': document['id']
+                })
+            except Exception as e:
+                error = str(e)
+        
+        if error is not None:
+            failed_files.append({'filename': filename, 'error': error})
+        
+        # Clean up temporary file
+        try:
+            if os.path.exists(item['file_path']):
+                os.remove(item['file_path'])
+        except Exception as e:
+            logger.warning(f"Could not remove local file {item['file_path']}: {e}")
         
+        if on_file_done:
+            on_file_done(filename, document, error)
+    
+    return successful_uploads, failed_files
+
+@celery_app.task(bind=True)
+def extract_file_chunks(self, file_path: str, filename: str, user_id: str, file_task_id: str):
+    """
+    Extraction stage (CPU-bound): extract a file's content and split it into
+    Milvus chunk documents. Routed to the prefork extraction queue in the
+    production worker profile. Never raises, so one bad file cannot fail a
+    bulk upload chord.
+    """
+    try:
+        logger.info(f"🎬 [UPLOAD-TASK] Extracting content for: {filename} (task {file_task_id})")
         send_websocket_message(user_id, {
             'type': 'file_processing_update',
-            'task_id': task_id,
+            'task_id': file_task_id,
             'filename': filename,
-            'status': 'finalizing',
-            'progress': 85
+            'status': 'extracting_content',
+            'progress': 15
         })
         
-        file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-        file_extension = os.path.splitext(filename)[1].lower()
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        doc_processor = DocumentProcessor(openai_service=openai_service)
+        chunks = doc_processor.build_milvus_documents(file_path, filename)
+        if not chunks:
+            logger.warning(f"⚠️ [UPLOAD-TASK] No chunks extracted from {filename}, skipping vector database storage")
+        
+        return {
+            'filename': filename,
+            'file_path': file_path,
+            'file_type': os.path.splitext(filename)[1].lower(),
+            'size': os.path.getsize(file_path),
+            'chunks': chunks or []
+        }
+        
+    except Exception as e:
+        logger.error(f"❌ [UPLOAD-TASK] Failed to extract {filename}: {e}")
+        return {
+            'filename': filename,
+            'file_path': file_path,
+            'error': str(e)
+        }
+
+@celery_app.task(bind=True)
+def finalize_file_upload(self, extracted: dict, user_id: str, task_id: str):
+    """Single upload I/O stage: GCS upload, Milvus storage and metadata for one extracted file"""
+    filename = extracted['filename']
+    try:
+        if 'error' in extracted:
+            raise RuntimeError(extracted['error'])
         
-        document = add_document(
-            filename=filename,
-            file_type=file_extension,
-            size=file_size,
-            public_url=public_url,
-            stored_filename=filename
+        successful_uploads, failed_files = _store_extracted_files(
+            [extracted], user_id, lambda name: task_id
         )
+        if failed_files:
+            raise RuntimeError(failed_files[0]['error'])
         
-        # Clean up temporary file
-        try:
-            os.remove(file_path)
-        except Exception as e:
-            logger.warning(f"Could not remove local file {file_path}: {e}")
+        upload = successful_uploads[0]
         
         # Completion
         send_websocket_message(user_id, {
@@ -221,16 +220,16 @@ def process_file_upload(self, file_path: str, filename: str, user_id: str, task_
             'task_id': task_id,
             'filename': filename,
             'status': 'completed',
-            'public_url': public_url,
+            'public_url': upload['public_url'],
             'progress': 100,
-            'document_id': document['id']
+            'document_id': upload['document_id']
         })
         
         return {
             'status': 'completed',
             'filename': filename,
-            'public_url': public_url,
-            'document_id': document['id'],
+            'public_url': upload['public_url'],
+            'document_id': upload['document_id'],
             'message': f'File {filename} uploaded and processed successfully'
         }
         
@@ -244,8 +243,8 @@ def process_file_upload(self, file_path: str, filename: str, user_id: str, task_
         })
         
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            if os.path.exists(extracted['file_path']):
+                os.remove(extracted['file_path'])
         except Exception:
             pass
         
@@ -257,88 +256,99 @@ def process_file_upload(self, file_path: str, filename: str, user_id: str, task_
         raise
 
 @celery_app.task(bind=True)
-def process_bulk_upload(self, file_paths: list, user_id: str, bulk_task_id: str):
-    """Process bulk file upload"""
+def process_file_upload(self, file_path: str, filename: str, user_id: str, task_id: str):
+    """Process file upload: content extraction, then GCS upload and Milvus storage"""
     try:
-        total_files = len(file_paths)
-        completed_files = 0
-        failed_files = []
-        successful_uploads = []
+        send_websocket_message(user_id, {
+            'type': 'file_upload_progress',
+            'task_id': task_id,
+            'filename': filename,
+            'status': 'uploading',
+            'progress': 5
+        })
         
         send_websocket_message(user_id, {
-            'type': 'bulk_upload_progress',
-            'bulk_task_id': bulk_task_id,
-            'total_files': total_files,
-            'completed_files': 0,
-            'status': 'starting'
+            'type': 'file_processing_update',
+            'task_id': task_id,
+            'filename': filename,
+            'status': 'uploading',
+            'progress': 5
         })
         
-        for file_info in file_paths:
-            file_path = file_info['path']
-            filename = file_info['filename']
-            
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        logger.info(f"🎬 [UPLOAD-TASK] Starting file processing for: {filename}")
+        logger.info(f"📍 [UPLOAD-TASK] Task ID: {task_id}, User: {user_id}")
+        logger.info(f"📁 [UPLOAD-TASK] File path: {file_path}")
+        
+        result = chain(
+            extract_file_chunks.s(file_path, filename, user_id, task_id),
+            finalize_file_upload.s(user_id, task_id)
+        ).apply_async()
+        
+        return {
+            'status': 'dispatched',
+            'filename': filename,
+            'finalize_task_id': result.id
+        }
+        
+    except Exception as e:
+        send_websocket_message(user_id, {
+            'type': 'file_upload_error',
+            'task_id': task_id,
+            'filename': filename,
+            'status': 'failed',
+            'error': str(e)
+        })
+        
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        except Exception:
+            pass
+        
+        current_task.update_state(
+            state='FAILURE',
+            meta={'error': str(e), 'filename': filename}
+        )
+        
+        raise
+
+@celery_app.task(bind=True)
+def finalize_bulk_upload(self, extracted_files: list, user_id: str, bulk_task_id: str):
+    """
+    Bulk upload I/O stage (chord callback): upload every extracted file to GCS,
+    embed and insert all their chunks in one Milvus write stage with a single
+    flush, then save the document metadata.
+    """
+    try:
+        total_files = len(extracted_files)
+        failed_files = [
+            {'filename': item['filename'], 'error': item['error']}
+            for item in extracted_files if 'error' in item
+        ]
+        extracted = [item for item in extracted_files if 'error' not in item]
+        
+        # The same filename twice in one upload: keep the last copy, reject the others
+        last_index = {item['filename']: i for i, item in enumerate(extracted)}
+        duplicates = [item for i, item in enumerate(extracted) if last_index[item['filename']] != i]
+        for item in duplicates:
+            failed_files.append({
+                'filename': item['filename'],
+                'error': 'Duplicate filename in this upload; only the last copy was stored'
+            })
             try:
-                send_websocket_message(user_id, {
-                    'type': 'file_processing_update',
-                    'task_id': f"{bulk_task_id}_{filename}",
-                    'filename': filename,
-                    'status': 'extracting_content',
-                    'progress': 10
-                })
-                
-                # Initialize document processor for bulk processing
-                doc_processor = DocumentProcessor(openai_service=openai_service)
-                
-                file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                file_extension = os.path.splitext(filename)[1].lower()
-                
-                send_websocket_message(user_id, {
-                    'type': 'file_processing_update',
-                    'task_id': f"{bulk_task_id}_{filename}",
-                    'filename': filename,
-                    'status': 'uploading_to_cloud',
-                    'progress': 35
-                })
-                
-                public_url = gcs_service.upload_file(file_path, f"documents/{filename}")
-                
-                send_websocket_message(user_id, {
-                    'type': 'file_processing_update',
-                    'task_id': f"{bulk_task_id}_{filename}",
-                    'filename': filename,
-                    'status': 'saving_to_vector_db',
-                    'progress': 65
-                })
-                
-                # Process and save to Milvus
-                milvus_service = MilvusService(host=Config.MILVUS_HOST, port=Config.MILVUS_PORT)
-                if milvus_service.connect():
-                    milvus_service.create_collection()
-                    milvus_service.load_collection()
-                    
-                    milvus_success = doc_processor.process_and_save_to_milvus(
-                        file_path, filename, milvus_service
-                    )
-                    
-                    if not milvus_success:
-                        logger.warning(f"Failed to save {filename} to Milvus during bulk upload")
-                    
-                    milvus_service.disconnect()
-                
-                document = add_document(
-                    filename=filename,
-                    file_type=file_extension,
-                    size=file_size,
-                    public_url=public_url,
-                    stored_filename=filename
-                )
-                
-                successful_uploads.append({
-                    'filename': filename,
-                    'public_url': public_url,
-                    'document_id': document['id']
-                })
-                
+                if os.path.exists(item['file_path']):
+                    os.remove(item['file_path'])
+            except Exception as e:
+                logger.warning(f"Could not remove local file {item['file_path']}: {e}")
+        extracted = [item for i, item in enumerate(extracted) if last_index[item['filename']] == i]
+        completed_files = len(failed_files)
+        
+        def on_file_done(filename, document, error):
+            nonlocal completed_files
+            if error is None:
                 send_websocket_message(user_id, {
                     'type': 'file_processing_update',
                     'task_id': f"{bulk_task_id}_{filename}",
@@ -346,30 +356,31 @@ def process_bulk_upload(self, file_paths: list, user_id: str, bulk_task_id: str)
                     'status': 'completed',
                     'progress': 100
                 })
-                
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    logger.warning(f"Could not remove local file {file_path}: {e}")
-                    
-            except Exception as e:
-                failed_files.append({
-                    'filename': filename,
-                    'error': str(e)
-                })
             
             completed_files += 1
-            progress = (completed_files / total_files) * 100
-            
             send_websocket_message(user_id, {
                 'type': 'bulk_upload_progress',
                 'bulk_task_id': bulk_task_id,
                 'total_files': total_files,
                 'completed_files': completed_files,
-                'progress': progress,
+                'progress': (completed_files / total_files) * 100,
                 'status': 'processing'
             })
         
+        successful_uploads, store_failures = _store_extracted_files(
+            extracted, user_id, lambda name: f"{bulk_task_id}_{name}", on_file_done
+        )
+        failed_files.extend(store_failures)
+        
+        # Files that failed extraction still hold their temporary copy
+        for item in extracted_files:
+            if 'error' in item:
+                try:
+                    if os.path.exists(item['file_path']):
+                        os.remove(item['file_path'])
+                except Exception as e:
+                    logger.warning(f"Could not remove local file {item['file_path']}: {e}")
+        
         send_websocket_message(user_id, {
             'type': 'bulk_upload_complete',
             'bulk_task_id': bulk_task_id,
@@ -400,3 +411,48 @@ def process_bulk_upload(self, file_paths: list, user_id: str, bulk_task_id: str)
         )
         
         raise
+
+@celery_app.task(bind=True)
+def process_bulk_upload(self, file_paths: list, user_id: str, bulk_task_id: str):
+    """Process bulk file upload: parallel per-file extraction, then one upload-embed-insert stage"""
+    try:
+        total_files = len(file_paths)
+        
+        send_websocket_message(user_id, {
+            'type': 'bulk_upload_progress',
+            'bulk_task_id': bulk_task_id,
+            'total_files': total_files,
+            'completed_files': 0,
+            'status': 'starting'
+        })
+        
+        extraction = group(
+            extract_file_chunks.s(
+                file_info['path'], file_info['filename'], user_id, f"{bulk_task_id}_{file_info['filename']}"
+            )
+            for file_info in file_paths
+        )
+        result = chord(extraction)(finalize_bulk_upload.s(user_id, bulk_task_id))
+        
+        logger.info(f"📦 [BULK-UPLOAD] Dispatched {total_files} extraction tasks for bulk upload {bulk_task_id}")
+        
+        return {
+            'status': 'dispatched',
+            'total_files': total_files,
+            'finalize_task_id': result.id
+        }
+        
+    except Exception as e:
+        send_websocket_message(user_id, {
+            'type': 'bulk_upload_error',
+            'bulk_task_id': bulk_task_id,
+            'error': str(e),
+            'status': 'failed'
+        })
+        
+        current_task.update_state(
+            state='FAILURE',
+            meta={'error': str(e)}
+        )
+        
+        raise
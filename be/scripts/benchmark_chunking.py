@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark DocumentProcessor._fixed_size_split against the previous implementation
+
+The previous break-point search scanned the overlap window character by
+character (paragraph, then sentence, then line break) for every chunk. The
+current one precomputes boundary offsets once per document and bisects them.
+This script checks that both produce identical chunks and times them on the
+data/thutuccongdan corpus and on large synthetic documents.
+
+_fixed_size_split is not called during ingestion (_split_text uses the
+LangChain splitter with the CHUNK_LENGTH_UNIT budget), so the timings here do
+not translate into faster document processing.
+
+Usage:
+    python scripts/benchmark_chunking.py
+    python scripts/benchmark_chunking.py --data-dir ../data/thutuccongdan --sizes 100000 1000000 --repeat 5
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import logging
+from pathlib import Path
+from typing import List, Callable
+
+# Add the parent directory to Python path to import modules
+scripts_dir = os.path.dirname(os.path.abspath(__file__))
+be_dir = os.path.dirname(scripts_dir)  # Go up one level to be/
+sys.path.append(be_dir)
+
+from app.core.config import Config
+from app.utils.document_processor import DocumentProcessor
+
+# Chunker logs every chunk at INFO/DEBUG; keep the benchmark output readable
+logging.basicConfig(level=logging.WARNING)
+logging.getLogger("app.utils.document_processor").setLevel(logging.WARNING)
+
+
+def legacy_fixed_size_split(processor: DocumentProcessor, text: str, file_type: str) -> List[str]:
+    """Previous _fixed_size_split (character-by-character break-point search), kept as reference"""
+    chunk_size = Config.CHUNK_SIZE
+    chunk_overlap = Config.CHUNK_OVERLAP
+
+    headers_context = ""
+    if file_type == ".md" and Config.PRESERVE_HEADERS:
+        headers_context = processor._extract_document_headers(text)
+
+    chunks = []
+    start = 0
+    text_length = len(text)
+
+    while start < text_length:
+        end = start + chunk_size
+
+        if end >= text_length:
+            chunk_text = text[start:]
+            if len(chunk_text) < chunk_size * 0.3 and chunks:
+                chunks[-1] = chunks[-1] + "\n\n" + chunk_text
+            else:
+                if headers_context and file_type == ".md":
+                    chunk_text = headers_context + "\n\n" + chunk_text
+                chunks.append(chunk_text)
+            break
+
+        break_point = end
+        search_start = max(start + chunk_size - chunk_overlap, start + chunk_size // 2)
+        search_end = min(end + chunk_overlap, text_length)
+        break_candidates = []
+
+        for i in range(search_end - 1, search_start - 1, -1):
+            if i + 1 < text_length and text[i : i + 2] == "\n\n":
+                break_candidates.append(i + 2)
+                break
+
+        if not break_candidates:
+            for i in range(search_end - 1, search_start - 1, -1):
+                if text[i] in ".!?" and i + 1 < text_length and text[i + 1] in " \n":
+                    break_candidates.append(i + 1)
+                    break
+
+        if not break_candidates:
+            for i in range(search_end - 1, search_start - 1, -1):
+                if text[i] == "\n":
+                    break_candidates.append(i + 1)
+                    break
+
+        if break_candidates:
+            break_point = break_candidates[0]
+
+        chunk_text = text[start:break_point].strip()
+        if headers_context and file_type == ".md":
+            chunk_text = headers_context + "\n\n" + chunk_text
+        if chunk_text:
+            chunks.append(chunk_text)
+
+        start = break_point - chunk_overlap if break_point > chunk_overlap else break_point
+
+    return chunks
+
+
+def synthetic_document(size: int, seed: int = 42, paragraphs: bool = True) -> str:
+    """
+    Vietnamese-like text with sentence and line breaks
+
+    paragraphs=False mimics OCR output without blank lines, the worst case for
+    the previous search (it scanned the whole overlap window twice per chunk).
+    """
+    rng = random.Random(seed)
+    words = [
+        "đăng", "ký", "thường", "trú", "hồ", "sơ", "công", "dân", "thủ", "tục",
+        "giấy", "tờ", "cơ", "quan", "tiếp", "nhận", "xác", "nhận", "cư", "trú",
+    ]
+    parts, length = [], 0
+    while length < size:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(6, 30)))
+        sentence = sentence.capitalize() + rng.choice([".", ".", "?", "!", ";", ","])
+        parts.append(sentence)
+        parts.append(rng.choice([" ", " ", " ", "\n", "\n\n" if paragraphs else " "]))
+        length += len(sentence) + 1
+    return "".join(parts)[:size]
+
+
+def time_split(split: Callable[[], List[str]], repeat: int) -> float:
+    """Best wall time of several runs (seconds)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        split()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fixed-size chunk break-point search")
+    parser.add_argument("--data-dir", default=os.path.join(be_dir, "..", "data", "thutuccongdan"),
+                        help="Corpus directory (.md/.txt files)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100_000, 1_000_000, 5_000_000],
+                        help="Synthetic document sizes in characters")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per document (best is kept)")
+    args = parser.parse_args()
+
+    processor = DocumentProcessor()
+
+    documents = []
+    corpus = sorted(Path(args.data_dir).glob("*.md")) + sorted(Path(args.data_dir).glob("*.txt"))
+    if corpus:
+        text = {path: path.read_text(encoding="utf-8") for path in corpus}
+        documents.append((f"corpus ({len(corpus)} files)", [(t, path.suffix) for path, t in text.items()]))
+    else:
+        print(f"⚠️ No corpus files found in {args.data_dir}")
+    for size in args.sizes:
+        documents.append((f"synthetic {size:,} chars", [(synthetic_document(size), ".txt")]))
+        documents.append((f"synthetic OCR {size:,} chars", [(synthetic_document(size, paragraphs=False), ".txt")]))
+
+    print(f"⚙️ CHUNK_SIZE={Config.CHUNK_SIZE}, CHUNK_OVERLAP={Config.CHUNK_OVERLAP}\n")
+    print(f"{'Document':<36}{'chunks':>8}{'legacy ms':>12}{'current ms':>12}{'speedup':>9}  match")
+    print("-" * 84)
+
+    all_match = True
+    for label, texts in documents:
+        legacy = [legacy_fixed_size_split(processor, t, ft) for t, ft in texts]
+        current = [processor._fixed_size_split(t, ft) for t, ft in texts]
+        match = legacy == current
+        all_match &= match
+
+        legacy_s = time_split(lambda: [legacy_fixed_size_split(processor, t, ft) for t, ft in texts], args.repeat)
+        current_s = time_split(lambda: [processor._fixed_size_split(t, ft) for t, ft in texts], args.repeat)
+        chunks = sum(len(c) for c in current)
+        speedup = legacy_s / current_s if current_s else float("inf")
+        print(
+            f"{label:<36}{chunks:>8}{legacy_s * 1000:>12.2f}{current_s * 1000:>12.2f}"
+            f"{speedup:>8.1f}x  {'✅' if match else '❌'}"
+        )
+
+    print("-" * 84)
+    print("✅ Outputs identical" if all_match else "❌ Outputs differ")
+    return all_match
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
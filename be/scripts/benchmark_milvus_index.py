@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark Milvus index configurations: recall@k, search latency and memory
+
+Copies the source collection (with its embeddings) into a scratch collection,
+then for each index configuration builds the index, loads it and replays a
+labeled query set, reporting recall@k, p50/p95 search latency and the memory
+of the loaded segments. The production collection is never re-indexed.
+
+Query set (JSONL), one object per line:
+    {"query": "Thủ tục đăng ký thường trú?", "relevant": [{"file_name": "a.md", "chunk_id": 3}]}
+"relevant" may be omitted; recall is then measured against exact (FLAT) search.
+
+Usage:
+    python scripts/benchmark_milvus_index.py --queries queries.jsonl -k 5
+    python scripts/benchmark_milvus_index.py --queries queries.jsonl --index-types HNSW IVF_SQ8 \\
+        --config HNSW '{"build_params": {"M": 32}, "search_params": {"ef": 128}}'
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from typing import List, Dict, Any, Tuple
+
+# Add the parent directory to Python path to import modules
+scripts_dir = os.path.dirname(os.path.abspath(__file__))
+be_dir = os.path.dirname(scripts_dir)  # Go up one level to be/
+sys.path.append(be_dir)
+
+from pymilvus import Collection, utility
+from app.services.milvus_service import MilvusService
+from app.services.milvus_manager import milvus_manager
+from app.services.milvus_index import IndexConfig, INDEX_PRESETS
+from app.services.openai_service import openai_service
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def load_queries(path: str) -> List[Dict[str, Any]]:
+    """Load the labeled query set"""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            item["relevant"] = {
+                (rel["file_name"], int(rel["chunk_id"])) for rel in item.get("relevant", [])
+            }
+            queries.append(item)
+    return queries
+
+
+def copy_collection(source: MilvusService, scratch_name: str) -> MilvusService:
+    """Copy every entity of the source collection into a fresh scratch collection"""
+    alias = source.alias
+    if utility.has_collection(scratch_name, using=alias):
+        utility.drop_collection(scratch_name, using=alias)
+    milvus_manager.invalidate_collection(scratch_name, alias=alias)
+
+    schema = source.collection.schema
+    collection = Collection(scratch_name, schema, using=alias)
+    fields = [field.name for field in schema.fields if not field.is_primary]
+
+    copied = 0
+    iterator = source.collection.query_iterator(
+        batch_size=1000, expr='file_name != ""', output_fields=fields
+    )
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            collection.insert([{name: row[name] for name in fields} for row in batch])
+            copied += len(batch)
+    finally:
+        iterator.close()
+    collection.flush()
+    print(f"📦 Copied {copied} entities into scratch collection '{scratch_name}'")
+
+    milvus_manager.register_collection(scratch_name, collection, alias=alias)
+    scratch = MilvusService(alias=alias, collection_name=scratch_name, index_config=IndexConfig.preset("FLAT"))
+    scratch.collection = collection
+    return scratch
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def loaded_memory_bytes(collection_name: str, alias: str) -> int:
+    """Sum of memory used by the loaded segments of a collection"""
+    try:
+        segments = utility.get_query_segment_info(collection_name, using=alias)
+        return sum(getattr(segment, "mem_size", 0) for segment in segments)
+    except Exception as e:
+        logger.warning(f"Could not read segment info: {e}")
+        return 0
+
+
+def run_queries(
+    service: MilvusService,
+    embeddings: List[List[float]],
+    k: int,
+    repeat: int
+) -> Tuple[List[List[Tuple[str, int]]], List[float]]:
+    """Search every query embedding; returns per-query hits and all latencies (ms)"""
+    # Warm-up pass so the first measured search does not pay for lazy initialization
+    for embedding in embeddings[:3]:
+        service._search_by_vector(embedding, k)
+
+    hits, latencies = [], []
+    for embedding in embeddings:
+        results = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = service._search_by_vector(embedding, k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        hits.append([(r["file_name"], int(r["chunk_id"])) for r in results])
+    return hits, latencies
+
+
+def recall_at_k(hits: List[List[Tuple[str, int]]], relevant: List[set], k: int) -> float:
+    """Mean recall@k; a query with more than k relevant chunks is judged on its best k"""
+    scores = []
+    for retrieved, expected in zip(hits, relevant):
+        if not expected:
+            continue
+        found = len(set(retrieved[:k]) & expected)
+        scores.append(found / min(k, len(expected)))
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def build_configs(index_types: List[str], custom: List[List[str]]) -> List[IndexConfig]:
+    """Presets for the requested index types plus any custom configurations"""
+    configs = [IndexConfig.preset(index_type) for index_type in index_types]
+    for index_type, params in custom or []:
+        overrides = json.loads(params)
+        configs.append(IndexConfig.preset(index_type, **overrides))
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Milvus index configurations")
+    parser.add_argument("--queries", required=True, help="JSONL query set")
+    parser.add_argument("-k", type=int, default=5, help="Top-k for recall and search")
+    parser.add_argument("--source", default="document_embeddings", help="Source collection")
+    parser.add_argument("--scratch", default="document_embeddings_bench", help="Scratch collection")
+    parser.add_argument("--index-types", nargs="+", default=list(INDEX_PRESETS),
+                        help="Index presets to benchmark")
+    parser.add_argument("--config", nargs=2, action="append", metavar=("INDEX_TYPE", "JSON"),
+                        help="Custom configuration: index type and JSON with build_params/search_params")
+    parser.add_argument("--repeat", type=int, default=3, help="Searches per query (latency samples)")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch collection afterwards")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    if not queries:
+        print("❌ Query set is empty")
+        return False
+    print(f"📝 Loaded {len(queries)} queries")
+
+    embeddings = openai_service.get_embeddings([q["query"] for q in queries])
+    if not embeddings:
+        print("❌ Failed to embed queries")
+        return False
+
+    source = MilvusService(collection_name=args.source)
+    if not source.connect() or not source.attach_collection():
+        print(f"❌ Could not open source collection '{args.source}'")
+        return False
+
+    scratch = copy_collection(source, args.scratch)
+    configs = build_configs(args.index_types, args.config)
+
+    # Exact search gives the ground truth for unlabeled queries
+    relevant = [q["relevant"] for q in queries]
+    if any(not expected for expected in relevant):
+        print("🎯 Computing exact (FLAT) ground truth for unlabeled queries...")
+        scratch.rebuild_index(IndexConfig.preset("FLAT"))
+        exact_hits, _ = run_queries(scratch, embeddings, args.k, repeat=1)
+        relevant = [expected or set(exact) for expected, exact in zip(relevant, exact_hits)]
+
+    report = []
+    try:
+        for config in configs:
+            print(f"\n🏗️ {config.label()}")
+            start = time.perf_counter()
+            if not scratch.rebuild_index(config):
+                report.append({"index": config.label(), "error": "index build/load failed"})
+                continue
+            utility.wait_for_index_building_complete(args.scratch, using=scratch.alias)
+            build_seconds = time.perf_counter() - start
+
+            hits, latencies = run_queries(scratch, embeddings, args.k, args.repeat)
+            report.append({
+                "index": config.label(),
+                "index_type": config.index_type,
+                "build_params": config.build_params,
+                "search_params": config.search_params,
+                f"recall@{args.k}": round(recall_at_k(hits, relevant, args.k), 4),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "memory_mb": round(loaded_memory_bytes(args.scratch, scratch.alias) / (1024 * 1024), 2),
+                "build_load_s": round(build_seconds, 2),
+            })
+    finally:
+        if not args.keep:
+            scratch.collection.release()
+            utility.drop_collection(args.scratch, using=scratch.alias)
+            milvus_manager.invalidate_collection(args.scratch, alias=scratch.alias)
+
+    print("\n" + "=" * 96)
+    print(f"{'Index':<48}{'recall@' + str(args.k):>10}{'p50 ms':>9}{'p95 ms':>9}{'mem MB':>10}{'build s':>10}")
+    print("-" * 96)
+    for row in report:
+        if "error" in row:
+            print(f"{row['index']:<48}  {row['error']}")
+            continue
+        print(
+            f"{row['index']:<48}{row[f'recall@{args.k}']:>10.4f}{row['p50_ms']:>9.2f}"
+            f"{row['p95_ms']:>9.2f}{row['memory_mb']:>10.2f}{row['build_load_s']:>10.2f}"
+        )
+    print("=" * 96)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"k": args.k, "queries": len(queries), "results": report}, f, ensure_ascii=False, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
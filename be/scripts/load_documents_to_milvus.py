@@ -5,7 +5,6 @@ Script to load all thutuccongdan documents into Milvus vector database
 
 import os
 import sys
-import time
 from pathlib import Path
 
 # Add the parent directory to Python path to import modules
@@ -76,22 +75,21 @@ def main():
         
         # Step 6: Insert documents in batches
         print("\n⬆️ Inserting documents to Milvus...")
-        batch_size = 50  # Process in batches to avoid memory issues
+        batch_size = 500  # Process in batches to avoid memory issues
         total_chunks = len(chunks)
         
-        for i in range(0, total_chunks, batch_size):
-            batch = chunks[i:i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (total_chunks + batch_size - 1) // batch_size
-            
-            print(f"   Processing batch {batch_num}/{total_batches} ({len(batch)} chunks)...")
-            
-            if not milvus_service.insert_documents(batch):
-                print(f"❌ Failed to insert batch {batch_num}")
-                return False
-            
-            # Small delay between batches
-            time.sleep(0.5)
+        # Buffered writes: no flush per batch, one flush + compaction at the end
+        with milvus_service.bulk_write():
+            for i in range(0, total_chunks, batch_size):
+                batch = chunks[i:i + batch_size]
+                batch_num = i // batch_size + 1
+                total_batches = (total_chunks + batch_size - 1) // batch_size
+                
+                print(f"   Processing batch {batch_num}/{total_batches} ({len(batch)} chunks)...")
+                
+                if not milvus_service.insert_documents(batch):
+                    print(f"❌ Failed to insert batch {batch_num}")
+                    return False
         
         print("✅ All documents inserted successfully")
         
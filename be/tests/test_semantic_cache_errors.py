@@ -0,0 +1,86 @@
+"""
+A failed answer generation must not be stored in the semantic cache
+
+Run from be/:
+    python -m pytest tests
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from langchain_core.messages import HumanMessage
+
+from app.agent import graph_builder
+from app.agent.graph_builder import MainGraphBuilder
+from app.services.openai_service import openai_service
+from app.services.rag_service import RAGService
+
+DOCUMENTS = [
+    {
+        "title": "Đăng ký khai sinh",
+        "section": "Hồ sơ",
+        "file_name": "khai_sinh.md",
+        "content": "Tờ khai đăng ký khai sinh theo mẫu; giấy chứng sinh.",
+        "score": 0.91,
+    }
+]
+
+
+async def _failing_stream(messages, **kwargs):
+    raise RuntimeError("Rate limit reached")
+    yield  # pragma: no cover - makes this an async generator
+
+
+def _builder(rag_service: RAGService) -> MainGraphBuilder:
+    """MainGraphBuilder with only the state rag_response needs (no graphs compiled)"""
+    builder = MainGraphBuilder.__new__(MainGraphBuilder)
+    builder.rag_service = rag_service
+    builder._speculative = {}
+    builder.speculation_stats = {"started": 0, "used": 0, "wasted": 0}
+    return builder
+
+
+def test_failed_completion_is_not_cached(monkeypatch):
+    rag_service = RAGService()
+    monkeypatch.setattr(rag_service, "connect_milvus", lambda: True)
+
+    async def retrieve(query, mode=None):
+        return DOCUMENTS
+
+    monkeypatch.setattr(rag_service, "aretrieve_documents", retrieve)
+    monkeypatch.setattr(openai_service, "enabled", True)
+    monkeypatch.setattr(openai_service, "astream_chat_completion", _failing_stream)
+
+    async def dispatch(name, data, config=None):
+        return None
+
+    monkeypatch.setattr(graph_builder, "adispatch_custom_event", dispatch)
+
+    stored = []
+
+    async def store(question, result, source_files):
+        stored.append(question)
+
+    monkeypatch.setattr(graph_builder.semantic_cache, "astore_question", store)
+
+    state = SimpleNamespace(messages=[HumanMessage(content="Đăng ký khai sinh cần giấy tờ gì?")])
+    config = {"configurable": {"thread_id": "test-thread"}}
+    result = asyncio.run(_builder(rag_service).rag_response(state, config))
+
+    assert stored == []
+    assert "Rate limit reached" in result["messages"][0].content
+
+
+def test_aquery_flags_failed_generation(monkeypatch):
+    rag_service = RAGService()
+    monkeypatch.setattr(openai_service, "enabled", True)
+
+    async def failing_completion(messages, **kwargs):
+        raise RuntimeError("Service unavailable")
+
+    monkeypatch.setattr(openai_service, "achat_completion", failing_completion)
+
+    result = asyncio.run(rag_service.aquery("Đăng ký khai sinh?", documents=DOCUMENTS))
+
+    assert result["generated"] is False
+    assert result["source_files"] == ["khai_sinh.md"]
@@ -103,6 +103,7 @@ Mình rất vui được đồng hành cùng bạn hôm nay!
       // Set up event listeners
       websocketService.on('connection_status', handleConnectionStatus);
       websocketService.on('chat_response', handleChatResponse);
+      websocketService.on('chat_chunk', handleChatChunk);
       websocketService.on('typing', handleTyping);
       websocketService.on('error', handleWebSocketError);
 
@@ -127,6 +128,7 @@ Mình rất vui được đồng hành cùng bạn hôm nay!
     }
     websocketService.off('connection_status', handleConnectionStatus);
     websocketService.off('chat_response', handleChatResponse);
+    websocketService.off('chat_chunk', handleChatChunk);
     websocketService.off('typing', handleTyping);
     websocketService.off('error', handleWebSocketError);
   };
@@ -149,11 +151,39 @@ Mình rất vui được đồng hành cùng bạn hôm nay!
       metadata: data.metadata
     };
 
-    setMessages(prev => [...prev, botMessage]);
+    // Replace the streamed draft with the final text (citations) and metadata
+    setMessages(prev => {
+      const last = prev[prev.length - 1];
+      if (last?.streaming) {
+        return [...prev.slice(0, -1), { ...botMessage, id: last.id }];
+      }
+      return [...prev, botMessage];
+    });
     setLoading(false);
     setTyping(false);
   };
 
+  const handleChatChunk = (data) => {
+    if (data.session_id !== sessionId) return;
+
+    // Append the token to the pending assistant message, creating it on the first chunk
+    setMessages(prev => {
+      const last = prev[prev.length - 1];
+      if (last?.streaming) {
+        return [...prev.slice(0, -1), { ...last, content: last.content + data.content }];
+      }
+      const draftMessage = {
+        id: Date.now(),
+        type: 'bot',
+        content: data.content,
+        timestamp: new Date().toISOString(),
+        streaming: true,
+      };
+      return [...prev, draftMessage];
+    });
+    setTyping(false);
+  };
+
   const handleTyping = (data) => {
     if (data.session_id !== sessionId) return;
     setTyping(data.typing);
@@ -167,7 +197,11 @@ Mình rất vui được đồng hành cùng bạn hôm nay!
       timestamp: new Date().toISOString(),
       isError: true,
     };
-    setMessages(prev => [...prev, errorMessage]);
+    // Keep any partial answer but stop appending chunks to it
+    setMessages(prev => [
+      ...prev.map(msg => (msg.streaming ? { ...msg, streaming: false } : msg)),
+      errorMessage,
+    ]);
     setLoading(false);
     setTyping(false);
   };
@@ -189,8 +223,8 @@ Mình rất vui được đồng hành cùng bạn hôm nay!
 
     try {
       if (useWebSocket && isWebSocketConnected && sessionId) {
-        // Use WebSocket for real-time communication
-        websocketService.sendChatMessage(messageText, sessionId);
+        // Use WebSocket for real-time communication, streaming the answer as it is generated
+        websocketService.sendChatMessage(messageText, sessionId, true);
       } else {
         // Fall back to HTTP API
         const response = await chatbotAPI.sendMessage({
@@ -571,7 +605,7 @@ Tôi là **DVC.AI**, sẵn sàng hỗ trợ bạn về các thủ tục hành ch
                 {messages.map((message) => (
                   <MessageItem key={message.id} message={message} />
                 ))}
-                {(loading || typing) && (
+                {(loading || typing) && !messages[messages.length - 1]?.streaming && (
                   <div style={{ textAlign: 'center', margin: '16px 0' }}>
                     <Spin size="small" />
                     <Text type="secondary" style={{ marginLeft: '8px' }}>
@@ -107,6 +107,10 @@ class WebSocketService {
       this.emit('chat_response', data);
     });
 
+    this.socket.on('chat_chunk', (data) => {
+      this.emit('chat_chunk', data);
+    });
+
     this.socket.on('typing', (data) => {
       this.emit('typing', data);
     });
@@ -270,11 +274,12 @@ class WebSocketService {
   }
 
   // Enhanced chat methods
-  sendChatMessage(message, sessionId) {
+  sendChatMessage(message, sessionId, stream = false) {
     if (this.socket && this.isConnected) {
       this.socket.emit('chat_message', {
         message: message,
-        session_id: sessionId
+        session_id: sessionId,
+        stream: stream
       });
     }
   }